@@ -0,0 +1,226 @@
+import time
+import asyncio
+import logging
+import threading
+from collections import Counter, OrderedDict, deque
+from typing import Deque
+
+from app.metrics import ADMISSION_REJECTIONS, ADMISSION_WAIT
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of admitted."""
+
+    def __init__(self, budget: str, reason: str, retry_after: float):
+        super().__init__(f"Server is overloaded ({budget}: {reason}), retry later")
+        self.budget = budget
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    """A request waiting for a slot."""
+
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future = loop.create_future()
+        self.granted = False
+
+
+class AdmissionController:
+    """
+    Concurrency limit with a bounded, per-client fair wait queue.
+
+    Up to `concurrency` requests hold a slot at a time. Further requests wait
+    in a queue of at most `queue_size` entries for up to `queue_timeout`
+    seconds, and are rejected right away with Overloaded when the queue is
+    full. Freed slots go to the waiting clients in turn rather than in
+    arrival order, and no client may hold or wait for more than `per_client`
+    slots, so a single client cannot crowd out the others.
+
+    Slots may be released from any thread.
+    """
+
+    def __init__(
+        self,
+        budget: str,
+        concurrency: int,
+        queue_size: int = 0,
+        queue_timeout: float = 0.0,
+        per_client: int = 0,
+        retry_after: float = 1.0
+    ):
+        """
+        Initialize the AdmissionController.
+
+        Args:
+            budget: Name of the budget, used in logs and metrics
+            concurrency: Maximum number of requests holding a slot
+            queue_size: Maximum number of requests waiting for a slot
+            queue_timeout: Maximum time a request waits for a slot (seconds)
+            per_client: Maximum number of slots a client may hold or wait
+                for (0 for no limit)
+            retry_after: Seconds clients are asked to wait before retrying
+        """
+        self.budget = budget
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.per_client = per_client
+        self.retry_after = retry_after
+
+        self.active = 0
+        self.waiting = 0
+
+        # Slots held or waited for by each client
+        self._clients: Counter = Counter()
+
+        # Waiting requests by client; the first client is served next
+        self._waiters: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+
+        self._lock = threading.Lock()
+
+    async def acquire(self, client: str) -> None:
+        """
+        Wait for a slot.
+
+        Args:
+            client: Key of the client making the request
+
+        Raises:
+            Overloaded: If the queue is full, the client has too many
+                requests in flight or no slot freed up in time
+        """
+        with self._lock:
+            self._check_client(client)
+
+            if self.active < self.concurrency and not self.waiting:
+                self.active += 1
+                self._clients[client] += 1
+                return
+
+            if self.waiting >= self.queue_size:
+                raise self._reject("queue_full")
+
+            waiter = _Waiter(asyncio.get_running_loop())
+            self._waiters.setdefault(client, deque()).append(waiter)
+            self.waiting += 1
+            self._clients[client] += 1
+
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            with self._lock:
+                if waiter.granted:
+                    # The slot was handed over just as the wait ended
+                    if isinstance(e, asyncio.CancelledError):
+                        self._release(client)
+                        raise
+                else:
+                    self._remove_waiter(client, waiter)
+                    if isinstance(e, asyncio.CancelledError):
+                        raise
+                    raise self._reject("timeout")
+
+        finally:
+            ADMISSION_WAIT.labels(budget=self.budget).observe(time.perf_counter() - start)
+
+    def try_acquire(self, client: str) -> None:
+        """
+        Take a slot without waiting.
+
+        Args:
+            client: Key of the client making the request
+
+        Raises:
+            Overloaded: If no slot is free or the client has too many
+                requests in flight
+        """
+        with self._lock:
+            self._check_client(client)
+
+            if self.active >= self.concurrency or self.waiting:
+                raise self._reject("full")
+
+            self.active += 1
+            self._clients[client] += 1
+
+    def release(self, client: str) -> None:
+        """
+        Give back a slot and hand it to the next waiting client.
+
+        Args:
+            client: Key of the client that held the slot
+        """
+        with self._lock:
+            self._release(client)
+
+    def _release(self, client: str) -> None:
+        """Give back a slot; the lock must be held."""
+        self.active -= 1
+        self._forget(client)
+
+        while self.active < self.concurrency and self._waiters:
+            next_client, waiters = next(iter(self._waiters.items()))
+            waiter = waiters.popleft()
+
+            # Served clients go to the back of the line
+            if waiters:
+                self._waiters.move_to_end(next_client)
+            else:
+                del self._waiters[next_client]
+
+            self.waiting -= 1
+            self.active += 1
+            waiter.granted = True
+            waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+
+    def _remove_waiter(self, client: str, waiter: _Waiter) -> None:
+        """Take a request out of the queue; the lock must be held."""
+        waiters = self._waiters.get(client)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._waiters[client]
+            self.waiting -= 1
+            self._forget(client)
+
+    def _forget(self, client: str) -> None:
+        """Stop counting a slot for a client; the lock must be held."""
+        self._clients[client] -= 1
+        if self._clients[client] <= 0:
+            del self._clients[client]
+
+    def _check_client(self, client: str) -> None:
+        """Reject a client over its share; the lock must be held."""
+        if self.per_client and self._clients[client] >= self.per_client:
+            raise self._reject("client_limit")
+
+    def _reject(self, reason: str) -> Overloaded:
+        """
+        Count a rejected request.
+
+        Args:
+            reason: Why the request was rejected
+
+        Returns:
+            The exception to raise
+        """
+        ADMISSION_REJECTIONS.labels(budget=self.budget, reason=reason).inc()
+        logger.warning(
+            f"Rejected {self.budget} request ({reason}): "
+            f"{self.active} active, {self.waiting} waiting"
+        )
+        return Overloaded(self.budget, reason, self.retry_after)
+
+
+def _wake(future: "asyncio.Future") -> None:
+    """Wake a waiting request unless it gave up."""
+    if not future.done():
+        future.set_result(None)
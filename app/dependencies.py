@@ -0,0 +1,157 @@
+import os
+import logging
+import threading
+import functools
+from typing import TYPE_CHECKING
+from dotenv import load_dotenv
+
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+    from app.admission import AdmissionController
+    from app.profiling import ProfileStore
+    from app.services.arxiv_service import ArxivService
+    from app.services.indexing_service import IndexingService
+    from app.services.llm_service import LLMService
+    from app.services.markdown_service import MarkdownService
+    from app.services.queue_service import QueueService
+    from app.services.rerank_service import RerankService
+    from app.services.router_service import RouterService
+
+# Load environment variables before reading the settings below
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Services are created on first use so a worker only pays for the
+# imports and initialization of the paths it actually serves
+_lock = threading.RLock()
+
+# Process role: "all" serves chat and ingestion, "chat" never loads the
+# PDF conversion stack, "ingest" only processes papers
+ROLE = os.getenv("ALPHAXIV_ROLE", "all").lower()
+
+# Ingestion mode: "inline" runs jobs on API ingest threads, "queue" hands
+# them to ingest workers through the queue on the shared data volume
+INGEST_MODE = os.getenv("INGEST_MODE", "inline").lower()
+
+
+def ingest_enabled() -> bool:
+    """Whether this process may convert and index papers itself."""
+    return ROLE in ("all", "ingest")
+
+
+def _lazy(factory):
+    """
+    Turn a service factory into a thread-safe lazily created singleton.
+
+    The returned getter can be used directly or as a FastAPI dependency,
+    and exposes is_loaded() for readiness reporting.
+    """
+    instance = None
+
+    @functools.wraps(factory)
+    def getter():
+        nonlocal instance
+        if instance is None:
+            with _lock:
+                if instance is None:
+                    instance = factory()
+                    logger.info(f"Initialized {type(instance).__name__}")
+        return instance
+
+    getter.is_loaded = lambda: instance is not None
+    return getter
+
+
+@_lazy
+def get_arxiv_service() -> "ArxivService":
+    """Get the shared ArxivService."""
+    from app.services.arxiv_service import ArxivService
+    return ArxivService()
+
+
+@_lazy
+def get_markdown_service() -> "MarkdownService":
+    """Get the shared MarkdownService (loads the PDF conversion stack)."""
+    from app.services.markdown_service import MarkdownService
+    return MarkdownService()
+
+
+@_lazy
+def get_indexing_service() -> "IndexingService":
+    """Get the shared IndexingService."""
+    from app.services.indexing_service import IndexingService
+    return IndexingService()
+
+
+@_lazy
+def get_rerank_service() -> "RerankService":
+    """Get the shared RerankService."""
+    from app.services.rerank_service import RerankService
+    return RerankService()
+
+
+@_lazy
+def get_router_service() -> "RouterService":
+    """Get the shared RouterService."""
+    from app.services.router_service import RouterService
+    return RouterService()
+
+
+@_lazy
+def get_llm_service() -> "LLMService":
+    """Get the shared LLMService."""
+    from app.services.llm_service import LLMService
+    return LLMService()
+
+
+@_lazy
+def get_queue_service() -> "QueueService":
+    """Get the shared QueueService."""
+    from app.services.queue_service import QueueService
+    return QueueService()
+
+
+@_lazy
+def get_profile_store() -> "ProfileStore":
+    """Get the shared ProfileStore."""
+    from app.profiling import ProfileStore
+    return ProfileStore()
+
+
+@_lazy
+def get_chat_admission() -> "AdmissionController":
+    """Get the admission budget shared by the chat endpoints."""
+    from app.admission import AdmissionController
+    return AdmissionController(
+        "chat",
+        # Chat requests answered at once; the rest wait in a bounded queue
+        concurrency=int(os.getenv("ADMISSION_CHAT_CONCURRENCY", "16")),
+        queue_size=int(os.getenv("ADMISSION_CHAT_QUEUE_SIZE", "64")),
+        queue_timeout=float(os.getenv("ADMISSION_CHAT_QUEUE_TIMEOUT", "10")),
+        per_client=int(os.getenv("ADMISSION_CHAT_PER_CLIENT", "8")),
+        retry_after=float(os.getenv("ADMISSION_CHAT_RETRY_AFTER", "2")),
+    )
+
+
+@_lazy
+def get_ingest_admission() -> "AdmissionController":
+    """Get the admission budget of inline ingestion jobs."""
+    from app.admission import AdmissionController
+    return AdmissionController(
+        "ingest",
+        # Ingestion jobs running or waiting for an ingest thread
+        concurrency=int(os.getenv("ADMISSION_INGEST_PENDING", "32")),
+        per_client=int(os.getenv("ADMISSION_INGEST_PER_CLIENT", "8")),
+        retry_after=float(os.getenv("ADMISSION_INGEST_RETRY_AFTER", "30")),
+    )
+
+
+@_lazy
+def get_ingest_executor() -> "ThreadPoolExecutor":
+    """Get the threads inline ingestion jobs run on, apart from the request threads."""
+    from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(
+        max_workers=int(os.getenv("INGEST_CONCURRENCY", "2")),
+        thread_name_prefix="ingest"
+    )
@@ -1,18 +1,46 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse
+from typing import Optional
+import os
+import time
+import asyncio
 import logging
+from datetime import timedelta
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 from app.models.schemas import (
     ProcessPaperRequest,
     ProcessPaperResponse,
     ChatRequest,
-    ChatResponse
+    ChatResponse,
+    CollectionChatRequest,
+    CollectionChatResponse,
+    PaperListResponse,
+    PaperMetadata,
+    ProfileListResponse
 )
-from app.services.arxiv_service import ArxivService
-from app.services.markdown_service import MarkdownService
-from app.services.indexing_service import IndexingService
-from app.services.gemini_service import GeminiService
+from app.admission import Overloaded
+from app.metrics import CHAT_DURATION, record_error, render_metrics
+from app.dependencies import (
+    INGEST_MODE,
+    ROLE,
+    get_arxiv_service,
+    get_chat_admission,
+    get_ingest_admission,
+    get_ingest_executor,
+    get_llm_service,
+    get_indexing_service,
+    get_profile_store,
+    get_queue_service,
+    get_rerank_service,
+    get_router_service,
+    ingest_enabled,
+)
+from app.pipeline import run_ingest
+from app.profiling import follow_thread
+from app.tracing import current_trace_id, inject_context, setup_tracing, tracer
 
 # Load environment variables
 load_dotenv()
@@ -24,11 +52,99 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Configure tracing
+setup_tracing()
+
+# Time from module import to the end of startup
+_import_started = time.perf_counter()
+
+# Header identifying clients for admission fairness (e.g. X-Forwarded-For
+# behind a proxy); the peer address is used when unset
+ADMISSION_CLIENT_HEADER = os.getenv("ADMISSION_CLIENT_HEADER", "")
+
+# Most used papers of the recent window loaded into memory at startup, and
+# the time the warm-up may take before the server reports ready anyway
+WARMUP_PAPERS = int(os.getenv("WARMUP_PAPERS", "20"))
+WARMUP_WINDOW_DAYS = float(os.getenv("WARMUP_WINDOW_DAYS", "7"))
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "120"))
+
+def _init_chat_services() -> None:
+    """Create the services used by chat (the PDF stack is left unloaded)."""
+    get_arxiv_service()
+    get_indexing_service()
+    get_rerank_service()
+    get_router_service()
+    get_llm_service()
+
+def _warm_up(state) -> None:
+    """
+    Create the chat services, then load the reranking model, the cached
+    answers and the most used papers into memory.
+
+    Args:
+        state: Application state, updated with the warm-up progress
+    """
+    started = time.perf_counter()
+    _init_chat_services()
+
+    # Loading the cross-encoder takes seconds; keep it off the first chat request
+    get_rerank_service().load_model()
+    get_llm_service().load_answers()
+
+    indexing_service = get_indexing_service()
+    paper_ids = indexing_service.tiering_service.hot_papers(
+        WARMUP_PAPERS, timedelta(days=WARMUP_WINDOW_DAYS)
+    )
+    state.warmup_progress = {"papers": len(paper_ids), "warmed": 0}
+
+    for paper_id in paper_ids:
+        if time.perf_counter() - started > WARMUP_TIMEOUT:
+            logger.warning(
+                f"Warm-up timed out after {state.warmup_progress['warmed']} of {len(paper_ids)} papers"
+            )
+            break
+
+        try:
+            if indexing_service.warm_paper(paper_id):
+                state.warmup_progress["warmed"] += 1
+        except Exception as e:
+            logger.error(f"Error warming paper {paper_id}: {str(e)}")
+
+    logger.info(
+        f"Warmed {state.warmup_progress['warmed']} papers in {time.perf_counter() - started:.3f}s"
+    )
+
+def _warm_up_done(app: FastAPI, task: asyncio.Task) -> None:
+    """Report the server ready once the warm-up ends, even if it failed."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Warm-up failed: {str(task.exception())}")
+    app.state.ready = True
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start serving immediately and warm up in the background."""
+    # Initialization (including the MiniRAG health probe) and the warm-up run
+    # off the event loop; requests arriving earlier create whatever they need
+    # on demand, but /health/ready fails until the warm-up is done
+    app.state.ready = False
+    app.state.warmup_progress = {}
+    app.state.warmup = asyncio.create_task(asyncio.to_thread(_warm_up, app.state))
+    app.state.warmup.add_done_callback(lambda task: _warm_up_done(app, task))
+
+    app.state.startup_seconds = time.perf_counter() - _import_started
+    logger.info(f"API started in {app.state.startup_seconds:.3f}s (role: {ROLE})")
+
+    yield
+
+    if get_llm_service.is_loaded():
+        get_llm_service().save_answers()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="AlphaXIV API",
-    description="API for chatting with arXiv papers using RAG and Gemini",
+    description="API for chatting with arXiv papers using RAG and LLMs",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -38,23 +154,161 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Trace-Id", "X-Profile-Name"],
 )
 
-# Initialize services
-arxiv_service = ArxivService()
-markdown_service = MarkdownService()
-indexing_service = IndexingService()
-gemini_service = GeminiService()
+# Profiles are only taken when PROFILING_ENABLED is set
+profile_store = get_profile_store()
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    """Profile a request when asked to with X-Profile: 1 or ?profile=1."""
+    requested = (
+        request.headers.get("X-Profile") == "1"
+        or request.query_params.get("profile") in ("1", "true")
+    )
+    if not requested or not profile_store.is_authorized(request.headers.get("X-Profile-Token")):
+        return await call_next(request)
+
+    with profile_store.profile("request", f"{request.method} {request.url.path}") as result:
+        response = await call_next(request)
+
+    if result.get("name"):
+        response.headers["X-Profile-Name"] = result["name"]
+
+    return response
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Run each request in a span and return its trace ID in X-Trace-Id."""
+    with tracer.start_as_current_span(f"{request.method} {request.url.path}") as span:
+        span.set_attribute("http.method", request.method)
+        span.set_attribute("http.target", request.url.path)
+
+        response = await call_next(request)
+
+        span.set_attribute("http.status_code", response.status_code)
+        trace_id = current_trace_id()
+        if trace_id:
+            response.headers["X-Trace-Id"] = trace_id
+
+        return response
+
+def _client_id(request: Request) -> str:
+    """Identify the client of a request for per-client admission limits."""
+    if ADMISSION_CLIENT_HEADER:
+        value = request.headers.get(ADMISSION_CLIENT_HEADER, "").split(",")[0].strip()
+        if value:
+            return value
+
+    return request.client.host if request.client else "unknown"
+
+def _overloaded(error: Overloaded) -> HTTPException:
+    """Turn a shed request into a 503 telling the client when to retry."""
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(max(1, round(error.retry_after)))}
+    )
+
+async def admit_chat(request: Request):
+    """Hold a chat slot for the duration of a request, or shed it with a 503."""
+    admission = get_chat_admission()
+    client = _client_id(request)
+
+    try:
+        await admission.acquire(client)
+    except Overloaded as e:
+        raise _overloaded(e)
+
+    try:
+        yield
+    finally:
+        admission.release(client)
 
 @app.get("/")
 async def root():
     """Root endpoint to check if the API is running."""
     return {"message": "Welcome to AlphaXIV API"}
 
+@app.get("/health/live")
+async def health_live():
+    """Liveness check: the process is up and serving requests."""
+    return {"status": "ok"}
+
+@app.get("/health/ready")
+async def health_ready(request: Request):
+    """Readiness check: fails with 503 until the startup warm-up is done."""
+    state = request.app.state
+    body = {"status": "ready" if state.ready else "warming", **state.warmup_progress}
+    if not state.ready:
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+@app.get("/metrics")
+async def metrics():
+    """Expose Prometheus metrics."""
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
+@app.get("/api/profiles", response_model=ProfileListResponse)
+async def list_profiles(request: Request):
+    """List stored profiles."""
+    _check_profile_access(request)
+    return ProfileListResponse(profiles=profile_store.list_profiles())
+
+@app.get("/api/profiles/{name}")
+async def get_profile(name: str, request: Request):
+    """Fetch a stored profile in folded stack format."""
+    _check_profile_access(request)
+
+    path = profile_store.get_profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    return FileResponse(path, media_type="text/plain")
+
+def _check_profile_access(request: Request) -> None:
+    """Reject profile requests unless profiling is enabled and authorized."""
+    if not profile_store.is_authorized(request.headers.get("X-Profile-Token")):
+        raise HTTPException(
+            status_code=403,
+            detail="Profiling is disabled or the profile token is invalid"
+        )
+
+# Catalog queries block, so these handlers run on the request thread pool
+@app.get("/api/papers", response_model=PaperListResponse)
+def list_papers(
+    status: Optional[str] = Query(None, description="Only papers with this processing status"),
+    q: Optional[str] = Query(None, description="Words to search for in titles and abstracts"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    arxiv_service=Depends(get_arxiv_service)
+):
+    """List papers with pagination, status filter and title/abstract search."""
+    papers, total = arxiv_service.list_papers(status, q, limit, offset)
+
+    return PaperListResponse(
+        papers=[PaperMetadata(**paper) for paper in papers],
+        total=total,
+        limit=limit,
+        offset=offset
+    )
+
+@app.get("/api/papers/{paper_id}", response_model=PaperMetadata)
+def get_paper(paper_id: str, arxiv_service=Depends(get_arxiv_service)):
+    """Get a paper's metadata."""
+    paper = arxiv_service.get_paper(paper_id)
+    if paper is None:
+        raise HTTPException(status_code=404, detail="Paper not found")
+
+    return PaperMetadata(**paper)
+
 @app.post("/api/papers/process", response_model=ProcessPaperResponse)
 async def process_paper(
     request: ProcessPaperRequest,
-    background_tasks: BackgroundTasks
+    http_request: Request,
+    arxiv_service=Depends(get_arxiv_service)
 ):
     """
     Process an arXiv paper URL:
@@ -76,12 +330,50 @@ async def process_paper(
                 message="Paper already processed and indexed"
             )
 
-        # Download the PDF in the background
-        background_tasks.add_task(
-            process_paper_task,
+        # Hand the job to the ingest workers through the shared queue
+        if INGEST_MODE == "queue":
+            queue_service = get_queue_service()
+            if queue_service.is_full() and not queue_service.is_queued(paper_id):
+                raise HTTPException(
+                    status_code=503,
+                    detail="Too many papers are waiting to be processed, retry later",
+                    headers={"Retry-After": "60"}
+                )
+
+            queued = queue_service.enqueue(
+                paper_id,
+                request.arxiv_url,
+                inject_context()
+            )
+            return ProcessPaperResponse(
+                paper_id=paper_id,
+                status="queued" if queued else "processing",
+                message="Paper queued for processing" if queued else "Paper is already queued for processing"
+            )
+
+        # Chat-only workers never load the PDF conversion stack
+        if not ingest_enabled():
+            raise HTTPException(
+                status_code=503,
+                detail="Paper processing is not available on this server"
+            )
+
+        # Ingestion runs on its own threads within its own budget, so it
+        # never takes the threads or slots chat requests are served with
+        admission = get_ingest_admission()
+        client = _client_id(http_request)
+        try:
+            admission.try_acquire(client)
+        except Overloaded as e:
+            raise _overloaded(e)
+
+        job = get_ingest_executor().submit(
+            run_ingest,
             paper_id,
-            request.arxiv_url
+            request.arxiv_url,
+            inject_context()
         )
+        job.add_done_callback(lambda _: admission.release(client))
 
         return ProcessPaperResponse(
             paper_id=paper_id,
@@ -89,83 +381,178 @@ async def process_paper(
             message="Paper processing started. Note: MiniRAG server may not be running, but the paper will still be processed and can be queried."
         )
 
+    except HTTPException:
+        raise
+
     except Exception as e:
         logger.error(f"Error processing paper: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/chat", response_model=ChatResponse)
-async def chat_with_paper(request: ChatRequest):
+# Chat handlers run on the request thread pool, within the chat budget
+@app.post("/api/chat", response_model=ChatResponse, dependencies=[Depends(admit_chat)])
+@follow_thread
+def chat_with_paper(
+    request: ChatRequest,
+    arxiv_service=Depends(get_arxiv_service),
+    indexing_service=Depends(get_indexing_service),
+    rerank_service=Depends(get_rerank_service),
+    router_service=Depends(get_router_service),
+    llm_service=Depends(get_llm_service)
+):
     """
-    Chat with a processed arXiv paper:
+    Chat with an arXiv paper, answering from what is indexed so far while
+    it is still being processed:
     1. Retrieve relevant context using MiniRAG
-    2. Generate a response using Gemini
+    2. Rerank the context (if enabled)
+    3. Route the query by complexity (if enabled)
+    4. Generate a response with the routed LLM
     """
+    start = time.perf_counter()
+
     try:
-        # Check if paper exists and is processed
-        if not arxiv_service.is_paper_processed(request.paper_id):
+        # Check if paper exists and at least its abstract is available
+        completeness = arxiv_service.get_completeness(request.paper_id)
+        if completeness is None:
             raise HTTPException(
                 status_code=404,
                 detail="Paper not found or not yet processed"
             )
 
-        # Retrieve context using MiniRAG
+        # Retrieve context using MiniRAG, widening the candidate set when
+        # the reranker will narrow it down again
         context = indexing_service.retrieve_context(
             request.paper_id,
-            request.query
+            request.query,
+            top_k=rerank_service.candidates if rerank_service.enabled else None
         )
 
-        # Generate response using Gemini
-        response = gemini_service.generate_response(
+        # Keep only the best chunks to cut prompt tokens
+        context = rerank_service.rerank(request.query, context)
+
+        # Send simple lookups to a faster model with less context
+        decision = router_service.route(request.query, context, "chat")
+        context = decision["context"]
+
+        # Generate response with the routed LLM
+        response = llm_service.generate_response(
             request.query,
-            context
+            context,
+            request_class=decision["request_class"],
+            temperature=decision["temperature"]
         )
 
+        elapsed = time.perf_counter() - start
+        CHAT_DURATION.observe(elapsed)
+
+        if decision["route"]:
+            logger.info(f"Answered {decision['route']} query in {elapsed:.2f}s")
+
         return ChatResponse(
             paper_id=request.paper_id,
             query=request.query,
             response=response,
-            context=context
+            context=context,
+            route=decision["route"],
+            completeness=completeness
         )
 
+    except HTTPException:
+        raise
+
     except Exception as e:
         logger.error(f"Error chatting with paper: {str(e)}")
+        record_error("chat")
         raise HTTPException(status_code=500, detail=str(e))
 
-async def process_paper_task(paper_id: str, arxiv_url: str):
-    """Background task to process a paper."""
+@app.post("/api/chat/collection", response_model=CollectionChatResponse, dependencies=[Depends(admit_chat)])
+@follow_thread
+def chat_with_collection(
+    request: CollectionChatRequest,
+    arxiv_service=Depends(get_arxiv_service),
+    indexing_service=Depends(get_indexing_service),
+    rerank_service=Depends(get_rerank_service),
+    router_service=Depends(get_router_service),
+    llm_service=Depends(get_llm_service)
+):
+    """
+    Chat with a collection of processed arXiv papers:
+    1. Retrieve context from every selected paper concurrently
+    2. Rerank the pooled context (if enabled) and fit it into the budget
+    3. Route the query by complexity (if enabled)
+    4. Generate a response that cites the papers with the routed LLM
+    """
+    start = time.perf_counter()
+
     try:
-        # Download the PDF
-        pdf_path = arxiv_service.download_paper(paper_id, arxiv_url)
-        logger.info(f"Downloaded PDF for paper {paper_id} to {pdf_path}")
+        # Keep the order of the request and drop duplicates
+        requested = list(dict.fromkeys(request.paper_ids))
 
-        try:
-            # Convert to markdown
-            markdown_content = markdown_service.convert_to_markdown(pdf_path)
-            logger.info(f"Converted PDF for paper {paper_id} to markdown")
-
-            # Save markdown content
-            markdown_path = markdown_service.save_markdown(paper_id, markdown_content)
-            logger.info(f"Saved markdown for paper {paper_id} to {markdown_path}")
-
-            try:
-                # Index the content
-                indexing_service.index_paper(paper_id, markdown_path)
-                logger.info(f"Indexed paper {paper_id}")
-            except Exception as e:
-                logger.error(f"Error indexing paper {paper_id}: {str(e)}")
-                # Continue processing even if indexing fails
-
-            # Mark paper as processed
-            arxiv_service.mark_paper_as_processed(paper_id)
-            logger.info(f"Paper {paper_id} processed successfully")
+        if len(requested) > indexing_service.collection_max_papers:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {indexing_service.collection_max_papers} papers can be selected"
+            )
 
-        except Exception as e:
-            logger.error(f"Error converting PDF for paper {paper_id}: {str(e)}")
-            # Don't mark as processed if conversion fails
+        paper_ids = [p for p in requested if arxiv_service.is_paper_processed(p)]
+        missing_paper_ids = [p for p in requested if p not in paper_ids]
+
+        if not paper_ids:
+            raise HTTPException(
+                status_code=404,
+                detail="None of the papers are found or processed yet"
+            )
+
+        context = indexing_service.retrieve_collection_context(paper_ids, request.query)
+
+        # Reranker scores are comparable across papers, so rerank the pool
+        # before cutting it down to the global budget
+        if rerank_service.enabled:
+            context = rerank_service.rerank(
+                request.query,
+                context[:rerank_service.candidates],
+                top_n=indexing_service.collection_top_k
+            )
+
+        context = indexing_service.budget_context(context)
+
+        decision = router_service.route(request.query, context, "collection")
+        context = decision["context"]
+
+        response = llm_service.generate_response(
+            request.query,
+            context,
+            request_class=decision["request_class"],
+            temperature=decision["temperature"]
+        )
+
+        elapsed = time.perf_counter() - start
+        CHAT_DURATION.observe(elapsed)
+
+        if decision["route"]:
+            logger.info(f"Answered {decision['route']} collection query in {elapsed:.2f}s")
+
+        return CollectionChatResponse(
+            paper_ids=paper_ids,
+            missing_paper_ids=missing_paper_ids,
+            query=request.query,
+            response=response,
+            context=context,
+            route=decision["route"]
+        )
+
+    except HTTPException:
+        raise
 
     except Exception as e:
-        logger.error(f"Error downloading paper {paper_id}: {str(e)}")
+        logger.error(f"Error chatting with collection: {str(e)}")
+        record_error("chat")
+        raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=os.getenv("RELOAD", "false").lower() == "true"
+    )
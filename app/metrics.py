@@ -0,0 +1,161 @@
+import os
+import time
+import logging
+from contextlib import contextmanager
+from typing import Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+logger = logging.getLogger(__name__)
+
+# Buckets from 5 ms (local retrieval) up to 5 min (conversion of long papers)
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+STAGE_DURATION = Histogram(
+    "alphaxiv_stage_duration_seconds",
+    "Duration of a pipeline stage",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+
+CHAT_DURATION = Histogram(
+    "alphaxiv_chat_duration_seconds",
+    "End-to-end duration of chat requests",
+    buckets=LATENCY_BUCKETS,
+)
+
+GENERATION_DURATION = Histogram(
+    "alphaxiv_generation_duration_seconds",
+    "Duration of LLM generation by prompt version and model",
+    ["prompt", "model"],
+    buckets=LATENCY_BUCKETS,
+)
+
+PROMPT_TOKENS = Counter(
+    "alphaxiv_prompt_tokens_total",
+    "Prompt tokens sent to the LLM by prompt version and model",
+    ["prompt", "model"],
+)
+
+OUTPUT_TOKENS = Counter(
+    "alphaxiv_output_tokens_total",
+    "Tokens generated by the LLM by prompt version and model",
+    ["prompt", "model"],
+)
+
+ROUTE_DECISIONS = Counter(
+    "alphaxiv_route_decisions_total",
+    "Chat requests by query complexity route",
+    ["route"],
+)
+
+FALLBACK_RETRIEVALS = Counter(
+    "alphaxiv_fallback_retrievals_total",
+    "Retrievals answered by the local retriever alone because MiniRAG returned nothing",
+)
+
+CACHE_HITS = Counter(
+    "alphaxiv_cache_hits_total",
+    "Cache hits",
+    ["cache"],
+)
+
+CACHE_MISSES = Counter(
+    "alphaxiv_cache_misses_total",
+    "Cache misses",
+    ["cache"],
+)
+
+ERRORS = Counter(
+    "alphaxiv_errors_total",
+    "Errors by pipeline stage",
+    ["stage"],
+)
+
+ADMISSION_REJECTIONS = Counter(
+    "alphaxiv_admission_rejections_total",
+    "Requests shed by admission control by budget and reason",
+    ["budget", "reason"],
+)
+
+ADMISSION_WAIT = Histogram(
+    "alphaxiv_admission_wait_seconds",
+    "Time requests waited in the admission queue",
+    ["budget"],
+    buckets=LATENCY_BUCKETS,
+)
+
+INGEST_IN_PROGRESS = Gauge(
+    "alphaxiv_ingest_jobs_in_progress",
+    "Paper ingestion jobs currently running",
+    multiprocess_mode="livesum",
+)
+
+
+@contextmanager
+def track_stage(stage: str):
+    """
+    Time a pipeline stage and count it as an error if it raises.
+
+    Args:
+        stage: Name of the stage
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERRORS.labels(stage=stage).inc()
+        raise
+    finally:
+        STAGE_DURATION.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+def record_error(stage: str) -> None:
+    """
+    Count an error that was handled without raising.
+
+    Args:
+        stage: Name of the stage
+    """
+    ERRORS.labels(stage=stage).inc()
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """
+    Count a cache lookup.
+
+    Args:
+        cache: Name of the cache
+        hit: Whether the lookup was a hit
+    """
+    (CACHE_HITS if hit else CACHE_MISSES).labels(cache=cache).inc()
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Render all metrics in the Prometheus text format.
+
+    When PROMETHEUS_MULTIPROC_DIR is set (uvicorn with several workers),
+    the metrics of all worker processes are aggregated.
+
+    Returns:
+        The rendered metrics and their content type
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+    return generate_latest(), CONTENT_TYPE_LATEST
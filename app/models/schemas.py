@@ -18,7 +18,7 @@ class ProcessPaperResponse(BaseModel):
     )
     status: str = Field(
         ..., 
-        description="Status of the processing (processing, completed, error, already_processed)"
+        description="Status of the processing (queued, processing, completed, error, already_processed)"
     )
     message: str = Field(
         ..., 
@@ -54,7 +54,92 @@ class ChatResponse(BaseModel):
     )
     context: List[Dict[str, Any]] = Field(
         ..., 
-        description="Context used for generating the response"
+        description=(
+            "Context used for generating the response. Each chunk has 'text', "
+            "a fused 'score' normalized to [0, 1] and the per-retriever "
+            "'sources' (rank and raw score) that contributed to it"
+        )
+    )
+    route: Optional[str] = Field(
+        None,
+        description="Query complexity route ('simple' or 'complex'), or null when routing is disabled"
+    )
+    completeness: float = Field(
+        1.0,
+        description=(
+            "Fraction of the paper's pages that were indexed when answering: 1.0 once "
+            "processing finished, lower while the paper is still being converted "
+            "(0.0 when only the abstract is available)"
+        )
+    )
+
+
+class CollectionChatRequest(BaseModel):
+    """Request model for chatting with a collection of papers."""
+    paper_ids: List[str] = Field(
+        ...,
+        min_length=1,
+        description="IDs of the papers in the collection"
+    )
+    query: str = Field(
+        ...,
+        description="User query about the papers"
+    )
+
+
+class CollectionChatResponse(BaseModel):
+    """Response model for collection chat."""
+    paper_ids: List[str] = Field(
+        ...,
+        description="IDs of the processed papers that were searched"
+    )
+    missing_paper_ids: List[str] = Field(
+        default_factory=list,
+        description="IDs of requested papers that are not processed and were skipped"
+    )
+    query: str = Field(
+        ...,
+        description="User query"
+    )
+    response: str = Field(
+        ...,
+        description="Generated response citing paper IDs"
+    )
+    context: List[Dict[str, Any]] = Field(
+        ...,
+        description=(
+            "Context used for generating the response. Each chunk has 'text', "
+            "the 'paper_id' it came from, its 'paper_rank' within that paper "
+            "and a 'score' normalized to [0, 1]"
+        )
+    )
+    route: Optional[str] = Field(
+        None,
+        description="Query complexity route ('simple' or 'complex'), or null when routing is disabled"
+    )
+
+
+class ProfileInfo(BaseModel):
+    """Model for a stored profile."""
+    name: str = Field(
+        ...,
+        description="File name of the profile (folded stacks)"
+    )
+    size: int = Field(
+        ...,
+        description="Size of the profile in bytes"
+    )
+    created: str = Field(
+        ...,
+        description="Creation time of the profile"
+    )
+
+
+class ProfileListResponse(BaseModel):
+    """Response model for listing profiles."""
+    profiles: List[ProfileInfo] = Field(
+        ...,
+        description="Stored profiles, newest first"
     )
 
 
@@ -70,3 +155,23 @@ class PaperMetadata(BaseModel):
     is_processed: bool = False
     processing_status: str = "not_started"
     last_updated: Optional[str] = None
+
+
+class PaperListResponse(BaseModel):
+    """Response model for listing papers."""
+    papers: List[PaperMetadata] = Field(
+        ...,
+        description="Papers on this page, newest first or by relevance when searching"
+    )
+    total: int = Field(
+        ...,
+        description="Number of papers matching the filters"
+    )
+    limit: int = Field(
+        ...,
+        description="Maximum number of papers per page"
+    )
+    offset: int = Field(
+        ...,
+        description="Number of papers skipped"
+    )
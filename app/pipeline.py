@@ -0,0 +1,149 @@
+import os
+import logging
+import functools
+from typing import Any, Dict, Optional
+
+from app.dependencies import (
+    get_arxiv_service,
+    get_indexing_service,
+    get_markdown_service,
+    get_profile_store,
+)
+from app.metrics import INGEST_IN_PROGRESS
+from app.storage import LockUnavailable, paper_lock
+from app.tracing import attach_context, detach_context, tracer
+
+logger = logging.getLogger(__name__)
+
+# Publish the abstract and the converted leading pages of a paper so it can
+# be chatted with before ingestion finishes; papers longer than
+# PDF_PAGES_PER_RANGE pages are converted in ranges to publish their pages
+PROGRESSIVE_INGEST = os.getenv("PROGRESSIVE_INGEST", "true").lower() == "true"
+
+
+def run_ingest(
+    paper_id: str,
+    arxiv_url: str,
+    trace_context: Optional[Dict[str, str]] = None
+) -> bool:
+    """
+    Run the ingestion pipeline for a paper.
+
+    Used both by the API (on its ingest threads) and by the ingest worker.
+
+    Args:
+        paper_id: ID of the paper
+        arxiv_url: URL of the arXiv paper
+        trace_context: Trace context of the request that started the job
+
+    Returns:
+        True if the paper was processed, False otherwise
+    """
+    # Continue the trace of the request that started the job
+    token = attach_context(trace_context)
+    try:
+        with tracer.start_as_current_span("run_ingest") as span, \
+                INGEST_IN_PROGRESS.track_inprogress():
+            span.set_attribute("paper.id", paper_id)
+
+            # Only one process ingests a given paper at a time
+            with paper_lock(paper_id, "ingest", blocking=False):
+                profile_store = get_profile_store()
+                if profile_store.should_sample_ingest():
+                    with profile_store.profile("ingest", paper_id):
+                        return _process_paper(paper_id, arxiv_url)
+
+                return _process_paper(paper_id, arxiv_url)
+
+    except LockUnavailable:
+        logger.info(f"Paper {paper_id} is already being ingested by another process")
+        return False
+
+    finally:
+        detach_context(token)
+
+
+def _process_paper(paper_id: str, arxiv_url: str) -> bool:
+    """Download, convert and index a paper."""
+    arxiv_service = get_arxiv_service()
+    markdown_service = get_markdown_service()
+    indexing_service = get_indexing_service()
+
+    try:
+        # Download the PDF
+        pdf_path = arxiv_service.download_paper(paper_id, arxiv_url)
+        logger.info(f"Downloaded PDF for paper {paper_id} to {pdf_path}")
+
+        # Title, authors and abstract for listing and search
+        arxiv_service.update_paper_metadata(paper_id)
+
+        try:
+            metadata = arxiv_service.update_metadata(paper_id, processing_status="converting")
+
+            on_progress = None
+            if PROGRESSIVE_INGEST:
+                on_progress = functools.partial(_publish_partial, paper_id)
+
+                # The abstract can be chatted with while the PDF is converted
+                if metadata.get("abstract"):
+                    try:
+                        on_progress(_abstract_markdown(metadata), 0.0)
+                    except Exception as e:
+                        logger.warning(f"Could not publish the abstract of paper {paper_id}: {str(e)}")
+
+            # Convert to markdown
+            markdown_content = markdown_service.convert_to_markdown(pdf_path, on_progress)
+            logger.info(f"Converted PDF for paper {paper_id} to markdown")
+
+            # Save markdown content
+            markdown_service.save_markdown(paper_id, markdown_content)
+
+            try:
+                # Index the content
+                indexing_service.index_paper(paper_id, markdown_content)
+                logger.info(f"Indexed paper {paper_id}")
+            except Exception as e:
+                logger.error(f"Error indexing paper {paper_id}: {str(e)}")
+                # Continue processing even if indexing fails
+
+            # Mark paper as processed
+            arxiv_service.mark_paper_as_processed(paper_id)
+            logger.info(f"Paper {paper_id} processed successfully")
+
+            return True
+
+        except Exception as e:
+            logger.error(f"Error converting PDF for paper {paper_id}: {str(e)}")
+            # Don't mark as processed if conversion fails, and stop serving
+            # the leading pages of a paper that will not be completed
+            arxiv_service.update_metadata(paper_id, processing_status="error", completeness=None)
+            try:
+                markdown_service.discard_partial(paper_id)
+            except Exception as e:
+                logger.warning(f"Could not remove the partial markdown of paper {paper_id}: {str(e)}")
+
+    except Exception as e:
+        logger.error(f"Error downloading paper {paper_id}: {str(e)}")
+
+    return False
+
+
+def _publish_partial(paper_id: str, markdown_content: str, completeness: float) -> None:
+    """
+    Make the leading part of a paper's content available to chat.
+
+    Args:
+        paper_id: ID of the paper
+        markdown_content: Markdown converted so far
+        completeness: Fraction of the paper's pages it covers
+    """
+    get_markdown_service().save_markdown(paper_id, markdown_content, complete=False)
+    get_arxiv_service().update_metadata(paper_id, completeness=round(completeness, 3))
+
+    logger.info(f"Published {completeness:.0%} of paper {paper_id} for chat")
+
+
+def _abstract_markdown(metadata: Dict[str, Any]) -> str:
+    """Build the markdown of a paper's title and abstract."""
+    title = metadata.get("title") or metadata.get("paper_id", "")
+    return f"# {title}\n\n## Abstract\n\n{metadata['abstract']}"
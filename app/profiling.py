@@ -0,0 +1,246 @@
+import os
+import re
+import sys
+import time
+import random
+import logging
+import functools
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_NAME_PATTERN = re.compile(r"^[\w.-]+\.folded$")
+
+# Profiler of the request being handled, if it is profiled
+_active_profiler: ContextVar[Optional["SamplingProfiler"]] = ContextVar("active_profiler", default=None)
+
+
+class SamplingProfiler:
+    """
+    Sampling profiler for a thread and the threads it hands work to.
+
+    A background thread periodically captures the target threads' stacks and
+    counts identical stacks. The result is in the "folded" format used by
+    flamegraph.pl, speedscope and inferno: one "root;...;leaf count" per line.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.005):
+        """
+        Initialize the SamplingProfiler.
+
+        Args:
+            thread_id: Thread to sample (defaults to the calling thread)
+            interval: Seconds between samples
+        """
+        self.thread_ids = {thread_id or threading.get_ident()}
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> "SamplingProfiler":
+        """Start sampling."""
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        """
+        Stop sampling.
+
+        Returns:
+            Sample counts keyed by folded stack
+        """
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def follow(self, thread_id: int) -> None:
+        """Start sampling another thread, e.g. one a sync handler runs in."""
+        self.thread_ids = self.thread_ids | {thread_id}
+
+    def unfollow(self, thread_id: int) -> None:
+        """Stop sampling a followed thread."""
+        self.thread_ids = self.thread_ids - {thread_id}
+
+    def _run(self) -> None:
+        """Sample the target threads until stopped."""
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in self.thread_ids:
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                    frame = frame.f_back
+
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+
+def follow_thread(func):
+    """
+    Decorate a sync request handler so that a profile of the request also
+    samples the worker thread the handler runs in.
+
+    Args:
+        func: Request handler
+
+    Returns:
+        The wrapped handler
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = _active_profiler.get()
+        if profiler is None:
+            return func(*args, **kwargs)
+
+        thread_id = threading.get_ident()
+        profiler.follow(thread_id)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.unfollow(thread_id)
+
+    return wrapper
+
+
+class ProfileStore:
+    """Stores profiles as folded stack files under data/profiles."""
+
+    def __init__(self):
+        """Initialize the ProfileStore."""
+        self.profiles_dir = Path(os.getenv("PROFILING_DIR", "data/profiles"))
+
+        # Admin switch; profiling is never triggered unless this is set
+        self.enabled = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+
+        # Optional shared secret expected in the X-Profile-Token header
+        self.token = os.getenv("PROFILING_TOKEN", "")
+
+        self.interval = float(os.getenv("PROFILING_INTERVAL_MS", "5")) / 1000
+        self.ingest_sample_rate = float(os.getenv("PROFILING_INGEST_SAMPLE_RATE", "0.0"))
+
+    def is_authorized(self, token: Optional[str]) -> bool:
+        """
+        Check whether a caller may trigger or read profiles.
+
+        Args:
+            token: Value of the X-Profile-Token header
+
+        Returns:
+            True if profiling is enabled and the token matches
+        """
+        if not self.enabled:
+            return False
+        return not self.token or token == self.token
+
+    def should_sample_ingest(self) -> bool:
+        """Decide whether to profile an ingestion job."""
+        return self.enabled and random.random() < self.ingest_sample_rate
+
+    @contextmanager
+    def profile(self, kind: str, label: str):
+        """
+        Profile the calling thread for the duration of the block.
+
+        Sync handlers decorated with follow_thread are sampled as well.
+
+        Args:
+            kind: Profile category (e.g. "request", "ingest")
+            label: Short description such as the route or paper ID
+
+        Yields:
+            A dict that receives the profile 'name' once it is saved
+        """
+        result: Dict[str, Any] = {}
+        profiler = SamplingProfiler(interval=self.interval).start()
+        token = _active_profiler.set(profiler)
+        start = time.perf_counter()
+
+        try:
+            yield result
+        finally:
+            _active_profiler.reset(token)
+            stacks = profiler.stop()
+            elapsed = time.perf_counter() - start
+            try:
+                result["name"] = self.save(kind, label, stacks)
+                logger.info(
+                    f"Saved {kind} profile {result['name']} "
+                    f"({profiler.samples} samples over {elapsed:.3f}s)"
+                )
+            except Exception as e:
+                logger.error(f"Error saving profile: {str(e)}")
+
+    def save(self, kind: str, label: str, stacks: Counter) -> str:
+        """
+        Write folded stacks to a profile file.
+
+        Args:
+            kind: Profile category
+            label: Short description such as the route or paper ID
+            stacks: Sample counts keyed by folded stack
+
+        Returns:
+            Name of the profile file
+        """
+        self.profiles_dir.mkdir(parents=True, exist_ok=True)
+
+        safe_label = re.sub(r"[^\w.-]+", "_", label).strip("_")[:60]
+        timestamp = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+        name = f"{timestamp}_{kind}_{safe_label}.folded"
+
+        with open(self.profiles_dir / name, 'w', encoding='utf-8') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        return name
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        """
+        List stored profiles, newest first.
+
+        Returns:
+            Name, size and creation time of each profile
+        """
+        if not self.profiles_dir.exists():
+            return []
+
+        profiles = []
+        for path in self.profiles_dir.glob("*.folded"):
+            stat = path.stat()
+            profiles.append({
+                "name": path.name,
+                "size": stat.st_size,
+                "created": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            })
+
+        profiles.sort(key=lambda x: x["name"], reverse=True)
+        return profiles
+
+    def get_profile_path(self, name: str) -> Optional[Path]:
+        """
+        Resolve a profile name to its file.
+
+        Args:
+            name: Name of the profile file
+
+        Returns:
+            Path to the profile, or None if the name is invalid or missing
+        """
+        if not PROFILE_NAME_PATTERN.match(name):
+            return None
+
+        path = self.profiles_dir / name
+        return path if path.is_file() else None
@@ -0,0 +1,229 @@
+import os
+import random
+import string
+import hashlib
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PromptTemplate:
+    """
+    A versioned prompt template, parsed once at registration.
+
+    Rendering joins the precompiled literal parts with the slot values, so
+    no format string is parsed and no string is built by repeated
+    concatenation per request.
+    """
+
+    def __init__(self, name: str, version: str, template: str):
+        """
+        Initialize the PromptTemplate.
+
+        Args:
+            name: Prompt name (e.g. "paper_chat")
+            version: Prompt version (e.g. "v2")
+            template: Template text with {slot} placeholders
+        """
+        self.name = name
+        self.version = version
+        self.id = f"{name}:{version}"
+        self.fingerprint = hashlib.sha256(template.encode('utf-8')).hexdigest()[:12]
+
+        self.parts: List[Tuple[str, Optional[str]]] = [
+            (literal, field)
+            for literal, field, _, _ in string.Formatter().parse(template)
+        ]
+        self.slots = [field for _, field in self.parts if field]
+
+        # Text before the first slot; identical for every request, so it can
+        # be served from the provider's prefix cache
+        self.prefix = self.parts[0][0] if self.parts else ""
+
+    def render(self, **values: str) -> str:
+        """
+        Fill the template.
+
+        Args:
+            **values: Value for every slot
+
+        Returns:
+            The prompt
+        """
+        pieces = []
+        for literal, field in self.parts:
+            pieces.append(literal)
+            if field:
+                pieces.append(values[field])
+        return "".join(pieces)
+
+
+class PromptRegistry:
+    """
+    Registry of prompt templates by name and version.
+
+    PROMPT_VERSIONS selects the version used for each prompt
+    (e.g. "paper_chat=v1,collection_chat=v2"); otherwise the latest
+    registered version is used. PROMPT_AB_TEST sends a fraction of
+    requests to another version (e.g. "paper_chat=v1:0.2").
+    """
+
+    def __init__(self):
+        """Initialize the PromptRegistry."""
+        self._templates: Dict[str, Dict[str, PromptTemplate]] = {}
+        self.versions = self._parse(os.getenv("PROMPT_VERSIONS", ""))
+        self.ab_tests = {
+            name: (version.split(":")[0], float(version.split(":")[1]))
+            for name, version in self._parse(os.getenv("PROMPT_AB_TEST", "")).items()
+            if ":" in version
+        }
+
+    def register(self, name: str, version: str, template: str) -> PromptTemplate:
+        """
+        Register a prompt template.
+
+        Args:
+            name: Prompt name
+            version: Prompt version
+            template: Template text with {slot} placeholders
+
+        Returns:
+            The compiled template
+        """
+        compiled = PromptTemplate(name, version, template)
+        self._templates.setdefault(name, {})[version] = compiled
+        return compiled
+
+    def get(self, name: str, version: Optional[str] = None) -> PromptTemplate:
+        """
+        Get a prompt template.
+
+        Args:
+            name: Prompt name
+            version: Prompt version; defaults to the configured version,
+                subject to any A/B test
+
+        Returns:
+            The template
+        """
+        versions = self._templates[name]
+
+        if version is None:
+            version = self.versions.get(name) or self._latest(name)
+
+            ab_test = self.ab_tests.get(name)
+            if ab_test and ab_test[0] in versions and random.random() < ab_test[1]:
+                version = ab_test[0]
+
+        if version not in versions:
+            logger.warning(f"Unknown prompt version {name}:{version}, using the latest")
+            version = self._latest(name)
+
+        return versions[version]
+
+    def _latest(self, name: str) -> str:
+        """Get the latest version of a prompt ("v10" sorts after "v9")."""
+        return max(self._templates[name], key=lambda v: (len(v), v))
+
+    def _parse(self, value: str) -> Dict[str, str]:
+        """Parse a "name=value,name=value" setting."""
+        return dict(
+            item.strip().split("=", 1)
+            for item in value.split(",")
+            if "=" in item
+        )
+
+
+def format_context(context: List[Dict[str, Any]], cite: bool = False) -> str:
+    """
+    Format context chunks for a prompt.
+
+    Args:
+        context: Context chunks
+        cite: Label every chunk with the ID of its paper
+
+    Returns:
+        The formatted context
+    """
+    if not context:
+        return "No relevant context found."
+
+    if cite:
+        pieces = [
+            f"Context {i} [paper {chunk.get('paper_id', 'unknown')}]:\n{chunk['text']}"
+            for i, chunk in enumerate(context, 1)
+        ]
+    else:
+        pieces = [
+            f"Context {i}:\n{chunk['text']}"
+            for i, chunk in enumerate(context, 1)
+        ]
+
+    return "\n\n".join(pieces)
+
+
+prompt_registry = PromptRegistry()
+
+# v1: the original layout, with instructions on both sides of the context
+prompt_registry.register("paper_chat", "v1", """You are an AI assistant that helps users understand academic papers.
+You have been provided with relevant sections from a paper to answer the user's question.
+
+Here is the relevant context from the paper:
+
+{context}
+
+User question: {query}
+
+Please provide a comprehensive and accurate answer based on the provided context.
+If the context doesn't contain enough information to answer the question,
+acknowledge this limitation and provide the best possible answer with the available information.
+""")
+
+prompt_registry.register("collection_chat", "v1", """You are an AI assistant that helps users understand academic papers.
+You have been provided with relevant sections from several papers to answer the user's question.
+Each section is labeled with the ID of the paper it comes from.
+
+Here is the relevant context from the papers:
+
+{context}
+
+User question: {query}
+
+Please provide a comprehensive and accurate answer based on the provided context.
+Cite the paper ID in square brackets, e.g. [paper 2201.08239], after every statement
+that relies on a paper, and point out where the papers agree or disagree.
+If the context doesn't contain enough information to answer the question,
+acknowledge this limitation and provide the best possible answer with the available information.
+""")
+
+# v2: every instruction comes first, so the whole instruction block is a
+# stable prefix shared by all requests
+prompt_registry.register("paper_chat", "v2", """You are an AI assistant that helps users understand academic papers.
+You will be given relevant sections from a paper and a question about it.
+Provide a comprehensive and accurate answer based on the provided context.
+If the context doesn't contain enough information to answer the question,
+acknowledge this limitation and provide the best possible answer with the available information.
+
+Context from the paper:
+
+{context}
+
+User question: {query}
+""")
+
+prompt_registry.register("collection_chat", "v2", """You are an AI assistant that helps users understand academic papers.
+You will be given relevant sections from several papers and a question about them.
+Each section is labeled with the ID of the paper it comes from.
+Provide a comprehensive and accurate answer based on the provided context.
+Cite the paper ID in square brackets, e.g. [paper 2201.08239], after every statement
+that relies on a paper, and point out where the papers agree or disagree.
+If the context doesn't contain enough information to answer the question,
+acknowledge this limitation and provide the best possible answer with the available information.
+
+Context from the papers:
+
+{context}
+
+User question: {query}
+""")
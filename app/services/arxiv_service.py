@@ -3,12 +3,27 @@ import re
 import json
 import httpx
 import logging
+import xml.etree.ElementTree as ET
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+
+from app.metrics import track_stage
+from app.storage import (
+    atomic_write_bytes,
+    atomic_write_json,
+    paper_lock,
+    read_manifest,
+    record_artifact,
+)
+from app.services.catalog_service import CatalogService
+from app.tracing import trace_methods
 
 logger = logging.getLogger(__name__)
 
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+
+@trace_methods
 class ArxivService:
     """Service for interacting with arXiv papers."""
     
@@ -19,6 +34,12 @@ class ArxivService:
         
         self.metadata_dir = Path("data/papers/metadata")
         self.metadata_dir.mkdir(parents=True, exist_ok=True)
+        
+        # arXiv API used to fetch titles, authors and abstracts
+        self.api_url = os.getenv("ARXIV_API_URL", "https://export.arxiv.org/api/query")
+        
+        # Indexed copy of the metadata for listing and search
+        self.catalog_service = CatalogService(self.metadata_dir)
     
     def extract_paper_id(self, arxiv_url: str) -> Optional[str]:
         """
@@ -71,6 +92,37 @@ class ArxivService:
             logger.error(f"Error checking if paper {paper_id} is processed: {str(e)}")
             return False
     
+    def get_completeness(self, paper_id: str) -> Optional[float]:
+        """
+        Get how much of a paper can be chatted with.
+        
+        Args:
+            paper_id: ID of the paper
+            
+        Returns:
+            1.0 for a processed paper, the fraction of pages converted so
+            far for a paper whose leading sections are already published
+            (0.0 when only the abstract is), or None if it cannot be
+            chatted with yet
+        """
+        metadata_path = self.metadata_dir / f"{paper_id}.json"
+        
+        if not metadata_path.exists():
+            return None
+        
+        try:
+            with open(metadata_path, 'r') as f:
+                metadata = json.load(f)
+            
+            if metadata.get('is_processed', False):
+                return 1.0
+            
+            return metadata.get('completeness')
+        
+        except Exception as e:
+            logger.error(f"Error checking the completeness of paper {paper_id}: {str(e)}")
+            return None
+    
     def download_paper(self, paper_id: str, arxiv_url: str) -> str:
         """
         Download a paper from arXiv.
@@ -89,37 +141,41 @@ class ArxivService:
         # Path to save the PDF
         pdf_path = paper_dir / f"{paper_id}.pdf"
         
-        # If PDF already exists, return its path
-        if pdf_path.exists():
-            logger.info(f"PDF for paper {paper_id} already exists")
-            return str(pdf_path)
-        
         # Ensure the URL points to the PDF
         if 'pdf' not in arxiv_url:
             arxiv_url = f"https://arxiv.org/pdf/{paper_id}.pdf"
         
         # Download the PDF
         try:
-            logger.info(f"Downloading PDF for paper {paper_id} from {arxiv_url}")
-            
-            with httpx.Client() as client:
-                response = client.get(arxiv_url, follow_redirects=True)
-                response.raise_for_status()
+            # Only one process downloads a given paper at a time
+            with paper_lock(paper_id, "download"):
+                # If PDF already exists, return its path
+                if pdf_path.exists():
+                    logger.info(f"PDF for paper {paper_id} already exists")
+                    if "pdf" not in read_manifest(paper_id)["artifacts"]:
+                        record_artifact(paper_id, "pdf", pdf_path)
+                    return str(pdf_path)
+
+                logger.info(f"Downloading PDF for paper {paper_id} from {arxiv_url}")
                 
-                with open(pdf_path, 'wb') as f:
-                    f.write(response.content)
-            
-            logger.info(f"PDF for paper {paper_id} downloaded successfully")
+                with track_stage("download"), httpx.Client() as client:
+                    response = client.get(arxiv_url, follow_redirects=True)
+                    response.raise_for_status()
+                    
+                    atomic_write_bytes(pdf_path, response.content)
+                
+                logger.info(f"PDF for paper {paper_id} downloaded successfully")
+                
+                # Save initial metadata
+                self.update_metadata(
+                    paper_id,
+                    url=arxiv_url,
+                    pdf_url=arxiv_url,
+                    is_processed=False,
+                    processing_status='downloading'
+                )
             
-            # Save initial metadata
-            self._save_metadata(paper_id, {
-                'paper_id': paper_id,
-                'url': arxiv_url,
-                'pdf_url': arxiv_url,
-                'is_processed': False,
-                'processing_status': 'downloading',
-                'last_updated': datetime.now().isoformat()
-            })
+            record_artifact(paper_id, "pdf", pdf_path)
             
             return str(pdf_path)
         
@@ -127,6 +183,69 @@ class ArxivService:
             logger.error(f"Error downloading paper {paper_id}: {str(e)}")
             raise
     
+    def fetch_paper_metadata(self, paper_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch a paper's title, authors, abstract and publication date from arXiv.
+        
+        Args:
+            paper_id: ID of the paper
+            
+        Returns:
+            The metadata fields, or None if arXiv does not know the paper
+        """
+        response = httpx.get(self.api_url, params={"id_list": paper_id}, timeout=30)
+        response.raise_for_status()
+        
+        entry = ET.fromstring(response.content).find(f"{ATOM_NS}entry")
+        
+        # Unknown IDs come back as an entry describing the error
+        if entry is None or "/api/errors" in (entry.findtext(f"{ATOM_NS}id") or ""):
+            return None
+        
+        def text(tag: str) -> Optional[str]:
+            value = entry.findtext(f"{ATOM_NS}{tag}")
+            return " ".join(value.split()) if value else None
+        
+        return {
+            'title': text("title"),
+            'authors': [
+                " ".join(author.findtext(f"{ATOM_NS}name", "").split())
+                for author in entry.findall(f"{ATOM_NS}author")
+            ],
+            'abstract': text("summary"),
+            'published_date': text("published"),
+        }
+    
+    def update_paper_metadata(self, paper_id: str) -> None:
+        """
+        Fill in a paper's arXiv metadata unless it is already known.
+        
+        Failures are logged and ignored; the metadata is not needed to
+        chat with the paper.
+        
+        Args:
+            paper_id: ID of the paper
+        """
+        metadata_path = self.metadata_dir / f"{paper_id}.json"
+        
+        try:
+            if metadata_path.exists():
+                with open(metadata_path, 'r') as f:
+                    if json.load(f).get('title'):
+                        return
+            
+            fields = self.fetch_paper_metadata(paper_id)
+            if fields is None:
+                logger.warning(f"arXiv has no metadata for paper {paper_id}")
+                return
+            
+            self.update_metadata(paper_id, **fields)
+            
+            logger.info(f"Fetched arXiv metadata for paper {paper_id}")
+        
+        except Exception as e:
+            logger.warning(f"Could not fetch arXiv metadata for paper {paper_id}: {str(e)}")
+    
     def mark_paper_as_processed(self, paper_id: str) -> None:
         """
         Mark a paper as processed.
@@ -135,37 +254,98 @@ class ArxivService:
             paper_id: ID of the paper
         """
         try:
-            metadata_path = self.metadata_dir / f"{paper_id}.json"
+            self.update_metadata(
+                paper_id,
+                is_processed=True,
+                processing_status='completed',
+                completeness=1.0
+            )
+            
+            logger.info(f"Paper {paper_id} marked as processed")
+        
+        except Exception as e:
+            logger.error(f"Error marking paper {paper_id} as processed: {str(e)}")
+            raise
+    
+    def update_metadata(self, paper_id: str, **fields: Any) -> Dict[str, Any]:
+        """
+        Update fields of a paper's metadata.
+        
+        Args:
+            paper_id: ID of the paper
+            **fields: Fields to set
             
+        Returns:
+            The updated metadata
+        """
+        metadata_path = self.metadata_dir / f"{paper_id}.json"
+        
+        # Read-modify-write under the paper lock so concurrent
+        # updates from other workers are not lost
+        with paper_lock(paper_id):
             if metadata_path.exists():
                 with open(metadata_path, 'r') as f:
                     metadata = json.load(f)
             else:
                 metadata = {'paper_id': paper_id}
             
-            metadata.update({
-                'is_processed': True,
-                'processing_status': 'completed',
-                'last_updated': datetime.now().isoformat()
-            })
+            metadata.update(fields)
+            metadata['last_updated'] = datetime.now().isoformat()
             
             self._save_metadata(paper_id, metadata)
+        
+        return metadata
+    
+    def list_papers(
+        self,
+        status: Optional[str] = None,
+        query: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        List papers from the catalog.
+        
+        Args:
+            status: Only return papers with this processing status
+            query: Words to search for in titles and abstracts
+            limit: Maximum number of papers to return
+            offset: Number of papers to skip
             
-            logger.info(f"Paper {paper_id} marked as processed")
+        Returns:
+            The page of papers and the total number of matching papers
+        """
+        return self.catalog_service.list_papers(status, query, limit, offset)
+    
+    def get_paper(self, paper_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a paper's metadata from the catalog.
         
-        except Exception as e:
-            logger.error(f"Error marking paper {paper_id} as processed: {str(e)}")
-            raise
+        Args:
+            paper_id: ID of the paper
+            
+        Returns:
+            The metadata, or None if the paper is unknown
+        """
+        return self.catalog_service.get_paper(paper_id)
     
     def _save_metadata(self, paper_id: str, metadata: Dict[str, Any]) -> None:
         """
         Save paper metadata.
         
+        The write is atomic; callers doing read-modify-write must hold
+        the paper lock. The catalog is updated after the file, so a
+        failed catalog update never loses metadata.
+        
         Args:
             paper_id: ID of the paper
             metadata: Metadata to save
         """
         metadata_path = self.metadata_dir / f"{paper_id}.json"
         
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        atomic_write_json(metadata_path, metadata)
+        
+        try:
+            self.catalog_service.upsert(metadata)
+        except Exception as e:
+            logger.error(f"Error updating catalog for paper {paper_id}: {str(e)}")
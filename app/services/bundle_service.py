@@ -0,0 +1,370 @@
+import io
+import os
+import json
+import hashlib
+import logging
+import tarfile
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.services.arxiv_service import ArxivService
+from app.services.document_service import FAILED_STATUSES, DocumentService
+from app.services.tiering_service import STANDARD_FIELDS, TieringService
+from app.storage import (
+    BLOB_SUFFIXES,
+    DATA_DIR,
+    atomic_write_bytes,
+    compress,
+    decompress,
+    paper_lock,
+    read_json,
+    read_manifest,
+    record_artifact,
+    record_blob_artifact,
+)
+from app.tracing import trace_methods
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT = "alphaxiv-paper-bundle"
+
+# Bumped when the layout changes; bundles of newer versions are refused
+BUNDLE_VERSION = 1
+
+# Artifacts carried in a bundle; the local index and keyword lookups are
+# rebuilt from them in memory
+BUNDLED_ARTIFACTS = ("markdown", "keywords", "pdf")
+
+# Fields of the MiniRAG document record carried in a bundle
+DOCUMENT_FIELDS = ("document_id", "content_sha256", "status", "shard")
+
+
+@trace_methods
+class BundleService:
+    """
+    Service for exporting processed papers as portable bundles and
+    importing them on other nodes.
+
+    A bundle is a single compressed tar file holding a paper's metadata,
+    its markdown, keyword vocabulary and PDF, and the record of its
+    MiniRAG document. Importing a bundle makes the paper available
+    without downloading, converting or indexing it again. The MiniRAG
+    document is only recorded if the importing node's MiniRAG already
+    holds it; otherwise the paper is inserted on first use or with
+    index_paper.py.
+    """
+
+    def __init__(
+        self,
+        arxiv_service: Optional[ArxivService] = None,
+        document_service: Optional[DocumentService] = None,
+        tiering_service: Optional[TieringService] = None
+    ):
+        """
+        Initialize the BundleService.
+
+        Args:
+            arxiv_service: Access to paper metadata (created if omitted)
+            document_service: Tracking of MiniRAG documents (created if omitted)
+            tiering_service: Access to archived artifacts (created if omitted)
+        """
+        self.arxiv_service = arxiv_service or ArxivService()
+        self.document_service = document_service or DocumentService()
+        self.tiering_service = tiering_service or TieringService()
+
+        # Directory bundles are exported to and synced through
+        self.bundle_dir = Path(os.getenv("BUNDLE_DIR", str(DATA_DIR / "bundles")))
+
+    def export(self, paper_id: str, force: bool = False) -> Optional[Path]:
+        """
+        Export a processed paper as a bundle.
+
+        Archived artifacts are read from the archive without restoring them.
+
+        Args:
+            paper_id: ID of the paper
+            force: Rewrite the bundle even if it is up to date
+
+        Returns:
+            Path to the written bundle, or None if the existing bundle is
+            up to date
+
+        Raises:
+            ValueError: If the paper is not fully processed
+            LockUnavailable: If the paper is being ingested
+        """
+        # Never export a paper while it is being ingested
+        with paper_lock(paper_id, "ingest", blocking=False):
+            metadata = read_json(self.arxiv_service.metadata_dir / f"{paper_id}.json")
+            if not metadata or metadata.get("processing_status") != "completed":
+                raise ValueError(f"Paper {paper_id} is not fully processed")
+
+            artifacts = read_manifest(paper_id)["artifacts"]
+            if "markdown" not in artifacts:
+                raise ValueError(f"Paper {paper_id} has no markdown")
+
+            header = self._header(paper_id, metadata, artifacts)
+            fingerprint = self._fingerprint(header)
+
+            existing = artifacts.get("bundle")
+            if (
+                not force
+                and existing
+                and existing.get("fingerprint") == fingerprint
+                and Path(existing["path"]).exists()
+            ):
+                return None
+
+            members = {}
+            for name in header["artifacts"]:
+                data = self.tiering_service.read(paper_id, name)
+                if data is None:
+                    raise ValueError(f"Artifact {name} of paper {paper_id} is missing")
+                members[f"artifacts/{name}"] = data
+
+            header["exported_at"] = datetime.now().isoformat()
+            members["bundle.json"] = json.dumps(header, indent=2).encode('utf-8')
+
+            compressed, codec = compress(self._pack(members))
+            path = self.bundle_dir / f"{paper_id}.bundle{BLOB_SUFFIXES[codec]}"
+            atomic_write_bytes(path, compressed)
+
+            # Bundles written with the other codec are stale now
+            for suffix in BLOB_SUFFIXES.values():
+                stale = self.bundle_dir / f"{paper_id}.bundle{suffix}"
+                if stale != path:
+                    stale.unlink(missing_ok=True)
+
+            record_artifact(paper_id, "bundle", path, fingerprint=fingerprint)
+
+        logger.info(f"Exported paper {paper_id} to {path} ({len(compressed)} bytes)")
+        return path
+
+    def import_bundle(self, path: Path, force: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Import a paper from a bundle.
+
+        Artifacts are written before the metadata, so the paper is only
+        listed as processed once everything is in place.
+
+        Args:
+            path: Path to the bundle
+            force: Import the bundle even if the paper is up to date
+
+        Returns:
+            'paper_id', imported 'artifacts' and whether the paper is
+            'indexed' with MiniRAG on this node, or None if the paper
+            already matches the bundle
+
+        Raises:
+            ValueError: If the file is not a valid bundle
+            LockUnavailable: If the paper is being ingested
+        """
+        header, members = self._read(path)
+        paper_id = header["paper_id"]
+        fingerprint = self._fingerprint(header)
+
+        # Never overwrite a paper while it is being ingested
+        with paper_lock(paper_id, "ingest", blocking=False):
+            artifacts = read_manifest(paper_id)["artifacts"]
+            existing = artifacts.get("bundle")
+            if not force and existing and existing.get("fingerprint") == fingerprint:
+                return None
+
+            imported = []
+            for name, entry in header["artifacts"].items():
+                data = members[f"artifacts/{name}"]
+                extra = {k: v for k, v in entry.items() if k not in STANDARD_FIELDS}
+
+                if name == "pdf":
+                    pdf_path = self.arxiv_service.papers_dir / paper_id / f"{paper_id}.pdf"
+                    atomic_write_bytes(pdf_path, data)
+                    record_artifact(paper_id, name, pdf_path, **extra)
+                else:
+                    record_blob_artifact(paper_id, name, data, **extra)
+
+                imported.append(name)
+
+            # Shard URLs differ between nodes, so ask this node's MiniRAG
+            # whether it holds the document; document IDs derive from the
+            # content and match across nodes
+            indexed = False
+            document = header.get("minirag_document")
+            if document:
+                shard = self.document_service.shard_service.shard_for(paper_id)
+                status = self.document_service.lookup_status(document["document_id"], shard)
+                if status is not None and status != "missing" and status not in FAILED_STATUSES:
+                    self.document_service.record(
+                        paper_id,
+                        document["document_id"],
+                        members["artifacts/markdown"].decode('utf-8'),
+                        status=status,
+                        shard=shard
+                    )
+                    indexed = True
+
+            metadata = {k: v for k, v in header["metadata"].items() if k != "paper_id"}
+            self.arxiv_service.update_metadata(paper_id, **metadata)
+
+            record_artifact(paper_id, "bundle", path, fingerprint=fingerprint)
+
+        logger.info(f"Imported paper {paper_id} from {path}")
+        return {"paper_id": paper_id, "artifacts": imported, "indexed": indexed}
+
+    def find(self, directory: Path) -> List[Path]:
+        """
+        List the bundles in a directory.
+
+        Args:
+            directory: Directory to search
+
+        Returns:
+            Paths to the bundles, sorted by name
+        """
+        return sorted(
+            path
+            for suffix in BLOB_SUFFIXES.values()
+            for path in directory.glob(f"*.bundle{suffix}")
+        )
+
+    def read_header(self, path: Path) -> Dict[str, Any]:
+        """
+        Read the description of a bundle.
+
+        Args:
+            path: Path to the bundle
+
+        Returns:
+            The bundle's format, version, paper ID, metadata and artifacts
+
+        Raises:
+            ValueError: If the file is not a valid bundle
+        """
+        return self._read(path)[0]
+
+    def _header(
+        self,
+        paper_id: str,
+        metadata: Dict[str, Any],
+        artifacts: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Describe a paper's bundle.
+
+        Args:
+            paper_id: ID of the paper
+            metadata: Paper metadata
+            artifacts: Artifact entries of the paper's manifest
+
+        Returns:
+            The bundle description, without its export time
+        """
+        bundled = {}
+        for name in BUNDLED_ARTIFACTS:
+            entry = artifacts.get(name)
+            if not entry:
+                continue
+
+            # The PDF is not needed to chat with the paper and may be gone
+            if name == "pdf" and not entry.get("archived") and not Path(entry["path"]).exists():
+                continue
+
+            # Keep what identifies the content, not where this node stores it
+            bundled[name] = {
+                "size": entry["size"],
+                "sha256": entry["sha256"],
+                **{k: v for k, v in entry.items() if k not in STANDARD_FIELDS},
+            }
+
+        document = artifacts.get("minirag_document")
+        if document:
+            document = {key: document.get(key) for key in DOCUMENT_FIELDS}
+            document["shard"] = self.document_service.shard_service.assigned_shard(paper_id)
+
+        return {
+            "format": BUNDLE_FORMAT,
+            "version": BUNDLE_VERSION,
+            "paper_id": paper_id,
+            "metadata": {k: v for k, v in metadata.items() if k != "last_updated"},
+            "artifacts": bundled,
+            "minirag_document": document,
+        }
+
+    def _fingerprint(self, header: Dict[str, Any]) -> str:
+        """
+        Hash what a bundle holds, ignoring when it was exported.
+
+        Args:
+            header: Bundle description
+
+        Returns:
+            SHA-256 of the description
+        """
+        content = {k: v for k, v in header.items() if k != "exported_at"}
+        return hashlib.sha256(json.dumps(content, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _pack(self, members: Dict[str, bytes]) -> bytes:
+        """
+        Write files into an uncompressed tar archive.
+
+        Args:
+            members: Content of each file by name
+
+        Returns:
+            The tar archive
+        """
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w") as tar:
+            for name, data in members.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+
+        return buffer.getvalue()
+
+    def _read(self, path: Path) -> Tuple[Dict[str, Any], Dict[str, bytes]]:
+        """
+        Read and verify a bundle.
+
+        Args:
+            path: Path to the bundle
+
+        Returns:
+            The bundle description and the content of each file by name
+
+        Raises:
+            ValueError: If the file is not a valid bundle
+        """
+        codec = next(
+            (codec for codec, suffix in BLOB_SUFFIXES.items() if path.name.endswith(f".bundle{suffix}")),
+            None
+        )
+        if codec is None:
+            raise ValueError(f"{path} is not a bundle")
+
+        try:
+            with tarfile.open(fileobj=io.BytesIO(decompress(path.read_bytes(), codec)), mode="r") as tar:
+                members = {
+                    member.name: tar.extractfile(member).read()
+                    for member in tar.getmembers()
+                    if member.isfile()
+                }
+            header = json.loads(members["bundle.json"])
+        except Exception as e:
+            raise ValueError(f"{path} is not a valid bundle: {str(e)}") from e
+
+        if header.get("format") != BUNDLE_FORMAT:
+            raise ValueError(f"{path} is not a paper bundle")
+        if header.get("version", 0) > BUNDLE_VERSION:
+            raise ValueError(f"{path} has bundle version {header['version']}, newer than {BUNDLE_VERSION}")
+
+        for name, entry in header["artifacts"].items():
+            data = members.get(f"artifacts/{name}")
+            if data is None or hashlib.sha256(data).hexdigest() != entry["sha256"]:
+                raise ValueError(f"Artifact {name} in {path} is missing or corrupt")
+
+        if "markdown" not in header["artifacts"]:
+            raise ValueError(f"{path} has no markdown")
+
+        return header, members
@@ -0,0 +1,244 @@
+import os
+import re
+import json
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.tracing import trace_methods
+
+logger = logging.getLogger(__name__)
+
+TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    paper_id TEXT PRIMARY KEY,
+    title TEXT,
+    authors TEXT,
+    abstract TEXT,
+    published_date TEXT,
+    url TEXT,
+    pdf_url TEXT,
+    is_processed INTEGER NOT NULL DEFAULT 0,
+    processing_status TEXT NOT NULL DEFAULT 'not_started',
+    last_updated TEXT
+);
+CREATE INDEX IF NOT EXISTS papers_last_updated ON papers (last_updated);
+CREATE INDEX IF NOT EXISTS papers_status ON papers (processing_status, last_updated);
+"""
+
+# Full-text index over titles and abstracts, kept in sync by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+    title, abstract, content='papers', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS papers_ai AFTER INSERT ON papers BEGIN
+    INSERT INTO papers_fts (rowid, title, abstract) VALUES (new.rowid, new.title, new.abstract);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_ad AFTER DELETE ON papers BEGIN
+    INSERT INTO papers_fts (papers_fts, rowid, title, abstract)
+    VALUES ('delete', old.rowid, old.title, old.abstract);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_au AFTER UPDATE ON papers BEGIN
+    INSERT INTO papers_fts (papers_fts, rowid, title, abstract)
+    VALUES ('delete', old.rowid, old.title, old.abstract);
+    INSERT INTO papers_fts (rowid, title, abstract) VALUES (new.rowid, new.title, new.abstract);
+END;
+"""
+
+COLUMNS = (
+    "paper_id", "title", "authors", "abstract", "published_date",
+    "url", "pdf_url", "is_processed", "processing_status", "last_updated",
+)
+
+
+@trace_methods
+class CatalogService:
+    """
+    Indexed catalog of paper metadata for listing and search.
+
+    The metadata JSON files stay the source of truth; the catalog is a
+    SQLite copy with indexes on status and update time and a full-text
+    index over titles and abstracts. It is rebuilt from the JSON files
+    when it is created, so it can be deleted at any time.
+    """
+
+    def __init__(self, metadata_dir: Path = Path("data/papers/metadata")):
+        """
+        Initialize the CatalogService.
+
+        Args:
+            metadata_dir: Directory holding the metadata JSON files
+        """
+        self.metadata_dir = metadata_dir
+        self.db_path = Path(os.getenv("CATALOG_DB", "data/catalog.db"))
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # One connection per thread; SQLite serializes writers across processes
+        self._local = threading.local()
+
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+
+        try:
+            conn.executescript(FTS_SCHEMA)
+            self.full_text = True
+        except sqlite3.OperationalError:
+            logger.warning("SQLite was built without FTS5, falling back to substring search")
+            self.full_text = False
+
+        if conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0] == 0:
+            self.rebuild()
+
+    def upsert(self, metadata: Dict[str, Any]) -> None:
+        """
+        Insert or update a paper's metadata.
+
+        Args:
+            metadata: Paper metadata as stored in its JSON file
+        """
+        row = {column: metadata.get(column) for column in COLUMNS}
+        row["authors"] = json.dumps(row["authors"]) if row["authors"] is not None else None
+        row["is_processed"] = int(bool(row["is_processed"]))
+        row["processing_status"] = row["processing_status"] or "not_started"
+
+        placeholders = ", ".join(f":{column}" for column in COLUMNS)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in COLUMNS[1:])
+
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                f"INSERT INTO papers ({', '.join(COLUMNS)}) VALUES ({placeholders}) "
+                f"ON CONFLICT (paper_id) DO UPDATE SET {updates}",
+                row
+            )
+
+    def list_papers(
+        self,
+        status: Optional[str] = None,
+        query: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        List papers, newest first or by relevance when searching.
+
+        Args:
+            status: Only return papers with this processing status
+            query: Words to search for in titles and abstracts
+            limit: Maximum number of papers to return
+            offset: Number of papers to skip
+
+        Returns:
+            The page of papers and the total number of matching papers
+        """
+        conditions = []
+        params: List[Any] = []
+        source = "papers"
+        order = "papers.last_updated DESC"
+
+        if status:
+            conditions.append("papers.processing_status = ?")
+            params.append(status)
+
+        terms = TERM_PATTERN.findall(query or "")
+        if terms and self.full_text:
+            # Quote every term so user input is never parsed as FTS syntax;
+            # the last term matches as a prefix for search-as-you-type
+            match = " ".join(f'"{term}"' for term in terms) + "*"
+            # CROSS JOIN makes SQLite drive the join from the full-text
+            # matches instead of scanning papers by status
+            source = "papers_fts CROSS JOIN papers ON papers.rowid = papers_fts.rowid"
+            conditions.append("papers_fts MATCH ?")
+            params.append(match)
+            order = "papers_fts.rank"
+        elif terms:
+            for term in terms:
+                conditions.append("(papers.title LIKE ? OR papers.abstract LIKE ?)")
+                params.extend([f"%{term}%"] * 2)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        conn = self._connect()
+        total = conn.execute(f"SELECT COUNT(*) FROM {source} {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT {', '.join(f'papers.{c}' for c in COLUMNS)} FROM {source} {where} "
+            f"ORDER BY {order} LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        ).fetchall()
+
+        return [self._row_to_metadata(row) for row in rows], total
+
+    def get_paper(self, paper_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a paper's metadata.
+
+        Args:
+            paper_id: ID of the paper
+
+        Returns:
+            The metadata, or None if the paper is not in the catalog
+        """
+        row = self._connect().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM papers WHERE paper_id = ?",
+            (paper_id,)
+        ).fetchone()
+
+        return self._row_to_metadata(row) if row else None
+
+    def rebuild(self) -> int:
+        """
+        Load every metadata JSON file into the catalog.
+
+        Returns:
+            Number of papers loaded
+        """
+        count = 0
+
+        for path in self.metadata_dir.glob("*.json"):
+            try:
+                with open(path, 'r') as f:
+                    metadata = json.load(f)
+                metadata.setdefault("paper_id", path.stem)
+                self.upsert(metadata)
+                count += 1
+            except Exception as e:
+                logger.error(f"Error loading metadata {path.name} into the catalog: {str(e)}")
+
+        if count:
+            logger.info(f"Loaded {count} papers into the catalog")
+
+        return count
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Get this thread's connection to the catalog database.
+
+        Returns:
+            The connection
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _row_to_metadata(self, row: Tuple) -> Dict[str, Any]:
+        """
+        Convert a catalog row to a metadata dictionary.
+
+        Args:
+            row: Row with the columns in COLUMNS order
+
+        Returns:
+            The metadata
+        """
+        metadata = dict(zip(COLUMNS, row))
+        metadata["authors"] = json.loads(metadata["authors"]) if metadata["authors"] else None
+        metadata["is_processed"] = bool(metadata["is_processed"])
+        return metadata
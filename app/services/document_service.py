@@ -0,0 +1,349 @@
+import os
+import time
+import hashlib
+import logging
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import httpx
+
+from app.services.shard_service import ShardService
+from app.storage import atomic_write_text, read_manifest, record_artifact
+from app.tracing import trace_methods
+
+logger = logging.getLogger(__name__)
+
+# MiniRAG document statuses after which a document no longer changes
+DONE_STATUSES = frozenset({"processed", "completed"})
+FAILED_STATUSES = frozenset({"failed"})
+
+
+def compute_document_id(content: str) -> str:
+    """
+    Compute the ID MiniRAG assigns to a document.
+
+    MiniRAG (LightRAG) derives document IDs from the stripped content, so
+    the ID is known before the insert finishes and never has to be looked
+    up in its document listing.
+
+    Args:
+        content: Document text as inserted
+
+    Returns:
+        The document ID
+    """
+    return "doc-" + hashlib.md5(content.strip().encode('utf-8')).hexdigest()
+
+
+@trace_methods
+class DocumentService:
+    """
+    Service for tracking the MiniRAG documents of papers.
+
+    The document ID of every inserted paper is persisted in data/index/
+    and in the paper's manifest together with the hash of the inserted
+    content, the shard (MiniRAG endpoint) holding it and the last known
+    processing status.
+    """
+
+    def __init__(
+        self,
+        shard_service: Optional[ShardService] = None,
+        index_dir: Path = Path("data/index")
+    ):
+        """
+        Initialize the DocumentService.
+
+        Args:
+            shard_service: Assignment of papers to MiniRAG endpoints
+                (defaults to the endpoints configured in the environment)
+            index_dir: Directory holding the per-paper document ID files
+        """
+        self.shard_service = shard_service or ShardService()
+        self.index_dir = index_dir
+
+        # Waiting for MiniRAG to process documents
+        self.wait_timeout = float(os.getenv("MINIRAG_INDEX_TIMEOUT", "600"))
+        self.initial_delay = 0.5
+        self.max_delay = 10.0
+
+        # Inserts are queued by MiniRAG, so a document may not be listed
+        # right away; only after this long is a missing document given up on
+        self.missing_grace = float(os.getenv("MINIRAG_MISSING_GRACE", "30"))
+
+    def insert(self, paper_id: str, content: str, shard: Optional[str] = None) -> str:
+        """
+        Insert a paper's content into MiniRAG and persist its document ID.
+
+        Args:
+            paper_id: ID of the paper
+            content: Markdown content of the paper
+            shard: MiniRAG endpoint to insert into (defaults to the paper's
+                shard)
+
+        Returns:
+            The MiniRAG document ID
+        """
+        shard = shard or self.shard_service.shard_for(paper_id)
+
+        response = httpx.post(
+            f"{shard}/documents/text",
+            json={
+                "text": content,
+                "description": f"Paper {paper_id}"
+            },
+            timeout=60
+        )
+        response.raise_for_status()
+
+        # Servers that report the ID are trusted; others assign the computed one
+        document_id = response.json().get("id") or compute_document_id(content)
+
+        self.record(paper_id, document_id, content, status="pending", shard=shard)
+
+        logger.info(f"Paper {paper_id} inserted into MiniRAG shard {shard} with document ID {document_id}")
+
+        return document_id
+
+    def delete(self, document_id: str, shard: str) -> None:
+        """
+        Delete a document from a MiniRAG endpoint.
+
+        Args:
+            document_id: MiniRAG document ID
+            shard: MiniRAG endpoint holding the document
+        """
+        response = httpx.request(
+            "DELETE",
+            f"{shard}/documents/delete_document",
+            json={"doc_ids": [document_id]},
+            timeout=60
+        )
+        response.raise_for_status()
+
+        logger.info(f"Document {document_id} deleted from MiniRAG shard {shard}")
+
+    def record(
+        self,
+        paper_id: str,
+        document_id: str,
+        content: str,
+        status: str,
+        shard: Optional[str] = None
+    ) -> None:
+        """
+        Persist the document ID of a paper.
+
+        Args:
+            paper_id: ID of the paper
+            document_id: MiniRAG document ID
+            content: Content the document was inserted with
+            status: Last known processing status
+            shard: MiniRAG endpoint holding the document (defaults to the
+                paper's shard)
+        """
+        document_id_path = self.index_dir / paper_id / "document_id.txt"
+        atomic_write_text(document_id_path, document_id)
+
+        record_artifact(
+            paper_id,
+            "minirag_document",
+            document_id_path,
+            document_id=document_id,
+            content_sha256=hashlib.sha256(content.encode('utf-8')).hexdigest(),
+            status=status,
+            shard=shard or self.shard_service.shard_for(paper_id)
+        )
+
+    def get_document(self, paper_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the tracked MiniRAG document of a paper.
+
+        Args:
+            paper_id: ID of the paper
+
+        Returns:
+            The manifest entry with 'document_id', 'content_sha256',
+            'status' and 'shard', or None if the paper was never inserted
+        """
+        return read_manifest(paper_id)["artifacts"].get("minirag_document")
+
+    def is_indexed(self, paper_id: str, content: str) -> bool:
+        """
+        Check whether a paper's content is indexed, or being indexed.
+
+        Ingestion does not wait for MiniRAG, so documents not yet known to
+        be processed have their status refreshed with one status call to
+        their shard first. Documents that failed to process, that MiniRAG
+        does not know, or that live on a shard no longer configured do not
+        count, so they are inserted again.
+
+        Args:
+            paper_id: ID of the paper
+            content: Content the paper would be inserted with
+
+        Returns:
+            True if the content is processed or processing on a configured
+            shard
+        """
+        document = self.get_document(paper_id)
+        if (
+            document is None
+            or document.get("content_sha256") != hashlib.sha256(content.encode('utf-8')).hexdigest()
+        ):
+            return False
+
+        shard = self._document_shard(document)
+        if shard not in self.shard_service.urls:
+            return False
+
+        status = document.get("status")
+        if status != "processed":
+            current = self.lookup_status(document["document_id"], shard)
+            if current is not None:
+                self._update_status(paper_id, current)
+                status = current
+
+        return status not in FAILED_STATUSES and status != "missing"
+
+    def lookup_status(self, document_id: str, shard: str) -> Optional[str]:
+        """
+        Ask a MiniRAG endpoint for the status of one document.
+
+        Args:
+            document_id: MiniRAG document ID
+            shard: MiniRAG endpoint
+
+        Returns:
+            The status ("processed" for finished documents, "missing" if
+            the endpoint does not know the document), or None if the
+            endpoint cannot be reached
+        """
+        try:
+            statuses = self.fetch_statuses(shard)
+        except Exception as e:
+            logger.warning(f"Could not get document statuses from MiniRAG shard {shard}: {str(e)}")
+            return None
+
+        status = statuses.get(document_id, "missing")
+        return "processed" if status in DONE_STATUSES else status
+
+    def fetch_statuses(self, shard: str) -> Dict[str, str]:
+        """
+        Get the status of every document of a MiniRAG endpoint in one call.
+
+        Args:
+            shard: MiniRAG endpoint
+
+        Returns:
+            Status by document ID
+        """
+        response = httpx.get(f"{shard}/documents/status", timeout=30)
+        response.raise_for_status()
+
+        statuses = {}
+        for status, documents in (response.json().get("statuses") or {}).items():
+            for document in documents or []:
+                if isinstance(document, dict) and document.get("id"):
+                    statuses[document["id"]] = status.lower()
+
+        return statuses
+
+    def wait(self, paper_ids: List[str], timeout: Optional[float] = None) -> Dict[str, str]:
+        """
+        Wait until MiniRAG has processed the documents of several papers.
+
+        All pending documents are checked with one status call per shard
+        and round, backing off exponentially between rounds.
+
+        Args:
+            paper_ids: IDs of the papers to wait for
+            timeout: Maximum number of seconds to wait (defaults to
+                MINIRAG_INDEX_TIMEOUT)
+
+        Returns:
+            Final status by paper ID ("processed", "failed", "missing"
+            when MiniRAG does not know the document, or the last status
+            seen when the wait timed out)
+        """
+        timeout = self.wait_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        delay = self.initial_delay
+
+        pending = {}
+        results = {}
+        for paper_id in paper_ids:
+            document = self.get_document(paper_id)
+            if document is None:
+                results[paper_id] = "missing"
+            else:
+                pending[paper_id] = document
+
+        while pending:
+            statuses_by_shard = {}
+            for shard in {self._document_shard(document) for document in pending.values()}:
+                try:
+                    statuses_by_shard[shard] = self.fetch_statuses(shard)
+                except Exception as e:
+                    logger.warning(f"Could not get document statuses from MiniRAG shard {shard}: {str(e)}")
+
+            for paper_id, document in list(pending.items()):
+                statuses = statuses_by_shard.get(self._document_shard(document))
+                if statuses is None:
+                    continue
+
+                status = statuses.get(document["document_id"], "missing")
+                if status in DONE_STATUSES:
+                    status = "processed"
+                results[paper_id] = status
+
+                if status == "missing" and time.monotonic() - start < self.missing_grace:
+                    continue
+
+                if status == "processed" or status in FAILED_STATUSES or status == "missing":
+                    self._update_status(paper_id, status)
+                    del pending[paper_id]
+
+            if not pending or time.monotonic() + delay > deadline:
+                break
+
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_delay)
+
+        for paper_id in pending:
+            logger.warning(f"MiniRAG did not finish processing paper {paper_id} within {timeout:.0f}s")
+
+        return results
+
+    def _document_shard(self, document: Dict[str, Any]) -> str:
+        """
+        Get the shard holding a tracked document.
+
+        Args:
+            document: Manifest entry of the document
+
+        Returns:
+            URL of the MiniRAG endpoint; documents recorded before sharding
+            live on the first endpoint
+        """
+        return document.get("shard") or self.shard_service.urls[0]
+
+    def _update_status(self, paper_id: str, status: str) -> None:
+        """
+        Update the status of a paper's tracked document.
+
+        Args:
+            paper_id: ID of the paper
+            status: New status
+        """
+        document = self.get_document(paper_id)
+        if document is None or document.get("status") == status:
+            return
+
+        extra = {
+            key: value
+            for key, value in document.items()
+            if key not in ("path", "size", "sha256", "updated", "status")
+        }
+        record_artifact(paper_id, "minirag_document", document["path"], status=status, **extra)
@@ -0,0 +1,83 @@
+import os
+import re
+import logging
+from typing import List, Dict, Any
+
+from app.tracing import trace_methods
+
+logger = logging.getLogger(__name__)
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+@trace_methods
+class FusionService:
+    """Service for merging ranked retrieval results with reciprocal rank fusion."""
+
+    def __init__(self):
+        """Initialize the FusionService."""
+        self.rrf_k = int(os.getenv("FUSION_RRF_K", "60"))
+        self.weights = {
+            "minirag": float(os.getenv("FUSION_MINIRAG_WEIGHT", "1.0")),
+            "local": float(os.getenv("FUSION_LOCAL_WEIGHT", "1.0")),
+        }
+
+    def fuse(
+        self,
+        results: Dict[str, List[Dict[str, Any]]],
+        top_k: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Merge ranked result lists from several retrievers.
+
+        Each chunk receives sum(weight / (rrf_k + rank)) over the retrievers
+        that returned it. The fused score is divided by the best score a chunk
+        could reach (rank 1 in every retriever), so it always lies in [0, 1]
+        and is comparable across queries regardless of which retrievers answered.
+
+        Args:
+            results: Ranked context chunks keyed by retriever name
+            top_k: Maximum number of chunks to return
+
+        Returns:
+            List of fused context chunks ordered by descending score
+        """
+        max_score = sum(
+            self.weights.get(source, 1.0) / (self.rrf_k + 1)
+            for source in results
+        )
+        if max_score <= 0:
+            return []
+
+        fused: Dict[str, Dict[str, Any]] = {}
+
+        for source, chunks in results.items():
+            weight = self.weights.get(source, 1.0)
+
+            for rank, chunk in enumerate(chunks, 1):
+                text = chunk.get("text", "")
+                key = WHITESPACE_PATTERN.sub(" ", text).strip().lower()
+                if not key:
+                    continue
+
+                entry = fused.setdefault(key, {
+                    "text": text,
+                    "rrf_score": 0.0,
+                    "sources": {}
+                })
+                # A retriever may return the same text twice; keep its best rank
+                if source in entry["sources"]:
+                    continue
+
+                entry["rrf_score"] += weight / (self.rrf_k + rank)
+                entry["sources"][source] = {
+                    "rank": rank,
+                    "score": chunk.get("score", 0.0)
+                }
+
+        ranked = sorted(fused.values(), key=lambda x: x["rrf_score"], reverse=True)
+
+        for entry in ranked:
+            entry["score"] = round(entry["rrf_score"] / max_score, 6)
+
+        return ranked[:top_k]
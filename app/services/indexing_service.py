@@ -1,17 +1,28 @@
 import os
 import logging
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Any, Optional
-import tempfile
-import shutil
+import httpx
 from dotenv import load_dotenv
 
+from app.metrics import FALLBACK_RETRIEVALS, record_error, track_stage
+from app.storage import read_artifact, read_manifest
+from app.services.document_service import DocumentService
+from app.services.fusion_service import FusionService
+from app.services.keyword_service import KeywordService
+from app.services.local_retrieval_service import LocalRetrievalService
+from app.services.shard_service import ShardService
+from app.services.tiering_service import TieringService
+from app.tracing import trace_methods
+
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+@trace_methods
 class IndexingService:
     """Service for indexing papers using MiniRAG."""
 
@@ -42,6 +53,31 @@ class IndexingService:
             "embedding_model": embedding_model
         }
 
+        # MiniRAG endpoints papers are sharded across (MINIRAG_URLS, or
+        # MINIRAG_HOST and MINIRAG_PORT for a single endpoint)
+        self.shard_service = ShardService()
+
+        # MiniRAG query mode (naive, light, mini, hybrid); cheaper modes lean
+        # more on the local retriever through rank fusion
+        self.query_mode = os.getenv("MINIRAG_QUERY_MODE", "hybrid")
+
+        # Number of fused context chunks returned per query
+        self.top_k = int(os.getenv("RETRIEVAL_TOP_K", "10"))
+
+        # Collection chat: papers per request, candidates per paper, papers
+        # searched in parallel and the global context budget
+        self.collection_max_papers = int(os.getenv("COLLECTION_MAX_PAPERS", "50"))
+        self.collection_per_paper_k = int(os.getenv("COLLECTION_PER_PAPER_K", "5"))
+        self.collection_concurrency = int(os.getenv("COLLECTION_CONCURRENCY", "8"))
+        self.collection_top_k = int(os.getenv("COLLECTION_TOP_K", "12"))
+        self.collection_max_chars = int(os.getenv("COLLECTION_MAX_CHARS", "24000"))
+
+        self.local_retrieval_service = LocalRetrievalService()
+        self.fusion_service = FusionService()
+        self.keyword_service = KeywordService()
+        self.tiering_service = TieringService()
+        self.document_service = DocumentService(self.shard_service, self.index_dir)
+
         # Initialize MiniRAG server if not already running
         self._ensure_minirag_server()
 
@@ -52,13 +88,13 @@ class IndexingService:
         Note: This method no longer attempts to start the server automatically.
         The server should be started manually before running the application.
         """
-        try:
-            import httpx
-            response = httpx.get("http://localhost:9721/health", timeout=2)
-            if response.status_code == 200:
-                logger.info("MiniRAG server is already running")
-                return
-        except Exception:
+        down = [url for url in self.shard_service.urls if not self._is_minirag_running(url)]
+
+        if not down:
+            logger.info(f"MiniRAG server is already running ({len(self.shard_service.urls)} shards)")
+        elif len(down) < len(self.shard_service.urls):
+            logger.warning(f"MiniRAG shards not running: {', '.join(down)}")
+        else:
             # Build the command to start MiniRAG server
             command = (
                 f"python start_minirag.py "
@@ -87,13 +123,17 @@ class IndexingService:
                 "Continuing without MiniRAG server. Some functionality may be limited."
             )
 
-    def index_paper(self, paper_id: str, markdown_path: str) -> None:
+    def index_paper(self, paper_id: str, markdown_content: str) -> None:
         """
         Index a paper using MiniRAG.
 
+        Lexical retrieval and later re-indexing read the markdown from the
+        blob store, so no separate copy of the content is kept here. Content
+        already inserted into MiniRAG is not inserted again.
+
         Args:
             paper_id: ID of the paper
-            markdown_path: Path to the markdown file
+            markdown_content: Markdown content of the paper
         """
         try:
             logger.info(f"Indexing paper {paper_id}")
@@ -102,197 +142,417 @@ class IndexingService:
             paper_index_dir = self.index_dir / paper_id
             paper_index_dir.mkdir(exist_ok=True)
 
-            # Read the markdown content
-            with open(markdown_path, 'r', encoding='utf-8') as f:
-                markdown_content = f.read()
+            # Build the vocabulary MiniRAG query keywords are extracted with
+            content_key = self._content_key(paper_id)
+            if self.keyword_service.enabled and content_key is not None:
+                try:
+                    with track_stage("keyword_vocabulary"):
+                        self.keyword_service.build_vocabulary(paper_id, markdown_content, content_key)
+                except Exception as e:
+                    logger.warning(f"Could not build keyword vocabulary for paper {paper_id}: {str(e)}")
 
             # Try to use MiniRAG API to index the content
             try:
-                import httpx
-
-                # Check if MiniRAG server is running
-                try:
-                    response = httpx.get("http://localhost:9721/health", timeout=2)
-                    if response.status_code != 200:
-                        raise Exception("MiniRAG server is not running")
-                except Exception:
-                    raise Exception("MiniRAG server is not running")
-
-                # Insert the text into MiniRAG
-                response = httpx.post(
-                    "http://localhost:9721/documents/text",
-                    json={
-                        "text": markdown_content,
-                        "description": f"Paper {paper_id}"
-                    }
-                )
-                response.raise_for_status()
-
-                # Get the document ID from the response
-                document_id = response.json().get("id")
+                if self.document_service.is_indexed(paper_id, markdown_content):
+                    logger.info(f"Paper {paper_id} is already indexed with MiniRAG")
+                    return
 
-                # Save the document ID for future reference
-                with open(paper_index_dir / "document_id.txt", 'w') as f:
-                    f.write(document_id)
+                shard = self.shard_service.shard_for(paper_id)
+                if not self._is_minirag_running(shard):
+                    raise Exception(f"MiniRAG shard {shard} is not running")
 
-                logger.info(f"Paper {paper_id} indexed successfully with document ID {document_id}")
+                self._insert_document(paper_id, markdown_content)
 
             except Exception as e:
                 logger.warning(f"Could not index paper with MiniRAG: {str(e)}")
-                logger.warning("Saving markdown content for manual indexing later")
-
-                # Save the markdown content for later indexing
-                with open(paper_index_dir / f"{paper_id}_content.md", 'w', encoding='utf-8') as f:
-                    f.write(markdown_content)
-
-                logger.info(f"Markdown content saved for paper {paper_id}")
+                logger.warning("Markdown content saved for manual indexing later")
 
         except Exception as e:
             logger.error(f"Error indexing paper {paper_id}: {str(e)}")
             # Don't raise the exception, just log it
             # This allows the process to continue even if indexing fails
 
-    def retrieve_context(self, paper_id: str, query: str) -> List[Dict[str, Any]]:
+    def retrieve_context(
+        self,
+        paper_id: str,
+        query: str,
+        top_k: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
-        Retrieve context for a query using MiniRAG.
+        Retrieve context for a query.
+
+        MiniRAG results and local lexical results are merged with reciprocal
+        rank fusion, so either retriever can be unavailable without changing
+        the shape or scale of the returned scores.
 
         Args:
             paper_id: ID of the paper
             query: User query
+            top_k: Number of chunks to return (defaults to RETRIEVAL_TOP_K)
 
         Returns:
-            List of context chunks
+            List of context chunks with a normalized score in [0, 1]
         """
+        top_k = top_k or self.top_k
+
         try:
             logger.info(f"Retrieving context for paper {paper_id} with query: {query}")
 
+            self._use_paper(paper_id)
+
             # Get the paper index directory
             paper_index_dir = self.index_dir / paper_id
+            content_key = self._content_key(paper_id)
 
-            if not paper_index_dir.exists():
+            # Papers still being converted have published content but no index yet
+            if not paper_index_dir.exists() and content_key is None:
                 logger.error(f"Index directory for paper {paper_id} not found")
                 return []
 
-            # Try to use MiniRAG API to retrieve context
-            try:
-                import httpx
+            with track_stage("retrieval"):
+                results = {}
 
-                # Check if MiniRAG server is running
-                try:
-                    response = httpx.get("http://localhost:9721/health", timeout=2)
-                    if response.status_code != 200:
-                        raise Exception("MiniRAG server is not running")
-                except Exception:
-                    raise Exception("MiniRAG server is not running")
-
-                # Check if we have a document ID
-                document_id_path = paper_index_dir / "document_id.txt"
-
-                if not document_id_path.exists():
-                    # If we don't have a document ID but have content, try to index it now
-                    content_path = paper_index_dir / f"{paper_id}_content.md"
-                    if content_path.exists():
-                        logger.info(f"Found content for paper {paper_id}, trying to index it now")
-
-                        with open(content_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-
-                        # Insert the text into MiniRAG
-                        response = httpx.post(
-                            "http://localhost:9721/documents/text",
-                            json={
-                                "text": content,
-                                "description": f"Paper {paper_id}"
-                            }
-                        )
-                        response.raise_for_status()
-
-                        # Get the document ID from the response
-                        document_id = response.json().get("id")
-
-                        # Save the document ID for future reference
-                        with open(document_id_path, 'w') as f:
-                            f.write(document_id)
-
-                        logger.info(f"Paper {paper_id} indexed successfully with document ID {document_id}")
-                    else:
-                        logger.error(f"Document ID for paper {paper_id} not found and no content available")
-                        return []
-
-                # Try to query MiniRAG for context
-                try:
-                    response = httpx.post(
-                        "http://localhost:9721/query",
-                        json={
-                            "query": query,
-                            "mode": "hybrid"
-                        }
-                    )
-                    response.raise_for_status()
-
-                    # Extract context from the response
-                    result = response.json()
-                    context = result.get("context", [])
-
-                    # If we got an empty context or an error, raise an exception to use the fallback
-                    if not context or "error" in result or "detail" in result:
-                        logger.warning(f"MiniRAG returned empty context or error: {result}")
-                        raise Exception("Empty context or error from MiniRAG")
+                minirag_context = self._retrieve_minirag_context(paper_id, query)
+                if minirag_context:
+                    results["minirag"] = minirag_context
 
-                except Exception as e:
-                    logger.warning(f"Error querying MiniRAG: {str(e)}")
-                    # Force using the fallback method
-                    raise Exception("Using fallback method")
+                local_context = self.local_retrieval_service.search(
+                    paper_id,
+                    content_key,
+                    lambda: self._load_content(paper_id),
+                    query,
+                    top_k=top_k
+                )
+                if local_context:
+                    results["local"] = local_context
+                    if not minirag_context:
+                        FALLBACK_RETRIEVALS.inc()
+
+                if not results:
+                    logger.error(f"No context found for paper {paper_id}")
+                    return []
+
+                context = self.fusion_service.fuse(results, top_k=top_k)
+
+            logger.info(
+                f"Retrieved {len(context)} context chunks for paper {paper_id} "
+                f"(minirag={len(minirag_context)}, local={len(local_context)})"
+            )
+
+            return context
+
+        except Exception as e:
+            logger.error(f"Error retrieving context for paper {paper_id}: {str(e)}")
+            return []
+
+    def retrieve_collection_context(
+        self,
+        paper_ids: List[str],
+        query: str,
+        per_paper_k: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve candidate context from several papers concurrently.
 
-                # Format the context
-                formatted_context = []
-                for chunk in context:
-                    formatted_context.append({
-                        "text": chunk.get("text", ""),
-                        "score": chunk.get("score", 0.0)
-                    })
+        Only the selected papers are searched, so the cost grows with the
+        size of the collection rather than the corpus. MiniRAG is not used
+        here: its queries span every indexed document and its chunks do
+        not say which paper they came from.
 
-                logger.info(f"Retrieved {len(formatted_context)} context chunks for paper {paper_id}")
+        Args:
+            paper_ids: IDs of the papers in the collection
+            query: User query
+            per_paper_k: Candidates per paper (defaults to COLLECTION_PER_PAPER_K)
 
-                return formatted_context
+        Returns:
+            Context chunks from all papers, each with its 'paper_id', ordered
+            so that every paper's best chunks come before any paper's
+            weaker ones
+        """
+        per_paper_k = per_paper_k or self.collection_per_paper_k
 
+        def search(paper_id: str) -> List[Dict[str, Any]]:
+            try:
+                self._use_paper(paper_id)
+                chunks = self.local_retrieval_service.search(
+                    paper_id,
+                    self._content_key(paper_id),
+                    lambda: self._load_content(paper_id),
+                    query,
+                    top_k=per_paper_k
+                )
+                # Normalize per paper so every paper's ranking has the same scale
+                return self.fusion_service.fuse({"local": chunks}, top_k=per_paper_k)
             except Exception as e:
-                logger.warning(f"Could not retrieve context with MiniRAG: {str(e)}")
-
-                # Fallback: Try to find the markdown content and extract relevant sections
-                content_path = paper_index_dir / f"{paper_id}_content.md"
-                if content_path.exists():
-                    logger.info(f"Using fallback context retrieval for paper {paper_id}")
-
-                    with open(content_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-
-                    # Simple keyword-based retrieval
-                    # Split content into paragraphs
-                    paragraphs = content.split('\n\n')
-
-                    # Filter paragraphs that contain query keywords
-                    query_keywords = query.lower().split()
-                    relevant_paragraphs = []
-
-                    for paragraph in paragraphs:
-                        paragraph_lower = paragraph.lower()
-                        score = sum(1 for keyword in query_keywords if keyword in paragraph_lower)
-                        if score > 0:
-                            relevant_paragraphs.append({
-                                "text": paragraph,
-                                "score": score / len(query_keywords)
-                            })
-
-                    # Sort by relevance score
-                    relevant_paragraphs.sort(key=lambda x: x["score"], reverse=True)
-
-                    # Return top 10 paragraphs
-                    return relevant_paragraphs[:10]
-                else:
-                    logger.error(f"No content found for paper {paper_id}")
+                logger.error(f"Error retrieving context for paper {paper_id}: {str(e)}")
+                return []
+
+        with track_stage("collection_retrieval"):
+            workers = max(1, min(self.collection_concurrency, len(paper_ids)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(search, paper_ids))
+
+        merged = []
+        for paper_id, chunks in zip(paper_ids, results):
+            for rank, chunk in enumerate(chunks, 1):
+                merged.append(dict(chunk, paper_id=paper_id, paper_rank=rank))
+
+        merged.sort(key=lambda x: (-x["score"], x["paper_rank"]))
+
+        logger.info(
+            f"Retrieved {len(merged)} context chunks from "
+            f"{sum(1 for r in results if r)} of {len(paper_ids)} papers"
+        )
+
+        return merged
+
+    def budget_context(
+        self,
+        context: List[Dict[str, Any]],
+        max_chunks: Optional[int] = None,
+        max_chars: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Keep the best chunks that fit into the global context budget.
+
+        Args:
+            context: Ranked context chunks
+            max_chunks: Maximum number of chunks (defaults to COLLECTION_TOP_K)
+            max_chars: Maximum total characters (defaults to COLLECTION_MAX_CHARS)
+
+        Returns:
+            The chunks that fit, in their original order
+        """
+        max_chunks = max_chunks or self.collection_top_k
+        max_chars = max_chars or self.collection_max_chars
+
+        selected = []
+        used = 0
+        for chunk in context:
+            size = len(chunk.get("text", ""))
+            if used + size > max_chars:
+                # A smaller chunk further down may still fit
+                continue
+            selected.append(chunk)
+            used += size
+            if len(selected) >= max_chunks:
+                break
+
+        return selected
+
+    def _retrieve_minirag_context(self, paper_id: str, query: str) -> List[Dict[str, Any]]:
+        """
+        Retrieve ranked context chunks from MiniRAG.
+
+        Args:
+            paper_id: ID of the paper
+            query: User query
+
+        Returns:
+            List of context chunks, empty if MiniRAG is unavailable
+        """
+        try:
+            shard = self.shard_service.shard_for(paper_id)
+            if not self._is_minirag_running(shard):
+                raise Exception(f"MiniRAG shard {shard} is not running")
+
+            # Check if we have a document ID
+            document_id_path = self.index_dir / paper_id / "document_id.txt"
+
+            if not document_id_path.exists():
+                # The leading sections of a paper still being converted are
+                # only searched locally; MiniRAG gets the whole paper once
+                if not self._is_content_complete(paper_id):
                     return []
 
+                # If we don't have a document ID but have content, try to index it now
+                content = self._load_content(paper_id)
+                if content is None:
+                    logger.error(f"Document ID for paper {paper_id} not found and no content available")
+                    return []
+
+                logger.info(f"Found content for paper {paper_id}, trying to index it now")
+
+                self._insert_document(paper_id, content)
+
+            request = {
+                "query": query,
+                "mode": self.query_mode
+            }
+
+            # Keywords extracted locally spare MiniRAG an LLM call; without
+            # any, MiniRAG extracts them itself
+            if self.query_mode != "naive":
+                keywords = self.keyword_service.extract(
+                    paper_id,
+                    self._content_key(paper_id),
+                    lambda: self._load_content(paper_id),
+                    query
+                )
+                if keywords:
+                    request.update(keywords)
+
+            with track_stage("minirag_query"):
+                response = httpx.post(
+                    f"{shard}/query",
+                    json=request
+                )
+                response.raise_for_status()
+
+            # Extract context from the response
+            result = response.json()
+            context = result.get("context", [])
+
+            if "error" in result or "detail" in result:
+                logger.warning(f"MiniRAG returned an error: {result}")
+                record_error("minirag_query")
+                return []
+
+            return [
+                {
+                    "text": chunk.get("text", ""),
+                    "score": chunk.get("score", 0.0)
+                }
+                for chunk in context
+                if chunk.get("text")
+            ]
+
         except Exception as e:
-            logger.error(f"Error retrieving context for paper {paper_id}: {str(e)}")
+            logger.warning(f"Could not retrieve context with MiniRAG: {str(e)}")
             return []
+
+    def warm_paper(self, paper_id: str) -> bool:
+        """
+        Load a paper's content, local index and keyword vocabulary into memory.
+
+        Archived papers are restored first. Warming is not recorded as a
+        use of the paper.
+
+        Args:
+            paper_id: ID of the paper
+
+        Returns:
+            True if the paper was warmed
+        """
+        self.tiering_service.ensure_hot(paper_id)
+
+        content_key = self._content_key(paper_id)
+        if content_key is None:
+            return False
+
+        load_content = lambda: self._load_content(paper_id)
+
+        warmed = self.local_retrieval_service.warm(paper_id, content_key, load_content)
+        if self.query_mode != "naive":
+            self.keyword_service.warm(paper_id, content_key, load_content)
+
+        return warmed
+
+    def _use_paper(self, paper_id: str) -> None:
+        """
+        Record the use of a paper and restore it if it was archived.
+
+        Args:
+            paper_id: ID of the paper
+        """
+        self.tiering_service.record_access(paper_id)
+
+        try:
+            self.tiering_service.ensure_hot(paper_id)
+        except Exception as e:
+            logger.error(f"Could not restore archived paper {paper_id}: {str(e)}")
+
+    def _is_minirag_running(self, url: str) -> bool:
+        """
+        Check whether a MiniRAG server answers its health probe.
+
+        Args:
+            url: URL of the MiniRAG endpoint
+
+        Returns:
+            True if the server is healthy, False otherwise
+        """
+        try:
+            response = httpx.get(f"{url}/health", timeout=2)
+            return response.status_code == 200
+        except Exception:
+            return False
+
+    def _insert_document(self, paper_id: str, content: str) -> str:
+        """
+        Insert a paper's content into MiniRAG and remember its document ID.
+
+        Args:
+            paper_id: ID of the paper
+            content: Markdown content of the paper
+
+        Returns:
+            The MiniRAG document ID
+        """
+        with track_stage("minirag_insert"):
+            return self.document_service.insert(paper_id, content)
+
+    def _content_key(self, paper_id: str) -> Optional[str]:
+        """
+        Get a key that changes whenever a paper's content changes.
+
+        Args:
+            paper_id: ID of the paper
+
+        Returns:
+            The SHA-256 of the content, or None if the paper has no content
+        """
+        entry = read_manifest(paper_id)["artifacts"].get("markdown")
+        if entry:
+            return entry["sha256"]
+
+        legacy_path = self._legacy_content_path(paper_id)
+        try:
+            return f"{legacy_path}:{legacy_path.stat().st_mtime}"
+        except OSError:
+            return None
+
+    def _is_content_complete(self, paper_id: str) -> bool:
+        """
+        Check whether a paper's stored markdown covers the whole paper.
+
+        Args:
+            paper_id: ID of the paper
+
+        Returns:
+            False while only the leading sections of the paper are published
+        """
+        entry = read_manifest(paper_id)["artifacts"].get("markdown")
+        return entry is None or entry.get("complete", True)
+
+    def _load_content(self, paper_id: str) -> Optional[str]:
+        """
+        Load a paper's markdown content.
+
+        Args:
+            paper_id: ID of the paper
+
+        Returns:
+            The content, or None if the paper has no content
+        """
+        content = read_artifact(paper_id, "markdown")
+        if content is not None:
+            return content.decode('utf-8')
+
+        legacy_path = self._legacy_content_path(paper_id)
+        if legacy_path.exists():
+            return legacy_path.read_text(encoding='utf-8')
+
+        return None
+
+    def _legacy_content_path(self, paper_id: str) -> Path:
+        """
+        Get the path to the content copy written before the blob store existed.
+
+        Args:
+            paper_id: ID of the paper
+
+        Returns:
+            Path to the content file
+        """
+        return self.index_dir / paper_id / f"{paper_id}_content.md"
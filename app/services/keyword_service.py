@@ -0,0 +1,281 @@
+import os
+import re
+import json
+import logging
+import threading
+from collections import Counter, OrderedDict
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+from app.metrics import record_cache
+from app.services.local_retrieval_service import tokenize
+from app.storage import read_artifact, read_manifest, record_blob_artifact
+from app.tracing import trace_methods
+
+logger = logging.getLogger(__name__)
+
+# Names worth matching as a whole: acronyms (BERT, GPT-4), CamelCase names
+# (ResNet, AlphaFold) and runs of capitalized words (Multi-Head Attention)
+ENTITY_PATTERN = re.compile(
+    r"\b[A-Z][A-Z0-9]+(?:-[A-Z0-9]+)*s?\b"
+    r"|\b[A-Z]?[a-z]+[A-Z][A-Za-z0-9]*\b"
+    r"|\b[A-Z][a-z]+(?:[- ][A-Z][a-z]+)+\b"
+)
+
+# Words that describe what kind of answer is wanted rather than what it is
+# about; they become high-level keywords
+GENERIC_TERMS = frozenset("""
+approach approaches architecture assumption assumptions baseline baselines benefit benefits
+challenge challenges claim claims conclusion conclusions contribution contributions dataset
+datasets design difference differences effect effects evaluation experiment experiments
+finding findings framework future goal goals idea ideas impact implication implications
+improvement improvements insight insights key limitation limitations main method methods
+methodology metric metrics model models motivation novelty overview performance problem
+problems purpose result results setup strength strengths summary technique techniques
+tradeoff tradeoffs weakness weaknesses work
+""".split())
+
+# Capitalized sentence starts that are not part of the name that follows
+LEADING_WORDS = re.compile(r"^(?:(?:The|A|An|We|Our|This|These|In|On|For|With|Using) )+")
+
+
+@trace_methods
+class KeywordService:
+    """
+    Service for extracting MiniRAG query keywords locally.
+
+    MiniRAG normally asks its LLM for the high-level (themes) and
+    low-level (entities and details) keywords of every query. Instead, a
+    vocabulary of each paper's terms and named entities is built at
+    ingestion, and query keywords are matched against it.
+    """
+
+    def __init__(self):
+        """Initialize the KeywordService."""
+        self.enabled = os.getenv("LOCAL_KEYWORDS_ENABLED", "true").lower() == "true"
+
+        # Size limits of a paper's vocabulary and of the keywords per query
+        self.max_entities = int(os.getenv("KEYWORD_MAX_ENTITIES", "500"))
+        self.max_terms = int(os.getenv("KEYWORD_MAX_TERMS", "5000"))
+        self.max_keywords = int(os.getenv("KEYWORD_MAX_PER_QUERY", "8"))
+
+        # Vocabularies keyed by paper ID, invalidated when the content key changes
+        self._vocabularies: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+
+        # Extracted keywords keyed by paper, content and query
+        self.cache_size = int(os.getenv("KEYWORD_CACHE_SIZE", "1024"))
+        self._keywords: "OrderedDict[str, Optional[Dict[str, List[str]]]]" = OrderedDict()
+
+        self._lock = threading.Lock()
+
+    def build_vocabulary(self, paper_id: str, content: str, content_key: str) -> Dict[str, Any]:
+        """
+        Build and store the vocabulary of a paper.
+
+        Args:
+            paper_id: ID of the paper
+            content: Markdown content of the paper
+            content_key: Key identifying the content
+
+        Returns:
+            The vocabulary: 'entities' (most frequent first) and 'terms'
+            with their counts
+        """
+        entities = Counter(
+            LEADING_WORDS.sub("", " ".join(match.split()))
+            for match in ENTITY_PATTERN.findall(content)
+        )
+
+        vocabulary = {
+            # Entities mentioned once are mostly headings and sentence starts
+            "entities": [e for e, count in entities.most_common(self.max_entities) if count > 1],
+            "terms": dict(Counter(tokenize(content)).most_common(self.max_terms)),
+        }
+
+        record_blob_artifact(
+            paper_id,
+            "keywords",
+            json.dumps(vocabulary).encode('utf-8'),
+            content_key=content_key
+        )
+
+        with self._lock:
+            self._vocabularies[paper_id] = (content_key, self._prepare(vocabulary))
+
+        logger.info(
+            f"Built keyword vocabulary for paper {paper_id} with "
+            f"{len(vocabulary['entities'])} entities and {len(vocabulary['terms'])} terms"
+        )
+
+        return vocabulary
+
+    def extract(
+        self,
+        paper_id: str,
+        content_key: Optional[str],
+        load_content: Callable[[], Optional[str]],
+        query: str
+    ) -> Optional[Dict[str, List[str]]]:
+        """
+        Extract the MiniRAG keywords of a query.
+
+        Args:
+            paper_id: ID of the paper
+            content_key: Key identifying the paper's current content
+            load_content: Loads the paper's content if its vocabulary has
+                to be built
+            query: User query
+
+        Returns:
+            'hl_keywords' and 'll_keywords', or None if nothing was found
+            and MiniRAG should extract the keywords itself
+        """
+        if not self.enabled or content_key is None:
+            return None
+
+        cache_key = f"{paper_id}:{content_key}:{' '.join(query.lower().split())}"
+        with self._lock:
+            if cache_key in self._keywords:
+                self._keywords.move_to_end(cache_key)
+                record_cache("keywords", hit=True)
+                return self._keywords[cache_key]
+
+        record_cache("keywords", hit=False)
+
+        vocabulary = self._get_vocabulary(paper_id, content_key, load_content)
+        keywords = self._match(query, vocabulary) if vocabulary else None
+
+        with self._lock:
+            self._keywords[cache_key] = keywords
+            while len(self._keywords) > self.cache_size:
+                self._keywords.popitem(last=False)
+
+        return keywords
+
+    def warm(
+        self,
+        paper_id: str,
+        content_key: Optional[str],
+        load_content: Callable[[], Optional[str]]
+    ) -> bool:
+        """
+        Load the vocabulary of a paper ahead of its first query.
+
+        Args:
+            paper_id: ID of the paper
+            content_key: Key identifying the paper's current content
+            load_content: Loads the paper's content if its vocabulary has
+                to be built
+
+        Returns:
+            True if the paper has a vocabulary
+        """
+        if not self.enabled or content_key is None:
+            return False
+
+        return self._get_vocabulary(paper_id, content_key, load_content) is not None
+
+    def _match(self, query: str, vocabulary: Dict[str, Any]) -> Optional[Dict[str, List[str]]]:
+        """
+        Match a query against a paper's vocabulary.
+
+        Entities named in the query and specific terms of the paper become
+        low-level keywords; generic words and words the paper does not use
+        describe the theme of the question and become high-level keywords.
+
+        Args:
+            query: User query
+            vocabulary: Prepared vocabulary of the paper
+
+        Returns:
+            The keywords, or None if the query has no keywords
+        """
+        query_lower = f" {' '.join(query.lower().split())} "
+        tokens = list(dict.fromkeys(tokenize(query)))
+
+        low_level = []
+        covered = set()
+        for entity, entity_lower, entity_tokens in vocabulary["entities"]:
+            if f" {entity_lower} " in query_lower or (
+                len(entity_tokens) == 1 and entity_tokens[0] in tokens
+            ):
+                low_level.append(entity)
+                covered.update(entity_tokens)
+
+        high_level = []
+        for token in tokens:
+            if token in covered:
+                continue
+            if token in GENERIC_TERMS or token not in vocabulary["terms"]:
+                high_level.append(token)
+            else:
+                low_level.append(token)
+
+        if not low_level and not high_level:
+            return None
+
+        return {
+            # Without themes MiniRAG only searches entities, so the
+            # specific keywords stand in for them
+            "hl_keywords": (high_level or low_level)[:self.max_keywords],
+            "ll_keywords": (low_level or high_level)[:self.max_keywords],
+        }
+
+    def _get_vocabulary(
+        self,
+        paper_id: str,
+        content_key: str,
+        load_content: Callable[[], Optional[str]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get the prepared vocabulary of a paper, loading or building it if needed.
+
+        Args:
+            paper_id: ID of the paper
+            content_key: Key identifying the paper's current content
+            load_content: Loads the paper's content
+
+        Returns:
+            The prepared vocabulary, or None if the paper has no content
+        """
+        with self._lock:
+            cached = self._vocabularies.get(paper_id)
+            if cached and cached[0] == content_key:
+                return cached[1]
+
+        # Vocabulary stored at ingestion
+        entry = read_manifest(paper_id)["artifacts"].get("keywords")
+        if entry and entry.get("content_key") == content_key:
+            data = read_artifact(paper_id, "keywords")
+            if data is not None:
+                prepared = self._prepare(json.loads(data))
+                with self._lock:
+                    self._vocabularies[paper_id] = (content_key, prepared)
+                return prepared
+
+        # Papers ingested before vocabularies existed
+        content = load_content()
+        if content is None:
+            return None
+
+        self.build_vocabulary(paper_id, content, content_key)
+
+        with self._lock:
+            return self._vocabularies[paper_id][1]
+
+    def _prepare(self, vocabulary: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Prepare a stored vocabulary for matching.
+
+        Args:
+            vocabulary: Stored vocabulary
+
+        Returns:
+            The vocabulary with every entity's lowercase form and tokens
+        """
+        return {
+            "entities": [
+                (entity, entity.lower(), tokenize(entity))
+                for entity in vocabulary["entities"]
+            ],
+            "terms": vocabulary["terms"],
+        }
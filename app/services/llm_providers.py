@@ -0,0 +1,244 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional
+
+import httpx
+
+from app.tracing import trace_methods
+
+logger = logging.getLogger(__name__)
+
+
+class LLMProvider(ABC):
+    """
+    Interface of an LLM backend.
+
+    generate() returns a dictionary with the generated 'text' and the
+    'prompt_tokens' and 'output_tokens' reported by the backend (None when
+    it does not report them).
+    """
+
+    name = "base"
+
+    def __init__(self, default_model: str):
+        """
+        Initialize the LLMProvider.
+
+        Args:
+            default_model: Model used when a request does not name one
+        """
+        self.default_model = default_model
+
+    @abstractmethod
+    def generate(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        temperature: float = 1.0,
+        max_output_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate a completion for a prompt.
+
+        Args:
+            prompt: Prompt text
+            model: Model name (defaults to the provider's default model)
+            temperature: Sampling temperature
+            max_output_tokens: Maximum number of tokens to generate
+
+        Returns:
+            The generated text and token usage
+        """
+
+
+@trace_methods
+class GeminiProvider(LLMProvider):
+    """Google Gemini through google-generativeai."""
+
+    name = "gemini"
+
+    def __init__(self):
+        """Initialize the GeminiProvider."""
+        super().__init__(os.getenv("GEMINI_MODEL", "gemini-2.0-flash"))
+
+        import google.generativeai as genai
+
+        # Get API key from environment variable
+        api_key = os.getenv("GOOGLE_API_KEY")
+
+        if not api_key:
+            logger.warning("GOOGLE_API_KEY environment variable not set")
+
+        # Optional custom endpoint (e.g. a proxy or a local stand-in server)
+        api_endpoint = os.getenv("GEMINI_API_ENDPOINT")
+
+        if api_endpoint:
+            genai.configure(
+                api_key=api_key,
+                transport="rest",
+                client_options={"api_endpoint": api_endpoint}
+            )
+        else:
+            genai.configure(api_key=api_key)
+
+        self._genai = genai
+        self._models: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def generate(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        temperature: float = 1.0,
+        max_output_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        generation_config = {
+            "temperature": temperature,
+            "top_p": 0.95,
+            "top_k": 40,
+        }
+        if max_output_tokens:
+            generation_config["max_output_tokens"] = max_output_tokens
+
+        response = self._get_model(model or self.default_model).generate_content(
+            prompt,
+            generation_config=generation_config
+        )
+
+        usage = getattr(response, "usage_metadata", None)
+
+        return {
+            "text": response.text,
+            "prompt_tokens": usage.prompt_token_count if usage else None,
+            "output_tokens": usage.candidates_token_count if usage else None,
+        }
+
+    def _get_model(self, model: str):
+        """Get the client of a Gemini model, creating it on first use."""
+        with self._lock:
+            if model not in self._models:
+                self._models[model] = self._genai.GenerativeModel(model)
+            return self._models[model]
+
+
+@trace_methods
+class OpenAICompatibleProvider(LLMProvider):
+    """
+    Any server implementing the OpenAI chat completions API.
+
+    Works with OpenAI itself and with local servers such as llama.cpp,
+    vLLM or Ollama (OPENAI_BASE_URL=http://localhost:8080/v1).
+    """
+
+    name = "openai"
+
+    def __init__(self):
+        """Initialize the OpenAICompatibleProvider."""
+        super().__init__(os.getenv("OPENAI_MODEL", "gpt-4o-mini"))
+
+        base_url = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+        api_key = os.getenv("OPENAI_API_KEY", "")
+
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+        # One pooled client for all requests
+        self.client = httpx.Client(
+            base_url=base_url,
+            headers=headers,
+            timeout=float(os.getenv("LLM_TIMEOUT", "120"))
+        )
+
+    def generate(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        temperature: float = 1.0,
+        max_output_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {
+            "model": model or self.default_model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+        }
+        if max_output_tokens:
+            payload["max_tokens"] = max_output_tokens
+
+        response = self.client.post("/chat/completions", json=payload)
+        response.raise_for_status()
+
+        result = response.json()
+        usage = result.get("usage") or {}
+
+        return {
+            "text": result["choices"][0]["message"]["content"],
+            "prompt_tokens": usage.get("prompt_tokens"),
+            "output_tokens": usage.get("completion_tokens"),
+        }
+
+
+@trace_methods
+class MockProvider(LLMProvider):
+    """
+    Deterministic in-process backend for offline tests and benchmarks.
+
+    The answer depends only on the model and the prompt, so repeated runs
+    produce identical output without network access or API keys.
+    """
+
+    name = "mock"
+
+    def __init__(self):
+        """Initialize the MockProvider."""
+        super().__init__(os.getenv("MOCK_LLM_MODEL", "mock"))
+
+        # Simulated generation latency
+        self.latency = float(os.getenv("MOCK_LLM_LATENCY_MS", "0")) / 1000
+
+    def generate(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        temperature: float = 1.0,
+        max_output_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        if self.latency:
+            time.sleep(self.latency)
+
+        model = model or self.default_model
+        prompt_tokens = len(prompt.split())
+        digest = hashlib.sha256(f"{model}\0{prompt}".encode('utf-8')).hexdigest()[:12]
+
+        text = f"Mock answer {digest} from {model} for a prompt of {prompt_tokens} words."
+
+        return {
+            "text": text,
+            "prompt_tokens": prompt_tokens,
+            "output_tokens": len(text.split()),
+        }
+
+
+PROVIDERS = {
+    GeminiProvider.name: GeminiProvider,
+    OpenAICompatibleProvider.name: OpenAICompatibleProvider,
+    MockProvider.name: MockProvider,
+}
+
+
+def create_provider(name: str) -> LLMProvider:
+    """
+    Create an LLM provider by name.
+
+    Args:
+        name: Provider name ("gemini", "openai" or "mock")
+
+    Returns:
+        The provider
+    """
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider {name!r}, expected one of {sorted(PROVIDERS)}")
+
+    return PROVIDERS[name]()
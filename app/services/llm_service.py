@@ -0,0 +1,320 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.metrics import (
+    GENERATION_DURATION,
+    OUTPUT_TOKENS,
+    PROMPT_TOKENS,
+    record_cache,
+    track_stage,
+)
+from app.prompts import PromptTemplate, format_context, prompt_registry
+from app.services.llm_providers import LLMProvider, create_provider
+from app.storage import ANSWER_CACHE_PATH, atomic_write_json, read_json
+from app.tracing import set_span_attributes, trace_methods
+
+logger = logging.getLogger(__name__)
+
+@trace_methods
+class LLMService:
+    """
+    Service for generating answers with a configurable LLM provider.
+
+    Each request class ("chat" for one paper, "collection" for several)
+    is routed to a provider and model. LLM_PROVIDER sets the default
+    provider and LLM_ROUTES overrides it per class, e.g.
+    "chat=openai:llama-3.1-8b,collection=gemini:gemini-2.0-pro".
+    Routed classes such as "chat.simple" fall back to the route of
+    "simple", then of "chat".
+    """
+
+    def __init__(self):
+        """Initialize the LLMService."""
+        self.default_provider = os.getenv("LLM_PROVIDER", "gemini").lower()
+        self.routes = self._parse_routes(os.getenv("LLM_ROUTES", ""))
+        self.temperature = float(os.getenv("LLM_TEMPERATURE", "1.0"))
+
+        # Providers are created on first use, so e.g. a mock-only setup
+        # never imports the Gemini client
+        self._providers: Dict[str, LLMProvider] = {}
+        self._providers_lock = threading.Lock()
+
+        # Answers keyed by model, prompt version and the full prompt; off by
+        # default because generation is sampled
+        self.answer_cache_size = int(os.getenv("ANSWER_CACHE_SIZE", "0"))
+        self.answer_cache_ttl = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+        self._answers: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._answers_lock = threading.Lock()
+
+    def generate_response(
+        self,
+        query: str,
+        context: List[Dict[str, Any]],
+        request_class: Optional[str] = None,
+        temperature: Optional[float] = None
+    ) -> str:
+        """
+        Generate a response.
+
+        Args:
+            query: User query
+            context: Retrieved context; chunks labeled with a 'paper_id'
+                come from several papers and are cited
+            request_class: Routing class (defaults to "collection" for cited
+                context and "chat" otherwise)
+            temperature: Sampling temperature (defaults to LLM_TEMPERATURE)
+
+        Returns:
+            Generated response
+        """
+        try:
+            logger.info(f"Generating response for query: {query}")
+
+            # Chunks from several papers ask for citations
+            cite = any("paper_id" in chunk for chunk in context)
+            template = prompt_registry.get("collection_chat" if cite else "paper_chat")
+            request_class = request_class or ("collection" if cite else "chat")
+            temperature = self.temperature if temperature is None else temperature
+
+            provider, model = self.resolve(request_class)
+            model_id = f"{provider.name}:{model}"
+
+            # Create the prompt
+            prompt = template.render(context=format_context(context, cite), query=query)
+
+            set_span_attributes({
+                "prompt.id": template.id,
+                "prompt.chars": len(prompt),
+                "llm.model": model_id,
+                "llm.request_class": request_class,
+            })
+
+            cache_key = self._answer_cache_key(f"{model_id}@{temperature}", template, prompt)
+            cached = self._get_cached_answer(cache_key)
+            if cached is not None:
+                return cached
+
+            start = time.perf_counter()
+
+            with track_stage("generation"), \
+                    GENERATION_DURATION.labels(prompt=template.id, model=model_id).time():
+                result = provider.generate(prompt, model=model, temperature=temperature)
+
+            elapsed = time.perf_counter() - start
+
+            self._record_usage(template, model_id, result)
+            self._cache_answer(cache_key, result["text"])
+
+            logger.info(
+                f"Response generated successfully with {model_id} and prompt {template.id} "
+                f"for {request_class} in {elapsed:.2f}s"
+            )
+
+            return result["text"]
+
+        except Exception as e:
+            logger.error(f"Error generating response: {str(e)}")
+            return f"Error generating response: {str(e)}"
+
+    def resolve(self, request_class: str) -> Tuple[LLMProvider, str]:
+        """
+        Get the provider and model for a request class.
+
+        A routed class ("chat.simple") without its own route uses the
+        route of its route name ("simple"), then of its base class ("chat").
+
+        Args:
+            request_class: Routing class
+
+        Returns:
+            The provider and the model name
+        """
+        base, _, route = request_class.partition(".")
+        candidates = [request_class, route, base] if route else [request_class]
+
+        provider_name, model = next(
+            (self.routes[c] for c in candidates if c in self.routes),
+            (self.default_provider, None)
+        )
+        provider = self._get_provider(provider_name)
+
+        return provider, model or provider.default_model
+
+    def _get_provider(self, name: str) -> LLMProvider:
+        """
+        Get a provider, creating it on first use.
+
+        Args:
+            name: Provider name
+
+        Returns:
+            The provider
+        """
+        with self._providers_lock:
+            if name not in self._providers:
+                self._providers[name] = create_provider(name)
+                logger.info(f"Initialized LLM provider {name}")
+            return self._providers[name]
+
+    def _parse_routes(self, value: str) -> Dict[str, Tuple[str, Optional[str]]]:
+        """
+        Parse LLM_ROUTES ("class=provider[:model],...").
+
+        Args:
+            value: Setting value
+
+        Returns:
+            Provider name and optional model by request class
+        """
+        routes = {}
+        for item in value.split(","):
+            if "=" not in item:
+                continue
+            request_class, target = (part.strip() for part in item.split("=", 1))
+            provider_name, _, model = target.partition(":")
+            routes[request_class] = (provider_name.lower(), model or None)
+        return routes
+
+    def _record_usage(self, template: PromptTemplate, model_id: str, result: Dict[str, Any]) -> None:
+        """
+        Count the tokens of a generation by prompt version and model.
+
+        Args:
+            template: Prompt template used
+            model_id: Provider and model used
+            result: Provider result
+        """
+        labels = {"prompt": template.id, "model": model_id}
+        PROMPT_TOKENS.labels(**labels).inc(result.get("prompt_tokens") or 0)
+        OUTPUT_TOKENS.labels(**labels).inc(result.get("output_tokens") or 0)
+
+    def save_answers(self) -> int:
+        """
+        Write the unexpired cached answers to disk, so a restarted server
+        starts with them.
+
+        Returns:
+            Number of answers written
+        """
+        if not self.answer_cache_size:
+            return 0
+
+        now = time.monotonic()
+        with self._answers_lock:
+            # Ages rather than timestamps, since monotonic clocks restart
+            answers = [
+                [key, now - created, answer]
+                for key, (created, answer) in self._answers.items()
+                if now - created < self.answer_cache_ttl
+            ]
+
+        try:
+            atomic_write_json(ANSWER_CACHE_PATH, {"saved_at": time.time(), "answers": answers})
+        except Exception as e:
+            logger.error(f"Error saving answer cache: {str(e)}")
+            return 0
+
+        logger.info(f"Saved {len(answers)} cached answers")
+        return len(answers)
+
+    def load_answers(self) -> int:
+        """
+        Load the cached answers written by save_answers.
+
+        Answers keep aging while the server is down and are dropped once
+        they expire.
+
+        Returns:
+            Number of answers loaded
+        """
+        if not self.answer_cache_size:
+            return 0
+
+        try:
+            saved = read_json(ANSWER_CACHE_PATH)
+        except Exception as e:
+            logger.error(f"Error loading answer cache: {str(e)}")
+            return 0
+
+        if not saved:
+            return 0
+
+        now = time.monotonic()
+        downtime = max(0.0, time.time() - saved.get("saved_at", 0))
+        loaded = 0
+        with self._answers_lock:
+            # Least recently used first, so the order survives the reload
+            for key, age, answer in saved.get("answers", []):
+                age += downtime
+                if age >= self.answer_cache_ttl or key in self._answers:
+                    continue
+                self._answers[key] = (now - age, answer)
+                loaded += 1
+            while len(self._answers) > self.answer_cache_size:
+                self._answers.popitem(last=False)
+
+        logger.info(f"Loaded {loaded} cached answers")
+        return loaded
+
+    def _answer_cache_key(self, model_id: str, template: PromptTemplate, prompt: str) -> str:
+        """
+        Get the answer cache key of a prompt.
+
+        The model, temperature and prompt version are part of the key, so
+        answers generated with one are never served for another.
+
+        Args:
+            model_id: Provider, model and temperature used
+            template: Prompt template used
+            prompt: Rendered prompt
+
+        Returns:
+            The cache key
+        """
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        return f"{model_id}:{template.id}:{template.fingerprint}:{digest}"
+
+    def _get_cached_answer(self, key: str) -> Optional[str]:
+        """
+        Look up a cached answer.
+
+        Args:
+            key: Answer cache key
+
+        Returns:
+            The answer, or None if it is not cached or expired
+        """
+        if not self.answer_cache_size:
+            return None
+
+        with self._answers_lock:
+            entry = self._answers.get(key)
+            if entry and time.monotonic() - entry[0] < self.answer_cache_ttl:
+                self._answers.move_to_end(key)
+                record_cache("answer", hit=True)
+                return entry[1]
+
+        record_cache("answer", hit=False)
+        return None
+
+    def _cache_answer(self, key: str, answer: str) -> None:
+        """
+        Store an answer, evicting the least recently used ones.
+
+        Args:
+            key: Answer cache key
+            answer: Generated answer
+        """
+        if not self.answer_cache_size:
+            return
+
+        with self._answers_lock:
+            self._answers[key] = (time.monotonic(), answer)
+            self._answers.move_to_end(key)
+            while len(self._answers) > self.answer_cache_size:
+                self._answers.popitem(last=False)
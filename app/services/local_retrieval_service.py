@@ -0,0 +1,223 @@
+import os
+import re
+import math
+import hashlib
+import logging
+import threading
+from collections import Counter, OrderedDict
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+from app.metrics import record_cache
+from app.tracing import trace_methods
+
+logger = logging.getLogger(__name__)
+
+# Common English words that carry no retrieval signal
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from has have how i if in into is it its
+of on or paper so that the their them then there these this those to was we were what
+when where which who why will with you your
+""".split())
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase word tokens without stopwords.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of tokens
+    """
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class _ParagraphIndex:
+    """In-memory BM25 index over the paragraphs of a single paper."""
+
+    def __init__(self, paragraphs: List[str], base: Optional["_ParagraphIndex"] = None):
+        """
+        Build an index, reusing the tokenized paragraphs of a base index.
+
+        Args:
+            paragraphs: Paragraphs to index after those of the base index
+            base: Index of the preceding paragraphs, which is left unchanged
+        """
+        new_term_freqs = [Counter(tokenize(p)) for p in paragraphs]
+
+        if base is not None:
+            self.paragraphs = base.paragraphs + paragraphs
+            self.term_freqs = base.term_freqs + new_term_freqs
+            self.doc_freqs = Counter(base.doc_freqs)
+        else:
+            self.paragraphs = paragraphs
+            self.term_freqs = new_term_freqs
+            self.doc_freqs = Counter()
+
+        for tf in new_term_freqs:
+            self.doc_freqs.update(tf.keys())
+
+        self.lengths = [sum(tf.values()) for tf in self.term_freqs]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+        n = len(self.paragraphs)
+        self.idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in self.doc_freqs.items()
+        }
+
+
+@trace_methods
+class LocalRetrievalService:
+    """Service for lexical (BM25) retrieval over a paper's local markdown."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize the LocalRetrievalService.
+
+        Args:
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+        """
+        self.k1 = k1
+        self.b = b
+
+        # Indexes keyed by paper ID with the content key, length and digest
+        # of the indexed content; invalidated when the content key changes,
+        # or extended when the new content only appends to it. The least
+        # recently used beyond LOCAL_INDEX_CACHE_SIZE papers are dropped
+        self.cache_size = int(os.getenv("LOCAL_INDEX_CACHE_SIZE", "256"))
+        self._indexes: "OrderedDict[str, Tuple[str, _ParagraphIndex, int, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def search(
+        self,
+        paper_id: str,
+        content_key: Optional[str],
+        load_content: Callable[[], Optional[str]],
+        query: str,
+        top_k: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank the paragraphs of a paper against a query.
+
+        Args:
+            paper_id: ID of the paper
+            content_key: Key identifying the current content (e.g. its hash)
+            load_content: Loads the paper's markdown content on a cache miss
+            query: User query
+            top_k: Maximum number of paragraphs to return
+
+        Returns:
+            List of context chunks ordered by descending BM25 score
+        """
+        index = self._get_index(paper_id, content_key, load_content)
+        if index is None or not index.paragraphs:
+            return []
+
+        query_terms = [t for t in set(tokenize(query)) if t in index.idf]
+        if not query_terms:
+            return []
+
+        scored = []
+        for i, tf in enumerate(index.term_freqs):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * index.lengths[i] / (index.avg_length or 1.0))
+            for term in query_terms:
+                freq = tf.get(term)
+                if freq:
+                    score += index.idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            if score > 0:
+                scored.append((score, i))
+
+        scored.sort(reverse=True)
+
+        return [
+            {"text": index.paragraphs[i], "score": score}
+            for score, i in scored[:top_k]
+        ]
+
+    def warm(
+        self,
+        paper_id: str,
+        content_key: Optional[str],
+        load_content: Callable[[], Optional[str]]
+    ) -> bool:
+        """
+        Build the index of a paper ahead of its first query.
+
+        Args:
+            paper_id: ID of the paper
+            content_key: Key identifying the current content
+            load_content: Loads the paper's markdown content
+
+        Returns:
+            True if the paper has an index
+        """
+        return self._get_index(paper_id, content_key, load_content) is not None
+
+    def _get_index(
+        self,
+        paper_id: str,
+        content_key: Optional[str],
+        load_content: Callable[[], Optional[str]]
+    ):
+        """
+        Get the paragraph index for a paper, building it if needed.
+
+        Args:
+            paper_id: ID of the paper
+            content_key: Key identifying the current content
+            load_content: Loads the paper's markdown content
+
+        Returns:
+            The paragraph index, or None if the content is missing
+        """
+        if content_key is None:
+            return None
+
+        with self._lock:
+            cached = self._indexes.get(paper_id)
+            if cached and cached[0] == content_key:
+                self._indexes.move_to_end(paper_id)
+                record_cache("local_index", hit=True)
+                return cached[1]
+
+        record_cache("local_index", hit=False)
+
+        content = load_content()
+        if content is None:
+            return None
+
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+        # Content published while a paper is still being converted grows
+        # by whole paragraphs, so only the new ones need to be tokenized
+        base = None
+        if cached and len(content) > cached[2] and content[cached[2]:cached[2] + 2] == "\n\n":
+            prefix_digest = hashlib.sha256(content[:cached[2]].encode('utf-8')).hexdigest()
+            if prefix_digest == cached[3]:
+                base = cached[1]
+
+        new_content = content[cached[2]:] if base is not None else content
+        paragraphs = [p.strip() for p in new_content.split('\n\n') if p.strip()]
+        index = _ParagraphIndex(paragraphs, base)
+
+        with self._lock:
+            self._indexes[paper_id] = (content_key, index, len(content), digest)
+            self._indexes.move_to_end(paper_id)
+            while len(self._indexes) > self.cache_size:
+                self._indexes.popitem(last=False)
+
+        if base is not None:
+            logger.info(
+                f"Extended local index for paper {paper_id} with {len(paragraphs)} paragraphs "
+                f"({len(index.paragraphs)} in total)"
+            )
+        else:
+            logger.info(f"Built local index for paper {paper_id} with {len(paragraphs)} paragraphs")
+
+        return index
@@ -1,87 +1,497 @@
+import io
 import os
+import json
+import hashlib
 import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from importlib import metadata
 from pathlib import Path
-from markitdown import MarkItDown
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.metrics import record_cache, track_stage
+from app.storage import (
+    CONVERSIONS_DIR,
+    PAPERS_DIR,
+    atomic_write_json,
+    atomic_write_text,
+    file_sha256,
+    find_blob,
+    put_blob,
+    read_artifact,
+    read_blob,
+    read_json,
+    read_manifest,
+    record_artifact,
+    record_blob_artifact,
+    remove_artifact,
+)
+from app.tracing import trace_methods
 
 logger = logging.getLogger(__name__)
 
+# Version of this service's conversion output; bump it whenever the way
+# markdown is produced or cleaned changes to invalidate cached conversions
+CONVERTER_VERSION = "1"
+
+# MarkItDown instance of a conversion worker process
+_worker_markitdown = None
+
+
+def _convert_page_range(pdf_path: str, start: int, end: int, markitdown: Any = None) -> str:
+    """
+    Convert a range of pages of a PDF to markdown in a worker process.
+
+    Args:
+        pdf_path: Path to the PDF file
+        start: Index of the first page (0-based)
+        end: Index after the last page
+        markitdown: MarkItDown instance to use when called in-process
+            (defaults to the worker process's own)
+
+    Returns:
+        The markdown content of the pages
+    """
+    global _worker_markitdown
+
+    import pypdfium2 as pdfium
+
+    if markitdown is None:
+        if _worker_markitdown is None:
+            from markitdown import MarkItDown
+
+            _worker_markitdown = MarkItDown(enable_plugins=True)
+        markitdown = _worker_markitdown
+
+    # Copy the pages into a PDF of their own
+    source = pdfium.PdfDocument(pdf_path)
+    part = pdfium.PdfDocument.new()
+    try:
+        part.import_pages(source, pages=list(range(start, end)))
+        buffer = io.BytesIO()
+        part.save(buffer)
+    finally:
+        part.close()
+        source.close()
+
+    buffer.seek(0)
+    return markitdown.convert_stream(buffer, file_extension=".pdf").text_content
+
+
+@trace_methods
 class MarkdownService:
-    """Service for converting PDFs to markdown using markitdown."""
+    """
+    Service for converting PDFs to markdown using markitdown.
+
+    PDFs with at least PDF_PARALLEL_MIN_PAGES pages are split into ranges
+    of PDF_PAGES_PER_RANGE pages that are converted in parallel worker
+    processes and stitched back together in order. When progress is
+    reported, shorter PDFs are converted in the same ranges one after
+    another in-process, so their leading pages are published early too.
+    """
     
     def __init__(self):
         """Initialize the MarkdownService."""
+        # Markdown is kept in the blob store; this directory only holds
+        # files written before it existed
         self.markdown_dir = Path("data/papers/markdown")
-        self.markdown_dir.mkdir(parents=True, exist_ok=True)
         
-        # Initialize markitdown
-        self.markitdown = MarkItDown(enable_plugins=True)
+        # MarkItDown and its plugin stack are loaded on first conversion
+        self._markitdown = None
+        
+        # Page-parallel conversion of long PDFs (0 disables it)
+        self.parallel_min_pages = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "40"))
+        self.pages_per_range = max(1, int(os.getenv("PDF_PAGES_PER_RANGE", "16")))
+        self.conversion_workers = int(os.getenv("PDF_CONVERSION_WORKERS", str(os.cpu_count() or 1)))
+        
+        # Worker processes are started on the first long PDF and reused
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        
+        # Conversions keyed by the PDF's content and the converter versions
+        self.conversion_cache = os.getenv("CONVERSION_CACHE_ENABLED", "true").lower() == "true"
+        self._converter: Optional[Dict[str, Any]] = None
+
+    @property
+    def markitdown(self):
+        """The MarkItDown converter, created on first use."""
+        if self._markitdown is None:
+            from markitdown import MarkItDown
+
+            self._markitdown = MarkItDown(enable_plugins=True)
+
+        return self._markitdown
     
-    def convert_to_markdown(self, pdf_path: str) -> str:
+    def convert_to_markdown(
+        self,
+        pdf_path: str,
+        on_progress: Optional[Callable[[str, float], None]] = None
+    ) -> str:
         """
         Convert a PDF to markdown.
         
         Args:
             pdf_path: Path to the PDF file
+            on_progress: Called with the markdown of the leading pages and
+                the fraction of pages it covers whenever more of the PDF is
+                ready. PDFs of at most PDF_PAGES_PER_RANGE pages are
+                converted in a single call and never report progress.
             
         Returns:
             The markdown content
         """
         try:
-            logger.info(f"Converting PDF {pdf_path} to markdown")
+            ranges = self._page_ranges(pdf_path, progressive=on_progress is not None)
+            
+            cache_key = self._conversion_cache_key(pdf_path, ranges)
+            cached = self._get_cached_conversion(cache_key)
+            if cached is not None:
+                logger.info(f"Using cached conversion of PDF {pdf_path}")
+                return cached
             
-            # Convert PDF to markdown using markitdown
-            result = self.markitdown.convert(pdf_path)
+            logger.info(f"Converting PDF {pdf_path} to markdown")
             
-            # Get the markdown content
-            markdown_content = result.text_content
+            with track_stage("conversion"):
+                if ranges:
+                    markdown_content = self._convert_ranges(pdf_path, ranges, on_progress)
+                else:
+                    # Convert PDF to markdown using markitdown
+                    markdown_content = self.markitdown.convert(pdf_path).text_content
             
             logger.info(f"PDF {pdf_path} converted to markdown successfully")
             
+            self._cache_conversion(cache_key, pdf_path, markdown_content)
+            
             return markdown_content
         
         except Exception as e:
             logger.error(f"Error converting PDF {pdf_path} to markdown: {str(e)}")
             raise
     
-    def save_markdown(self, paper_id: str, markdown_content: str) -> str:
+    @property
+    def converter(self) -> Dict[str, Any]:
+        """Versions of the converter, its plugins and this service's output."""
+        if self._converter is None:
+            plugins = sorted(
+                f"{ep.name}={ep.dist.version if ep.dist else 'unknown'}"
+                for ep in metadata.entry_points(group="markitdown.plugin")
+            )
+            
+            self._converter = {
+                "markitdown": metadata.version("markitdown"),
+                "plugins": plugins,
+                "converter": CONVERTER_VERSION,
+            }
+        
+        return self._converter
+    
+    def _conversion_cache_key(self, pdf_path: str, ranges: List[Tuple[int, int]]) -> Optional[str]:
+        """
+        Get the conversion cache key of a PDF.
+        
+        The key covers everything the markdown depends on: the PDF's
+        content, the markitdown and plugin versions, CONVERTER_VERSION and
+        the page range layout (which adds page markers).
+        
+        Args:
+            pdf_path: Path to the PDF file
+            ranges: Page ranges the PDF would be converted in
+            
+        Returns:
+            The cache key, or None if the cache is disabled or unavailable
+        """
+        if not self.conversion_cache:
+            return None
+        
+        try:
+            inputs = {
+                "pdf": file_sha256(pdf_path),
+                "layout": f"ranges:{self.pages_per_range}" if ranges else "single",
+                **self.converter,
+            }
+        except Exception as e:
+            logger.warning(f"Could not compute the conversion cache key of {pdf_path}: {str(e)}")
+            return None
+        
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()
+    
+    def _get_cached_conversion(self, cache_key: Optional[str]) -> Optional[str]:
+        """
+        Look up a cached conversion.
+        
+        Args:
+            cache_key: Conversion cache key
+            
+        Returns:
+            The markdown content, or None on a miss
+        """
+        if cache_key is None:
+            return None
+        
+        try:
+            entry = read_json(CONVERSIONS_DIR / f"{cache_key}.json")
+            if entry and find_blob(entry["markdown"]):
+                record_cache("conversion", hit=True)
+                return read_blob(entry["markdown"]).decode('utf-8')
+        except Exception as e:
+            logger.warning(f"Could not read cached conversion {cache_key}: {str(e)}")
+        
+        record_cache("conversion", hit=False)
+        return None
+    
+    def _cache_conversion(self, cache_key: Optional[str], pdf_path: str, markdown_content: str) -> None:
+        """
+        Store a conversion in the cache.
+        
+        The entry records the PDF's SHA-256, so evicting every paper with
+        that PDF also frees the cached markdown.
+        
+        Args:
+            cache_key: Conversion cache key
+            pdf_path: Path to the converted PDF file
+            markdown_content: The converted markdown
+        """
+        if cache_key is None:
+            return
+        
+        try:
+            atomic_write_json(CONVERSIONS_DIR / f"{cache_key}.json", {
+                "markdown": put_blob(markdown_content.encode('utf-8')),
+                "pdf": file_sha256(pdf_path),
+                "converter": self.converter,
+                "created": datetime.now().isoformat(),
+            })
+        except Exception as e:
+            logger.warning(f"Could not cache conversion {cache_key}: {str(e)}")
+    
+    def _page_ranges(self, pdf_path: str, progressive: bool = False) -> List[Tuple[int, int]]:
+        """
+        Split a PDF into page ranges for parallel or progressive conversion.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            progressive: Split PDFs too short for parallel conversion as
+                well, so progress can be reported between ranges
+            
+        Returns:
+            The (start, end) page ranges, or an empty list if the PDF should
+            be converted in a single call
+        """
+        if not progressive and not self._parallel_enabled():
+            return []
+        
+        try:
+            import pypdfium2 as pdfium
+            
+            pdf = pdfium.PdfDocument(pdf_path)
+            try:
+                pages = len(pdf)
+            finally:
+                pdf.close()
+        except Exception as e:
+            logger.warning(f"Could not count the pages of {pdf_path}, converting in one call: {str(e)}")
+            return []
+        
+        if not self._is_parallel(pages) and not (progressive and pages > self.pages_per_range):
+            return []
+        
+        return [
+            (start, min(start + self.pages_per_range, pages))
+            for start in range(0, pages, self.pages_per_range)
+        ]
+    
+    def _convert_ranges(
+        self,
+        pdf_path: str,
+        ranges: List[Tuple[int, int]],
+        on_progress: Optional[Callable[[str, float], None]] = None
+    ) -> str:
+        """
+        Convert page ranges of a PDF and stitch them in order.
+        
+        Ranges of long PDFs are converted in parallel worker processes,
+        those of shorter PDFs one after another in-process. Every range
+        starts with a page marker comment. If any range fails, the whole
+        PDF is converted in a single call instead.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            ranges: The (start, end) page ranges
+            on_progress: Called with the stitched markdown whenever the
+                next range in order is ready (except the last)
+            
+        Returns:
+            The markdown content
+        """
+        pages = ranges[-1][1]
+        
+        futures = []
+        if self._is_parallel(pages):
+            logger.info(f"Converting {pages} pages of {pdf_path} in {len(ranges)} parallel ranges")
+            
+            pool = self._get_pool()
+            futures = [
+                pool.submit(_convert_page_range, str(pdf_path), start, end)
+                for start, end in ranges
+            ]
+            results = (future.result() for future in futures)
+        else:
+            logger.info(f"Converting {pages} pages of {pdf_path} in {len(ranges)} ranges")
+            
+            results = (
+                _convert_page_range(str(pdf_path), start, end, self.markitdown)
+                for start, end in ranges
+            )
+        
+        parts = []
+        
+        try:
+            # Ranges are collected in order, so each report extends the last
+            for (start, end), text in zip(ranges, results):
+                parts.append(f"<!-- pages {start + 1}-{end} -->\n\n{text.strip()}")
+                
+                if on_progress and end < pages:
+                    try:
+                        on_progress("\n\n".join(parts), end / pages)
+                    except Exception as e:
+                        logger.warning(f"Could not publish converted pages of {pdf_path}: {str(e)}")
+        except Exception as e:
+            for future in futures:
+                future.cancel()
+            if isinstance(e, BrokenProcessPool):
+                # A worker died (e.g. out of memory); start a new pool next time
+                with self._pool_lock:
+                    self._pool = None
+            logger.warning(f"Conversion of {pdf_path} in page ranges failed, converting in one call: {str(e)}")
+            return self.markitdown.convert(pdf_path).text_content
+        
+        return "\n\n".join(parts)
+    
+    def _parallel_enabled(self) -> bool:
+        """Check whether long PDFs are converted in parallel at all."""
+        return bool(self.parallel_min_pages) and self.conversion_workers >= 2
+    
+    def _is_parallel(self, pages: int) -> bool:
         """
-        Save markdown content to a file.
+        Check whether a PDF is long enough for parallel conversion.
+        
+        Args:
+            pages: Number of pages of the PDF
+            
+        Returns:
+            True if its ranges are converted in worker processes
+        """
+        return self._parallel_enabled() and pages >= self.parallel_min_pages
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """
+        Get the conversion worker pool, starting it on first use.
+        
+        Returns:
+            The process pool
+        """
+        with self._pool_lock:
+            if self._pool is None:
+                # Spawned workers do not inherit the server's threads and locks
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.conversion_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+    
+    def save_markdown(self, paper_id: str, markdown_content: str, complete: bool = True) -> str:
+        """
+        Save markdown content.
+        
+        Complete markdown goes to the blob store. The leading part of a
+        paper that is still being converted is republished on every
+        progress report, so it is kept in a single file that each report
+        overwrites rather than in a new blob every time.
         
         Args:
             paper_id: ID of the paper
             markdown_content: Markdown content to save
+            complete: False for the leading part of a paper that is still
+                being converted
             
         Returns:
-            Path to the saved markdown file
+            SHA-256 of the saved markdown
         """
         try:
-            # Create directory for this paper's markdown
-            paper_markdown_dir = self.markdown_dir / paper_id
-            paper_markdown_dir.mkdir(exist_ok=True)
-            
-            # Path to save the markdown
-            markdown_path = paper_markdown_dir / f"{paper_id}.md"
+            if not complete:
+                partial_path = self._partial_path(paper_id)
+                atomic_write_text(partial_path, markdown_content)
+                entry = record_artifact(paper_id, "markdown", partial_path, complete=False)
+                
+                logger.info(f"Partial markdown for paper {paper_id} saved ({entry['size']} bytes)")
+                
+                return entry["sha256"]
             
-            # Save the markdown
-            with open(markdown_path, 'w', encoding='utf-8') as f:
-                f.write(markdown_content)
+            # Store the markdown and point the paper's manifest at it
+            entry = record_blob_artifact(
+                paper_id,
+                "markdown",
+                markdown_content.encode('utf-8'),
+                complete=True
+            )
+            self._partial_path(paper_id).unlink(missing_ok=True)
             
-            logger.info(f"Markdown for paper {paper_id} saved to {markdown_path}")
+            logger.info(
+                f"Markdown for paper {paper_id} saved as blob {entry['blob']} "
+                f"({entry['size']} bytes, {entry['stored_size']} stored)"
+            )
             
-            return str(markdown_path)
+            return entry["blob"]
         
         except Exception as e:
             logger.error(f"Error saving markdown for paper {paper_id}: {str(e)}")
             raise
     
-    def get_markdown_path(self, paper_id: str) -> str:
+    def discard_partial(self, paper_id: str) -> None:
         """
-        Get the path to a paper's markdown file.
+        Remove the partial markdown of a paper whose conversion failed.
+        
+        Args:
+            paper_id: ID of the paper
+        """
+        entry = read_manifest(paper_id)["artifacts"].get("markdown")
+        if entry and not entry.get("complete", True):
+            remove_artifact(paper_id, "markdown")
+        
+        self._partial_path(paper_id).unlink(missing_ok=True)
+    
+    def _partial_path(self, paper_id: str) -> Path:
+        """
+        Get the path of a paper's partial markdown.
         
         Args:
             paper_id: ID of the paper
             
         Returns:
-            Path to the markdown file
+            Path to the partial markdown file
+        """
+        return PAPERS_DIR / paper_id / "markdown.partial.md"
+    
+    def load_markdown(self, paper_id: str) -> Optional[str]:
         """
-        return str(self.markdown_dir / paper_id / f"{paper_id}.md")
+        Load a paper's markdown.
+        
+        Args:
+            paper_id: ID of the paper
+            
+        Returns:
+            The markdown content, or None if the paper has no markdown
+        """
+        content = read_artifact(paper_id, "markdown")
+        if content is not None:
+            return content.decode('utf-8')
+        
+        # Papers processed before the blob store keep a plain markdown file
+        legacy_path = self.markdown_dir / paper_id / f"{paper_id}.md"
+        if legacy_path.exists():
+            return legacy_path.read_text(encoding='utf-8')
+        
+        return None
@@ -0,0 +1,273 @@
+import os
+import json
+import time
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from app.storage import atomic_write_json
+from app.tracing import trace_methods
+
+logger = logging.getLogger(__name__)
+
+
+@trace_methods
+class QueueService:
+    """
+    File-based ingestion queue on the shared data volume.
+
+    Each job is a JSON file that moves between the pending, processing and
+    failed directories. Claiming a job is an atomic rename, so any number of
+    API servers can enqueue and any number of workers can consume without
+    a separate broker.
+    """
+
+    def __init__(self):
+        """Initialize the QueueService."""
+        self.queue_dir = Path(os.getenv("INGEST_QUEUE_DIR", "data/queue"))
+        self.pending_dir = self.queue_dir / "pending"
+        self.processing_dir = self.queue_dir / "processing"
+        self.failed_dir = self.queue_dir / "failed"
+
+        for directory in (self.pending_dir, self.processing_dir, self.failed_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+
+        # Jobs claimed longer ago than this are assumed to belong to a dead worker
+        self.job_timeout = float(os.getenv("INGEST_JOB_TIMEOUT", "3600"))
+
+        # Pending jobs beyond which new papers are refused (0 for no limit)
+        self.max_pending = int(os.getenv("INGEST_QUEUE_MAX_PENDING", "1000"))
+
+        # Attempts before a job is moved to the failed directory, and the
+        # delay before a failed attempt is retried (doubled per attempt)
+        self.max_attempts = int(os.getenv("INGEST_MAX_ATTEMPTS", "3"))
+        self.retry_backoff = float(os.getenv("INGEST_RETRY_BACKOFF", "60"))
+        self.retry_backoff_max = float(os.getenv("INGEST_RETRY_BACKOFF_MAX", "3600"))
+
+    def enqueue(
+        self,
+        paper_id: str,
+        arxiv_url: str,
+        trace_context: Optional[Dict[str, str]] = None
+    ) -> bool:
+        """
+        Add an ingestion job unless one is already queued for the paper.
+
+        Args:
+            paper_id: ID of the paper
+            arxiv_url: URL of the arXiv paper
+            trace_context: Trace context of the request that queued the job
+
+        Returns:
+            True if a job was added, False if one was already queued
+        """
+        if self.is_queued(paper_id):
+            logger.info(f"Ingestion of paper {paper_id} is already queued")
+            return False
+
+        job = {
+            "paper_id": paper_id,
+            "arxiv_url": arxiv_url,
+            "trace_context": trace_context or {},
+            "enqueued_at": datetime.now().isoformat(),
+            "attempts": 0,
+        }
+
+        # Workers never see a partial job
+        atomic_write_json(self._job_path(self.pending_dir, paper_id), job)
+
+        logger.info(f"Queued ingestion of paper {paper_id}")
+
+        return True
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """
+        Claim the oldest pending job that is due.
+
+        The attempt count is written to the job file, so it survives
+        releases and workers that die. Jobs that already used up their
+        attempts are moved to the failed directory instead.
+
+        Returns:
+            The job, or None if no job is due
+        """
+        candidates = sorted(
+            self.pending_dir.glob("*.json"),
+            key=lambda p: p.stat().st_mtime if p.exists() else 0
+        )
+
+        now = time.time()
+        for path in candidates:
+            # Jobs waiting out their retry backoff are left in place
+            try:
+                with open(path, 'r') as f:
+                    if json.load(f).get("not_before", 0) > now:
+                        continue
+            except FileNotFoundError:
+                continue
+            except Exception:
+                pass
+
+            target = self.processing_dir / path.name
+            try:
+                # Only one worker can win the rename
+                os.rename(path, target)
+            except (FileNotFoundError, FileExistsError, PermissionError):
+                continue
+
+            # Mark the claim time for stale job recovery
+            os.utime(target)
+
+            try:
+                with open(target, 'r') as f:
+                    job = json.load(f)
+            except Exception as e:
+                logger.error(f"Discarding unreadable job {path.name}: {str(e)}")
+                os.replace(target, self.failed_dir / path.name)
+                continue
+
+            if job.get("attempts", 0) >= self.max_attempts:
+                self.fail(job, f"Gave up after {job['attempts']} attempts")
+                continue
+
+            job["attempts"] = job.get("attempts", 0) + 1
+            job.pop("not_before", None)
+            atomic_write_json(target, job)
+
+            logger.info(f"Claimed ingestion of paper {job['paper_id']} (attempt {job['attempts']})")
+
+            return job
+
+        return None
+
+    def complete(self, job: Dict[str, Any]) -> None:
+        """
+        Remove a finished job.
+
+        Args:
+            job: The claimed job
+        """
+        self._job_path(self.processing_dir, job["paper_id"]).unlink(missing_ok=True)
+
+    def fail(self, job: Dict[str, Any], error: str) -> None:
+        """
+        Move a job that could not be processed to the failed directory.
+
+        Args:
+            job: The claimed job
+            error: Description of the failure
+        """
+        job = dict(job, error=error, failed_at=datetime.now().isoformat())
+
+        atomic_write_json(self._job_path(self.failed_dir, job["paper_id"]), job)
+
+        self._job_path(self.processing_dir, job["paper_id"]).unlink(missing_ok=True)
+
+        logger.warning(f"Ingestion of paper {job['paper_id']} failed: {error}")
+
+    def release(self, job: Dict[str, Any], retry: bool = False) -> None:
+        """
+        Return a claimed job to the pending queue.
+
+        Args:
+            job: The claimed job
+            retry: The attempt failed, so the job waits out a backoff before
+                it is claimed again; otherwise (e.g. on shutdown) the attempt
+                is not counted
+        """
+        processing_path = self._job_path(self.processing_dir, job["paper_id"])
+        if not processing_path.exists():
+            return
+
+        job = dict(job)
+        if retry:
+            delay = min(self.retry_backoff * 2 ** (job["attempts"] - 1), self.retry_backoff_max)
+            job["not_before"] = time.time() + delay
+            logger.warning(
+                f"Retrying paper {job['paper_id']} in {delay:.0f}s "
+                f"(attempt {job['attempts']} of {self.max_attempts} failed)"
+            )
+        else:
+            job["attempts"] = max(0, job.get("attempts", 1) - 1)
+
+        try:
+            atomic_write_json(processing_path, job)
+            os.replace(processing_path, self._job_path(self.pending_dir, job["paper_id"]))
+        except FileNotFoundError:
+            pass
+
+    def requeue_stale(self) -> int:
+        """
+        Return jobs claimed by workers that died to the pending queue.
+
+        Returns:
+            Number of jobs requeued
+        """
+        now = time.time()
+        requeued = 0
+
+        for path in self.processing_dir.glob("*.json"):
+            try:
+                if now - path.stat().st_mtime < self.job_timeout:
+                    continue
+                os.replace(path, self.pending_dir / path.name)
+                requeued += 1
+                logger.warning(f"Requeued stale ingestion job {path.name}")
+            except FileNotFoundError:
+                continue
+
+        return requeued
+
+    def is_queued(self, paper_id: str) -> bool:
+        """
+        Check whether a job for a paper is pending or being processed.
+
+        Args:
+            paper_id: ID of the paper
+
+        Returns:
+            True if a job exists
+        """
+        return (
+            self._job_path(self.pending_dir, paper_id).exists()
+            or self._job_path(self.processing_dir, paper_id).exists()
+        )
+
+    def is_full(self) -> bool:
+        """
+        Check whether the queue holds as many pending jobs as it may.
+
+        Returns:
+            True if new jobs should be refused
+        """
+        if not self.max_pending:
+            return False
+
+        return sum(1 for _ in self.pending_dir.glob("*.json")) >= self.max_pending
+
+    def depth(self) -> Dict[str, int]:
+        """
+        Count jobs in each state.
+
+        Returns:
+            Number of pending, processing and failed jobs
+        """
+        return {
+            "pending": sum(1 for _ in self.pending_dir.glob("*.json")),
+            "processing": sum(1 for _ in self.processing_dir.glob("*.json")),
+            "failed": sum(1 for _ in self.failed_dir.glob("*.json")),
+        }
+
+    def _job_path(self, directory: Path, paper_id: str) -> Path:
+        """
+        Get the path of a paper's job file in a queue directory.
+
+        Args:
+            directory: Queue directory
+            paper_id: ID of the paper
+
+        Returns:
+            Path to the job file
+        """
+        return directory / f"{paper_id}.json"
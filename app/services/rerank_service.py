@@ -0,0 +1,182 @@
+import os
+import logging
+import threading
+from typing import List, Dict, Any, Optional
+
+from app.services.local_retrieval_service import tokenize
+from app.tracing import trace_methods
+
+logger = logging.getLogger(__name__)
+
+
+@trace_methods
+class RerankService:
+    """Service for reranking retrieved context chunks before generation."""
+
+    def __init__(self):
+        """Initialize the RerankService."""
+        self.enabled = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+
+        # Cross-encoder model; set to an empty string to always use the lexical reranker
+        self.model_name = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+
+        # Number of candidates retrieved for reranking and number kept afterwards
+        self.candidates = int(os.getenv("RERANK_CANDIDATES", "20"))
+        self.top_n = int(os.getenv("RERANK_TOP_N", "4"))
+
+        # Longest chunk (in tokens) passed to the cross-encoder
+        self.max_length = int(os.getenv("RERANK_MAX_LENGTH", "512"))
+
+        self._model = None
+        self._model_failed = False
+        self._lock = threading.Lock()
+
+    def rerank(
+        self,
+        query: str,
+        context: List[Dict[str, Any]],
+        top_n: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Rerank context chunks against a query and keep the best ones.
+
+        Args:
+            query: User query
+            context: Candidate context chunks
+            top_n: Number of chunks to keep (defaults to RERANK_TOP_N)
+
+        Returns:
+            The top context chunks, each with a 'rerank_score'
+        """
+        if not self.enabled:
+            return context
+
+        top_n = top_n or self.top_n
+
+        if len(context) <= 1:
+            return context[:top_n]
+
+        try:
+            scores = self._cross_encoder_scores(query, context)
+        except Exception as e:
+            logger.warning(f"Cross-encoder reranking failed, using lexical reranker: {str(e)}")
+            scores = None
+
+        if scores is None:
+            scores = self._lexical_scores(query, context)
+
+        reranked = []
+        for chunk, score in zip(context, scores):
+            chunk = dict(chunk)
+            chunk["rerank_score"] = round(float(score), 6)
+            reranked.append(chunk)
+
+        reranked.sort(key=lambda x: x["rerank_score"], reverse=True)
+
+        logger.info(f"Reranked {len(context)} context chunks, keeping {min(top_n, len(reranked))}")
+
+        return reranked[:top_n]
+
+    def _cross_encoder_scores(
+        self,
+        query: str,
+        context: List[Dict[str, Any]]
+    ) -> Optional[List[float]]:
+        """
+        Score (query, chunk) pairs with the cross-encoder in one batch.
+
+        Args:
+            query: User query
+            context: Candidate context chunks
+
+        Returns:
+            One score per chunk, or None if no cross-encoder is available
+        """
+        model = self._get_model()
+        if model is None:
+            return None
+
+        pairs = [(query, chunk.get("text", "")) for chunk in context]
+
+        # A single batch keeps this to one forward pass on CPU
+        scores = model.predict(pairs, batch_size=len(pairs), show_progress_bar=False)
+
+        return [float(s) for s in scores]
+
+    def _lexical_scores(self, query: str, context: List[Dict[str, Any]]) -> List[float]:
+        """
+        Score chunks by query term and bigram coverage.
+
+        Args:
+            query: User query
+            context: Candidate context chunks
+
+        Returns:
+            One score per chunk
+        """
+        query_terms = tokenize(query)
+        if not query_terms:
+            return [chunk.get("score", 0.0) for chunk in context]
+
+        query_set = set(query_terms)
+        query_bigrams = set(zip(query_terms, query_terms[1:]))
+
+        scores = []
+        for chunk in context:
+            terms = tokenize(chunk.get("text", ""))
+            term_set = set(terms)
+
+            coverage = len(query_set & term_set) / len(query_set)
+
+            bigram_score = 0.0
+            if query_bigrams:
+                bigrams = set(zip(terms, terms[1:]))
+                bigram_score = len(query_bigrams & bigrams) / len(query_bigrams)
+
+            # Keep the retrieval score as a small tie-breaker
+            scores.append(coverage + 0.5 * bigram_score + 0.1 * chunk.get("score", 0.0))
+
+        return scores
+
+    def load_model(self) -> bool:
+        """
+        Load the cross-encoder ahead of the first request.
+
+        Returns:
+            True if the cross-encoder is available
+        """
+        if not self.enabled:
+            return False
+
+        return self._get_model() is not None
+
+    def _get_model(self):
+        """
+        Load the cross-encoder on first use.
+
+        Returns:
+            The cross-encoder, or None if it cannot be loaded
+        """
+        if self._model is not None or self._model_failed or not self.model_name:
+            return self._model
+
+        with self._lock:
+            if self._model is not None or self._model_failed:
+                return self._model
+
+            try:
+                from sentence_transformers import CrossEncoder
+
+                self._model = CrossEncoder(
+                    self.model_name,
+                    max_length=self.max_length,
+                    device="cpu"
+                )
+                logger.info(f"Loaded reranking model {self.model_name}")
+
+            except Exception as e:
+                logger.warning(f"Could not load reranking model {self.model_name}: {str(e)}")
+                logger.warning("Falling back to the lexical reranker")
+                self._model_failed = True
+
+        return self._model
@@ -0,0 +1,158 @@
+import os
+import re
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.metrics import ROUTE_DECISIONS
+from app.tracing import set_span_attributes, trace_methods
+
+logger = logging.getLogger(__name__)
+
+# Phrasings of questions that need reasoning across sections
+COMPLEX_PATTERN = re.compile(
+    r"\b(why|how (do|does|did|can|could|would|is|are)|explain|compare|comparison|contrast|"
+    r"differ(s|ence|ences)?|versus|vs\.?|trade-?offs?|pros and cons|advantages?|"
+    r"disadvantages?|limitations?|weakness(es)?|implications?|critique|evaluate|assess|"
+    r"derive|derivation|prove|proof|intuition|relationship|summari[sz]e|overview)\b",
+    re.IGNORECASE
+)
+
+# Phrasings of direct lookups
+SIMPLE_PATTERN = re.compile(
+    r"^\s*(what (is|are|was|were)|who|when|where|which|how (many|much|long|big)|"
+    r"define|list|name|does|is|are)\b",
+    re.IGNORECASE
+)
+
+
+@trace_methods
+class RouterService:
+    """
+    Service for routing chat requests by query complexity.
+
+    Direct lookups (short, phrased as a lookup, and answered by one clearly
+    best chunk) go to the "simple" route with a smaller context budget and
+    a lower temperature; everything else goes to the "complex" route. Each
+    route is an LLM request class, so LLM_ROUTES picks its model, e.g.
+    "simple=gemini:gemini-2.0-flash-lite,complex=gemini:gemini-2.5-pro".
+    """
+
+    def __init__(self):
+        """Initialize the RouterService."""
+        self.enabled = os.getenv("ROUTER_ENABLED", "false").lower() == "true"
+
+        # Longest query (in words) that can be a simple lookup
+        self.simple_max_words = int(os.getenv("ROUTER_SIMPLE_MAX_WORDS", "12"))
+
+        # Minimum lead of the best chunk's score over the mean of the others,
+        # relative to the best score, for retrieval to count as confident
+        self.min_score_gap = float(os.getenv("ROUTER_MIN_SCORE_GAP", "0.2"))
+
+        # Context budget and temperature of simple lookups
+        self.simple_top_k = int(os.getenv("ROUTER_SIMPLE_TOP_K", "3"))
+        self.simple_temperature = float(os.getenv("ROUTER_SIMPLE_TEMPERATURE", "0.3"))
+
+    def route(
+        self,
+        query: str,
+        context: List[Dict[str, Any]],
+        request_class: str = "chat"
+    ) -> Dict[str, Any]:
+        """
+        Decide how to answer a query.
+
+        Args:
+            query: User query
+            context: Retrieved (and reranked) context chunks
+            request_class: Base request class ("chat" or "collection")
+
+        Returns:
+            The decision: 'route', 'reason', the 'request_class' and
+            'temperature' to generate with (None for the default) and the
+            'context' to send
+        """
+        if not self.enabled:
+            return {
+                "route": None,
+                "reason": "disabled",
+                "request_class": request_class,
+                "temperature": None,
+                "context": context,
+            }
+
+        route, reason = self.classify(query, context)
+
+        ROUTE_DECISIONS.labels(route=route).inc()
+        set_span_attributes({"router.route": route, "router.reason": reason})
+        logger.info(f"Routed query to {route} ({reason}): {query}")
+
+        if route == "simple":
+            return {
+                "route": route,
+                "reason": reason,
+                "request_class": f"{request_class}.simple",
+                "temperature": self.simple_temperature,
+                "context": context[:self.simple_top_k],
+            }
+
+        return {
+            "route": route,
+            "reason": reason,
+            "request_class": f"{request_class}.complex",
+            "temperature": None,
+            "context": context,
+        }
+
+    def classify(self, query: str, context: List[Dict[str, Any]]) -> Tuple[str, str]:
+        """
+        Classify a query as a simple lookup or a complex question.
+
+        Args:
+            query: User query
+            context: Retrieved context chunks
+
+        Returns:
+            The route ("simple" or "complex") and the reason for it
+        """
+        words = len(query.split())
+
+        if words > self.simple_max_words:
+            return "complex", f"{words} words"
+
+        match = COMPLEX_PATTERN.search(query)
+        if match:
+            return "complex", f"keyword '{match.group(0).lower()}'"
+
+        if not SIMPLE_PATTERN.search(query):
+            return "complex", "not a lookup"
+
+        gap = self._score_gap(context)
+        if gap is not None and gap < self.min_score_gap:
+            return "complex", f"score gap {gap:.2f}"
+
+        return "simple", "lookup" if gap is None else f"lookup, score gap {gap:.2f}"
+
+    def _score_gap(self, context: List[Dict[str, Any]]) -> Optional[float]:
+        """
+        Measure how clearly the best chunk beats the others.
+
+        Args:
+            context: Retrieved context chunks, best first
+
+        Returns:
+            The best score's lead over the mean of the others relative to the
+            best score, or None if there are fewer than two scored chunks
+        """
+        scores = [
+            chunk.get("rerank_score", chunk.get("score"))
+            for chunk in context
+        ]
+        scores = [float(s) for s in scores if s is not None]
+
+        if len(scores) < 2:
+            return None
+
+        best = max(scores)
+        rest = (sum(scores) - best) / (len(scores) - 1)
+
+        return (best - rest) / max(abs(best), 1e-9)
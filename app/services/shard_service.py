@@ -0,0 +1,138 @@
+import os
+import bisect
+import hashlib
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.storage import PAPERS_DIR, read_manifest
+from app.tracing import trace_methods
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(key: str) -> int:
+    """
+    Hash a key onto the ring.
+
+    Args:
+        key: Key to hash
+
+    Returns:
+        A 64-bit position on the ring
+    """
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], "big")
+
+
+@trace_methods
+class ShardService:
+    """
+    Service for assigning papers to MiniRAG shards.
+
+    Papers are spread over the MiniRAG endpoints in MINIRAG_URLS by
+    consistent hashing on the paper ID, so adding an endpoint only moves
+    the papers that now hash to it. The shard a paper was inserted into is
+    recorded with its MiniRAG document and used for every later query, so
+    papers stay reachable until they are rebalanced.
+    """
+
+    def __init__(self, urls: Optional[List[str]] = None):
+        """
+        Initialize the ShardService.
+
+        Args:
+            urls: MiniRAG endpoints (defaults to MINIRAG_URLS, or MINIRAG_HOST
+                and MINIRAG_PORT for a single endpoint)
+        """
+        if urls is None:
+            urls = [u.strip() for u in os.getenv("MINIRAG_URLS", "").split(",") if u.strip()]
+        if not urls:
+            urls = [
+                f"http://{os.getenv('MINIRAG_HOST', 'localhost')}:"
+                f"{os.getenv('MINIRAG_PORT', '9721')}"
+            ]
+
+        self.urls = [u.rstrip("/") for u in urls]
+
+        # Points per endpoint on the ring; more points spread papers more evenly
+        self.vnodes = int(os.getenv("MINIRAG_SHARD_VNODES", "100"))
+
+        self._ring: List[Tuple[int, str]] = sorted(
+            (_hash(f"{url}#{i}"), url)
+            for url in self.urls
+            for i in range(self.vnodes)
+        )
+        self._points = [point for point, _ in self._ring]
+
+    def locate(self, paper_id: str) -> str:
+        """
+        Get the shard a paper hashes to.
+
+        Args:
+            paper_id: ID of the paper
+
+        Returns:
+            URL of the MiniRAG endpoint
+        """
+        if len(self.urls) == 1:
+            return self.urls[0]
+
+        index = bisect.bisect(self._points, _hash(paper_id)) % len(self._ring)
+        return self._ring[index][1]
+
+    def shard_for(self, paper_id: str) -> str:
+        """
+        Get the shard holding a paper, or the one it should be inserted into.
+
+        Args:
+            paper_id: ID of the paper
+
+        Returns:
+            URL of the MiniRAG endpoint
+        """
+        shard = self.assigned_shard(paper_id)
+        if shard in self.urls:
+            return shard
+
+        if shard is not None:
+            logger.warning(f"Shard {shard} of paper {paper_id} is no longer configured")
+
+        return self.locate(paper_id)
+
+    def assigned_shard(self, paper_id: str) -> Optional[str]:
+        """
+        Get the shard a paper was inserted into.
+
+        Args:
+            paper_id: ID of the paper
+
+        Returns:
+            URL of the MiniRAG endpoint, or None if the paper was never
+            inserted. Papers inserted before sharding live on the first
+            endpoint.
+        """
+        document = read_manifest(paper_id)["artifacts"].get("minirag_document")
+        if document is None:
+            return None
+
+        return document.get("shard") or self.urls[0]
+
+    def misplaced(self) -> List[Dict[str, Any]]:
+        """
+        Find the papers that no longer live on the shard they hash to.
+
+        Returns:
+            'paper_id', current 'shard' and 'target' shard of each paper
+            that has to move, e.g. after an endpoint was added
+        """
+        moves = []
+        for path in sorted(PAPERS_DIR.glob("*/manifest.json")):
+            paper_id = path.parent.name
+            shard = self.assigned_shard(paper_id)
+            if shard is None:
+                continue
+
+            target = self.locate(paper_id)
+            if shard != target:
+                moves.append({"paper_id": paper_id, "shard": shard, "target": target})
+
+        return moves
@@ -0,0 +1,455 @@
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Optional, Set
+
+from app.metrics import track_stage
+from app.storage import (
+    ARCHIVE_DIR,
+    CONVERSIONS_DIR,
+    PAPERS_DIR,
+    LockUnavailable,
+    atomic_write_bytes,
+    atomic_write_json,
+    compress,
+    decompress,
+    find_blob,
+    paper_lock,
+    read_blob,
+    read_artifact,
+    read_json,
+    read_manifest,
+    record_artifact,
+    record_blob_artifact,
+    remove_blob,
+)
+from app.tracing import trace_methods
+
+try:
+    import boto3
+except ImportError:  # Only needed for S3-compatible archives
+    boto3 = None
+
+logger = logging.getLogger(__name__)
+
+# Artifacts moved to the archive when a paper goes cold; metadata, the
+# manifest and MiniRAG document IDs always stay hot
+TIERED_ARTIFACTS = ("pdf", "markdown", "keywords")
+
+# Artifacts chat reads, restored on the next chat request
+CHAT_ARTIFACTS = ("markdown", "keywords")
+
+# Manifest fields recomputed when an artifact is recorded again
+STANDARD_FIELDS = ("path", "blob", "size", "stored_size", "sha256", "updated", "archived")
+
+
+class LocalArchive:
+    """Archive of compressed artifacts in a local directory."""
+
+    def __init__(self, root: Path):
+        """
+        Initialize the LocalArchive.
+
+        Args:
+            root: Directory holding the archived objects
+        """
+        self.root = root
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store an object."""
+        atomic_write_bytes(self.root / key, data)
+
+    def get(self, key: str) -> bytes:
+        """Read an object, raising FileNotFoundError if it does not exist."""
+        with open(self.root / key, 'rb') as f:
+            return f.read()
+
+
+class S3Archive:
+    """Archive of compressed artifacts in an S3-compatible bucket."""
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None):
+        """
+        Initialize the S3Archive.
+
+        Args:
+            bucket: Bucket holding the archived objects
+            prefix: Key prefix of the archived objects
+            endpoint_url: Endpoint of an S3-compatible store (e.g. MinIO)
+        """
+        if boto3 is None:
+            raise RuntimeError("S3 archives require boto3 (pip install boto3)")
+
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+
+    def _key(self, key: str) -> str:
+        """Get the bucket key of an object."""
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store an object."""
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data)
+
+    def get(self, key: str) -> bytes:
+        """Read an object, raising FileNotFoundError if it does not exist."""
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"].read()
+        except self.client.exceptions.NoSuchKey as e:
+            raise FileNotFoundError(f"Archived object {key} not found") from e
+
+
+@trace_methods
+class TieringService:
+    """
+    Service for moving cold papers to an archive and back.
+
+    Chat requests record when each paper was last used. Papers not used
+    for TIERING_COLD_AFTER_DAYS, and the least recently used papers beyond
+    TIERING_MAX_HOT_PAPERS, have their PDF and markdown blobs moved to a
+    compressed archive (a local directory or an S3-compatible bucket).
+    Their metadata and manifest stay in place, and the archived artifacts
+    are restored on the next chat request.
+    """
+
+    def __init__(self):
+        """Initialize the TieringService."""
+        self.enabled = os.getenv("TIERING_ENABLED", "false").lower() == "true"
+
+        # Retention policy
+        self.cold_after = timedelta(days=float(os.getenv("TIERING_COLD_AFTER_DAYS", "30")))
+        self.max_hot_papers = int(os.getenv("TIERING_MAX_HOT_PAPERS", "0"))
+
+        # Archive: a directory, or s3://bucket/prefix with an optional
+        # endpoint for S3-compatible stores
+        archive_url = os.getenv("ARCHIVE_URL", str(ARCHIVE_DIR))
+        if archive_url.startswith("s3://"):
+            bucket, _, prefix = archive_url[len("s3://"):].partition("/")
+            self.archive = S3Archive(bucket, prefix, os.getenv("ARCHIVE_S3_ENDPOINT") or None)
+        else:
+            self.archive = LocalArchive(Path(archive_url))
+
+        # Access times are written to disk at most this often per paper
+        self.access_flush_interval = float(os.getenv("ACCESS_FLUSH_INTERVAL", "60"))
+        self._pending_access: Dict[str, int] = {}
+        self._last_flush: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record_access(self, paper_id: str) -> None:
+        """
+        Record that a paper was used.
+
+        Args:
+            paper_id: ID of the paper
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._pending_access[paper_id] = self._pending_access.get(paper_id, 0) + 1
+            if now - self._last_flush.get(paper_id, float("-inf")) < self.access_flush_interval:
+                return
+            count = self._pending_access.pop(paper_id)
+            self._last_flush[paper_id] = now
+
+        try:
+            with paper_lock(paper_id, "access"):
+                access = self.read_access(paper_id) or {"count": 0}
+                access["count"] += count
+                access["last_accessed"] = datetime.now().isoformat()
+                atomic_write_json(self._access_path(paper_id), access)
+        except Exception as e:
+            logger.warning(f"Could not record access to paper {paper_id}: {str(e)}")
+
+    def read_access(self, paper_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Read the access statistics of a paper.
+
+        Args:
+            paper_id: ID of the paper
+
+        Returns:
+            'count' and 'last_accessed', or None if the paper was never used
+        """
+        return read_json(self._access_path(paper_id))
+
+    def hot_papers(self, limit: int, window: timedelta) -> List[str]:
+        """
+        Rank the papers used most within a recent window.
+
+        Args:
+            limit: Maximum number of papers
+            window: How far back uses count
+
+        Returns:
+            IDs of the most used papers, most used first
+        """
+        cutoff = datetime.now() - window
+
+        ranked = []
+        for path in PAPERS_DIR.glob("*/access.json"):
+            access = read_json(path) or {}
+            last_accessed = access.get("last_accessed")
+            if last_accessed and datetime.fromisoformat(last_accessed) >= cutoff:
+                ranked.append((access.get("count", 0), last_accessed, path.parent.name))
+
+        ranked.sort(reverse=True)
+
+        return [paper_id for _, _, paper_id in ranked[:limit]]
+
+    def read(self, paper_id: str, name: str) -> Optional[bytes]:
+        """
+        Read an artifact of a paper, from the archive if it is archived.
+
+        Archived artifacts are not restored.
+
+        Args:
+            paper_id: ID of the paper
+            name: Artifact name
+
+        Returns:
+            The content of the artifact, or None if it is not recorded or missing
+        """
+        entry = read_manifest(paper_id)["artifacts"].get(name)
+        if not entry or not entry.get("archived"):
+            return read_artifact(paper_id, name)
+
+        try:
+            return decompress(self.archive.get(entry["archived"]["key"]), entry["archived"]["codec"])
+        except FileNotFoundError:
+            logger.warning(f"Archived artifact {name} of paper {paper_id} is missing")
+            return None
+
+    def ensure_hot(self, paper_id: str, artifacts: Iterable[str] = CHAT_ARTIFACTS) -> List[str]:
+        """
+        Restore the archived artifacts of a paper.
+
+        Args:
+            paper_id: ID of the paper
+            artifacts: Artifacts to restore
+
+        Returns:
+            Names of the restored artifacts
+        """
+        manifest = read_manifest(paper_id)
+        archived = [
+            name for name in artifacts
+            if manifest["artifacts"].get(name, {}).get("archived")
+        ]
+        if not archived:
+            return []
+
+        restored = []
+        with track_stage("rehydration"), paper_lock(paper_id, "tiering"):
+            for name in archived:
+                # Another process may have restored it while we waited
+                entry = read_manifest(paper_id)["artifacts"].get(name)
+                if not entry or not entry.get("archived"):
+                    continue
+
+                data = decompress(self.archive.get(entry["archived"]["key"]), entry["archived"]["codec"])
+                extra = {k: v for k, v in entry.items() if k not in STANDARD_FIELDS}
+
+                if "blob" in entry:
+                    record_blob_artifact(paper_id, name, data, **extra)
+                else:
+                    atomic_write_bytes(entry["path"], data)
+                    record_artifact(paper_id, name, entry["path"], **extra)
+
+                restored.append(name)
+
+        if restored:
+            logger.info(f"Restored {', '.join(restored)} of paper {paper_id} from the archive")
+
+        return restored
+
+    def evict(self, paper_id: str, referenced_blobs: Optional[Set[str]] = None) -> List[str]:
+        """
+        Move the artifacts of a paper to the archive.
+
+        Blobs that hot artifacts of other papers, or cached conversions of
+        their PDFs, refer to are archived for this paper but kept on disk.
+
+        Args:
+            paper_id: ID of the paper
+            referenced_blobs: Blobs referred to by hot artifacts of other
+                papers and by cached conversions of their PDFs (computed
+                if omitted)
+
+        Returns:
+            Names of the archived artifacts
+        """
+        if referenced_blobs is None:
+            referenced_blobs = self._hot_blobs(exclude=paper_id)
+
+        evicted = []
+        # Never evict a paper while it is being ingested
+        with paper_lock(paper_id, "ingest", blocking=False), paper_lock(paper_id, "tiering"):
+            for name in TIERED_ARTIFACTS:
+                entry = read_manifest(paper_id)["artifacts"].get(name)
+                if not entry or entry.get("archived"):
+                    continue
+
+                if "blob" in entry:
+                    if find_blob(entry["blob"]) is None:
+                        continue
+                    data = read_blob(entry["blob"])
+                elif Path(entry["path"]).exists():
+                    with open(entry["path"], 'rb') as f:
+                        data = f.read()
+                else:
+                    continue
+
+                compressed, codec = compress(data)
+                key = f"{paper_id}/{name}-{entry['sha256'][:16]}"
+                self.archive.put(key, compressed)
+
+                archived = {
+                    "key": key,
+                    "codec": codec,
+                    "stored_size": len(compressed),
+                    "archived_at": datetime.now().isoformat(),
+                }
+                extra = {k: v for k, v in entry.items() if k not in STANDARD_FIELDS}
+
+                # Record the archive copy before the local one goes away
+                if "blob" in entry:
+                    record_blob_artifact(paper_id, name, data, archived=archived, **extra)
+                    if entry["blob"] not in referenced_blobs:
+                        remove_blob(entry["blob"])
+                else:
+                    record_artifact(paper_id, name, entry["path"], archived=archived, **extra)
+                    Path(entry["path"]).unlink(missing_ok=True)
+
+                evicted.append(name)
+
+        if evicted:
+            logger.info(f"Archived {', '.join(evicted)} of paper {paper_id}")
+
+        return evicted
+
+    def cold_papers(self) -> List[str]:
+        """
+        Select the papers the retention policy evicts.
+
+        Returns:
+            IDs of hot papers unused for longer than TIERING_COLD_AFTER_DAYS,
+            followed by the least recently used papers beyond
+            TIERING_MAX_HOT_PAPERS
+        """
+        hot = []
+        for path in PAPERS_DIR.glob("*/manifest.json"):
+            paper_id = path.parent.name
+            artifacts = read_manifest(paper_id)["artifacts"]
+
+            markdown = artifacts.get("markdown")
+            if markdown is None or not markdown.get("complete", True):
+                continue
+            if all(artifacts.get(name, {}).get("archived") for name in TIERED_ARTIFACTS if name in artifacts):
+                continue
+
+            hot.append((self._last_used(paper_id, artifacts), paper_id))
+
+        hot.sort()
+        cutoff = datetime.now() - self.cold_after
+
+        cold = [paper_id for last_used, paper_id in hot if last_used < cutoff]
+        if self.max_hot_papers and len(hot) - len(cold) > self.max_hot_papers:
+            warm = [paper_id for last_used, paper_id in hot if last_used >= cutoff]
+            cold += warm[:len(warm) - self.max_hot_papers]
+
+        return cold
+
+    def sweep(self, dry_run: bool = False) -> List[str]:
+        """
+        Evict every paper the retention policy selects.
+
+        Args:
+            dry_run: Only select the papers
+
+        Returns:
+            IDs of the evicted (or selected) papers
+        """
+        cold = self.cold_papers()
+        if dry_run or not cold:
+            return cold
+
+        evicted = []
+        hot_blobs = self._hot_blobs(exclude=cold)
+        for paper_id in cold:
+            try:
+                if self.evict(paper_id, hot_blobs):
+                    evicted.append(paper_id)
+            except LockUnavailable:
+                logger.info(f"Paper {paper_id} is being ingested, not evicting it")
+            except Exception as e:
+                logger.error(f"Error evicting paper {paper_id}: {str(e)}")
+
+        logger.info(f"Evicted {len(evicted)} cold papers")
+
+        return evicted
+
+    def _last_used(self, paper_id: str, artifacts: Dict[str, Any]) -> datetime:
+        """
+        Get when a paper was last used, or processed if it never was.
+
+        Args:
+            paper_id: ID of the paper
+            artifacts: Artifacts of the paper's manifest
+
+        Returns:
+            Time of last use
+        """
+        access = self.read_access(paper_id)
+        timestamp = (access or {}).get("last_accessed") or artifacts["markdown"]["updated"]
+        return datetime.fromisoformat(timestamp)
+
+    def _hot_blobs(self, exclude: Iterable[str] = ()) -> Set[str]:
+        """
+        Collect the blobs hot artifacts and cached conversions of hot PDFs
+        refer to.
+
+        Args:
+            exclude: Papers whose artifacts are left out
+
+        Returns:
+            Blob keys
+        """
+        exclude = {exclude} if isinstance(exclude, str) else set(exclude)
+
+        blobs = set()
+        hot_pdfs = set()
+        for path in PAPERS_DIR.glob("*/manifest.json"):
+            if path.parent.name in exclude:
+                continue
+            for name, entry in read_manifest(path.parent.name)["artifacts"].items():
+                if entry.get("archived"):
+                    continue
+                if "blob" in entry:
+                    blobs.add(entry["blob"])
+                if name == "pdf":
+                    hot_pdfs.add(entry["sha256"])
+
+        # Keep the cached conversions of PDFs that are still hot; the
+        # conversion of an evicted PDF is freed with it and works again
+        # once the paper's markdown is restored into the same blob
+        for path in CONVERSIONS_DIR.glob("*.json"):
+            entry = read_json(path)
+            if entry and entry.get("markdown") and entry.get("pdf") in hot_pdfs:
+                blobs.add(entry["markdown"])
+
+        return blobs
+
+    def _access_path(self, paper_id: str) -> Path:
+        """
+        Get the path of a paper's access statistics.
+
+        Args:
+            paper_id: ID of the paper
+
+        Returns:
+            Path to the JSON file
+        """
+        return PAPERS_DIR / paper_id / "access.json"
@@ -0,0 +1,442 @@
+import os
+import json
+import mmap
+import zlib
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+try:
+    import zstandard
+except ImportError:  # Fall back to zlib, which is always available
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+DATA_DIR = Path("data")
+LOCKS_DIR = DATA_DIR / "locks"
+PAPERS_DIR = DATA_DIR / "papers"
+BLOBS_DIR = DATA_DIR / "blobs"
+CONVERSIONS_DIR = DATA_DIR / "cache" / "conversions"
+ANSWER_CACHE_PATH = DATA_DIR / "cache" / "answers.json"
+ARCHIVE_DIR = DATA_DIR / "archive"
+
+MANIFEST_VERSION = 1
+
+# Blob file suffix by codec; the suffix tells readers how to decompress
+BLOB_SUFFIXES = {"zstd": ".zst", "zlib": ".zz"}
+BLOB_CODEC = "zstd" if zstandard else "zlib"
+
+
+class LockUnavailable(Exception):
+    """Raised when a non-blocking lock is held by someone else."""
+
+
+def atomic_write_bytes(path: PathLike, data: bytes) -> None:
+    """
+    Write a file so readers see either the old or the new content, never a mix.
+
+    The data is written to a temporary file in the same directory, flushed to
+    disk and renamed over the target.
+
+    Args:
+        path: Destination path
+        data: Content to write
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def atomic_write_text(path: PathLike, text: str) -> None:
+    """
+    Atomically write a UTF-8 text file.
+
+    Args:
+        path: Destination path
+        text: Content to write
+    """
+    atomic_write_bytes(path, text.encode('utf-8'))
+
+
+def atomic_write_json(path: PathLike, data: Any) -> None:
+    """
+    Atomically write a JSON file.
+
+    Args:
+        path: Destination path
+        data: JSON-serializable data
+    """
+    atomic_write_bytes(path, json.dumps(data, indent=2).encode('utf-8'))
+
+
+@contextmanager
+def file_lock(path: PathLike, shared: bool = False, blocking: bool = True):
+    """
+    Hold an advisory lock on a lock file.
+
+    Locks are taken with flock, so they exclude other processes and other
+    threads of the same process alike. On Windows only exclusive locks exist.
+
+    Args:
+        path: Lock file path
+        shared: Take a shared (reader) lock instead of an exclusive one
+        blocking: Wait for the lock instead of raising LockUnavailable
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(path, 'a+b') as f:
+        try:
+            if fcntl:
+                flags = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+                if not blocking:
+                    flags |= fcntl.LOCK_NB
+                fcntl.flock(f.fileno(), flags)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        except (BlockingIOError, OSError) as e:
+            raise LockUnavailable(f"Lock {path} is held by another process") from e
+
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def paper_lock(paper_id: str, name: str = "files", shared: bool = False, blocking: bool = True):
+    """
+    Hold an advisory lock for a paper.
+
+    Separate names guard separate concerns: "files" serializes writers of a
+    paper's metadata and manifest, "ingest" makes sure only one process runs
+    the ingestion pipeline for a paper at a time. Readers do not need a lock
+    because every write is an atomic rename.
+
+    Args:
+        paper_id: ID of the paper
+        name: Lock name
+        shared: Take a shared lock
+        blocking: Wait for the lock instead of raising LockUnavailable
+    """
+    return file_lock(LOCKS_DIR / f"{paper_id}.{name}.lock", shared=shared, blocking=blocking)
+
+
+def manifest_path(paper_id: str) -> Path:
+    """
+    Get the path of a paper's manifest.
+
+    Args:
+        paper_id: ID of the paper
+
+    Returns:
+        Path to the manifest
+    """
+    return PAPERS_DIR / paper_id / "manifest.json"
+
+
+def read_manifest(paper_id: str) -> Dict[str, Any]:
+    """
+    Read a paper's manifest.
+
+    Args:
+        paper_id: ID of the paper
+
+    Returns:
+        The manifest, or an empty manifest if none exists yet
+    """
+    try:
+        with open(manifest_path(paper_id), 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"version": MANIFEST_VERSION, "paper_id": paper_id, "artifacts": {}}
+
+
+def record_artifact(paper_id: str, artifact: str, path: PathLike, **extra: Any) -> Dict[str, Any]:
+    """
+    Record an artifact of a paper in its manifest.
+
+    The manifest lists every file that belongs to a paper together with its
+    size and SHA-256, so any process can tell which artifacts exist and
+    whether they are complete.
+
+    Args:
+        paper_id: ID of the paper
+        artifact: Artifact name (e.g. "pdf", "minirag_document")
+        path: Path to the artifact file
+        **extra: Additional fields to store with the artifact
+
+    Returns:
+        The recorded artifact entry
+    """
+    path = Path(path)
+    entry = {
+        "path": str(path),
+        "size": path.stat().st_size,
+        "sha256": file_sha256(path),
+        "updated": datetime.now().isoformat(),
+        **extra,
+    }
+
+    return _update_manifest(paper_id, artifact, entry)
+
+
+def record_blob_artifact(paper_id: str, artifact: str, data: bytes, **extra: Any) -> Dict[str, Any]:
+    """
+    Store an artifact of a paper in the blob store and record it in its manifest.
+
+    Args:
+        paper_id: ID of the paper
+        artifact: Artifact name (e.g. "markdown")
+        data: Content of the artifact
+        **extra: Additional fields to store with the artifact
+
+    Returns:
+        The recorded artifact entry
+    """
+    key = put_blob(data)
+    entry = {
+        "blob": key,
+        "size": len(data),
+        "stored_size": blob_path(key).stat().st_size,
+        "sha256": key,
+        "updated": datetime.now().isoformat(),
+        **extra,
+    }
+
+    return _update_manifest(paper_id, artifact, entry)
+
+
+def read_artifact(paper_id: str, artifact: str) -> Optional[bytes]:
+    """
+    Read an artifact of a paper through its manifest.
+
+    Args:
+        paper_id: ID of the paper
+        artifact: Artifact name
+
+    Returns:
+        The content of the artifact, or None if it is not recorded or missing
+    """
+    entry = read_manifest(paper_id)["artifacts"].get(artifact)
+    if not entry:
+        return None
+
+    try:
+        if "blob" in entry:
+            return read_blob(entry["blob"])
+        with open(entry["path"], 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        logger.warning(f"Artifact {artifact} of paper {paper_id} is recorded but missing")
+        return None
+
+
+def remove_artifact(paper_id: str, artifact: str) -> None:
+    """
+    Remove an artifact from a paper's manifest.
+
+    Args:
+        paper_id: ID of the paper
+        artifact: Artifact name
+    """
+    with paper_lock(paper_id):
+        manifest = read_manifest(paper_id)
+        if manifest["artifacts"].pop(artifact, None) is not None:
+            manifest["updated"] = datetime.now().isoformat()
+            atomic_write_json(manifest_path(paper_id), manifest)
+
+
+def _update_manifest(paper_id: str, artifact: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Write an artifact entry into a paper's manifest under the paper's lock."""
+    with paper_lock(paper_id):
+        manifest = read_manifest(paper_id)
+        manifest["artifacts"][artifact] = entry
+        manifest["updated"] = entry["updated"]
+        atomic_write_json(manifest_path(paper_id), manifest)
+
+    return entry
+
+
+def blob_path(key: str, codec: str = BLOB_CODEC) -> Path:
+    """
+    Get the path of a blob.
+
+    Blobs are sharded by the first two hex digits of their key so no
+    directory grows too large.
+
+    Args:
+        key: SHA-256 of the uncompressed content
+        codec: Compression codec of the blob
+
+    Returns:
+        Path to the blob file
+    """
+    return BLOBS_DIR / key[:2] / f"{key}{BLOB_SUFFIXES[codec]}"
+
+
+def find_blob(key: str) -> Optional[Path]:
+    """
+    Find a stored blob regardless of the codec it was written with.
+
+    Args:
+        key: SHA-256 of the uncompressed content
+
+    Returns:
+        Path to the blob file, or None if it is not stored
+    """
+    for codec in BLOB_SUFFIXES:
+        path = blob_path(key, codec)
+        if path.exists():
+            return path
+    return None
+
+
+def put_blob(data: bytes) -> str:
+    """
+    Store content in the content-addressed blob store.
+
+    Content is keyed by its SHA-256 and compressed with zstd (zlib if the
+    zstandard package is not installed). Identical content is only stored
+    once, no matter how many papers or artifacts refer to it.
+
+    Args:
+        data: Content to store
+
+    Returns:
+        The blob key
+    """
+    key = hashlib.sha256(data).hexdigest()
+
+    if find_blob(key) is None:
+        compressed, codec = compress(data)
+        atomic_write_bytes(blob_path(key, codec), compressed)
+
+    return key
+
+
+def read_blob(key: str) -> bytes:
+    """
+    Read content from the blob store.
+
+    The compressed file is memory-mapped and decompressed straight from the
+    mapping, so reads do not go through an intermediate buffer.
+
+    Args:
+        key: Blob key
+
+    Returns:
+        The uncompressed content
+    """
+    path = find_blob(key)
+    if path is None:
+        raise FileNotFoundError(f"Blob {key} not found")
+
+    codec = "zstd" if path.suffix == BLOB_SUFFIXES["zstd"] else "zlib"
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return decompress(mapped, codec)
+
+
+def remove_blob(key: str) -> None:
+    """
+    Delete a blob regardless of the codec it was written with.
+
+    Args:
+        key: Blob key
+    """
+    for codec in BLOB_SUFFIXES:
+        blob_path(key, codec).unlink(missing_ok=True)
+
+
+def compress(data: bytes) -> Tuple[bytes, str]:
+    """
+    Compress content with zstd, or zlib if zstandard is not installed.
+
+    Args:
+        data: Content to compress
+
+    Returns:
+        The compressed content and the codec used
+    """
+    if zstandard:
+        return zstandard.ZstdCompressor(level=3).compress(data), "zstd"
+    return zlib.compress(data, 6), "zlib"
+
+
+def decompress(data: Any, codec: str) -> bytes:
+    """
+    Decompress content written by compress.
+
+    Args:
+        data: Compressed content (bytes or any buffer, e.g. a memory map)
+        codec: Codec the content was compressed with
+
+    Returns:
+        The uncompressed content
+    """
+    if codec == "zstd":
+        if not zstandard:
+            raise RuntimeError("Content is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def file_sha256(path: PathLike) -> str:
+    """
+    Compute the SHA-256 of a file.
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_json(path: PathLike) -> Optional[Dict[str, Any]]:
+    """
+    Read a JSON file written with atomic_write_json.
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        The parsed data, or None if the file does not exist
+    """
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
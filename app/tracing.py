@@ -0,0 +1,158 @@
+import os
+import inspect
+import logging
+import functools
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from opentelemetry import context, propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+logger = logging.getLogger(__name__)
+
+tracer = trace.get_tracer("alphaxiv")
+
+_configured = False
+
+
+def setup_tracing(service_name: str = "alphaxiv-api") -> None:
+    """
+    Configure the global tracer provider.
+
+    TRACING_EXPORTER selects where finished spans go:
+    - "none" (default): spans are recorded for trace IDs but not exported
+    - "console": one JSON span per line on stdout
+    - "file": one JSON span per line appended to TRACING_FILE
+
+    Args:
+        service_name: Service name attached to every span
+    """
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    exporter_name = os.getenv("TRACING_EXPORTER", "none").lower()
+
+    if exporter_name in ("console", "file"):
+        if exporter_name == "file":
+            trace_file = Path(os.getenv("TRACING_FILE", "data/traces/spans.jsonl"))
+            trace_file.parent.mkdir(parents=True, exist_ok=True)
+            out = open(trace_file, "a", encoding="utf-8")
+        else:
+            out = None
+
+        exporter = ConsoleSpanExporter(
+            service_name=service_name,
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+            **({"out": out} if out else {})
+        )
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+        logger.info(f"Tracing enabled with {exporter_name} exporter")
+
+    trace.set_tracer_provider(provider)
+
+
+def traced(name: Optional[str] = None):
+    """
+    Decorate a function so each call runs inside a span.
+
+    Works for both regular and async functions.
+
+    Args:
+        name: Span name (defaults to the function's qualified name)
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.start_as_current_span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.start_as_current_span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def trace_methods(cls):
+    """
+    Class decorator that wraps every method defined on a service in a span.
+
+    Dunder methods other than __init__ are left alone.
+    """
+    for attr, value in list(vars(cls).items()):
+        if not inspect.isfunction(value):
+            continue
+        if attr.startswith("__") and attr != "__init__":
+            continue
+        setattr(cls, attr, traced()(value))
+    return cls
+
+
+def current_trace_id() -> Optional[str]:
+    """
+    Get the trace ID of the current span as 32 hex characters.
+
+    Returns:
+        The trace ID, or None if there is no valid span
+    """
+    span_context = trace.get_current_span().get_span_context()
+    if not span_context.is_valid:
+        return None
+    return format(span_context.trace_id, "032x")
+
+
+def set_span_attributes(attributes: Dict[str, Any]) -> None:
+    """
+    Add attributes to the current span.
+
+    Args:
+        attributes: Attribute values by name
+    """
+    trace.get_current_span().set_attributes(attributes)
+
+
+def inject_context() -> Dict[str, str]:
+    """
+    Serialize the current trace context so work started elsewhere
+    (ingest threads, queued jobs) joins the same trace.
+
+    Returns:
+        W3C trace context headers
+    """
+    carrier: Dict[str, str] = {}
+    propagate.inject(carrier)
+    return carrier
+
+
+def attach_context(carrier: Optional[Dict[str, str]]):
+    """
+    Make a serialized trace context current.
+
+    Args:
+        carrier: Headers produced by inject_context
+
+    Returns:
+        A token for context.detach
+    """
+    return context.attach(propagate.extract(carrier or {}))
+
+
+def detach_context(token) -> None:
+    """
+    Restore the context that was current before attach_context.
+
+    Args:
+        token: Token returned by attach_context
+    """
+    context.detach(token)
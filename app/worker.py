@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Ingest worker that consumes paper processing jobs from the shared queue.
+
+Run with `alphaxiv-worker` or `python -m app.worker`. On SIGTERM/SIGINT the
+worker stops claiming new jobs, finishes the job in progress and exits.
+"""
+
+import os
+import time
+import signal
+import logging
+import argparse
+import threading
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+
+class IngestWorker:
+    """Claims jobs from the ingestion queue and runs the ingestion pipeline."""
+
+    def __init__(self, poll_interval: float = 2.0, heartbeat_interval: float = 60.0):
+        """
+        Initialize the IngestWorker.
+
+        Args:
+            poll_interval: Seconds to wait when the queue is empty
+            heartbeat_interval: Seconds between claim refreshes of the running job
+        """
+        from app.services.queue_service import QueueService
+        from app.services.tiering_service import TieringService
+
+        self.queue_service = QueueService()
+        self.tiering_service = TieringService()
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self._stopping = threading.Event()
+
+        # Idle workers evict cold papers this often (with TIERING_ENABLED)
+        self.sweep_interval = float(os.getenv("TIERING_SWEEP_INTERVAL", "3600"))
+        self._last_sweep = time.monotonic()
+
+    def stop(self, *args) -> None:
+        """Stop claiming jobs; the running job is allowed to finish."""
+        if not self._stopping.is_set():
+            logger.info("Draining: finishing the current job before exiting")
+        self._stopping.set()
+
+    def run(self, once: bool = False) -> None:
+        """
+        Process jobs until stopped.
+
+        Args:
+            once: Exit as soon as the queue is empty
+        """
+        logger.info(f"Ingest worker {os.getpid()} started")
+
+        self.queue_service.requeue_stale()
+
+        while not self._stopping.is_set():
+            job = self.queue_service.claim()
+
+            if job is None:
+                if once:
+                    break
+                self._stopping.wait(self.poll_interval)
+                self.queue_service.requeue_stale()
+                self._sweep_cold_papers()
+                continue
+
+            self._run_job(job)
+
+        logger.info(f"Ingest worker {os.getpid()} stopped")
+
+    def _run_job(self, job) -> None:
+        """
+        Run one job, keeping its claim fresh while it runs.
+
+        Args:
+            job: The claimed job
+        """
+        from app.pipeline import run_ingest
+
+        paper_id = job["paper_id"]
+        done = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat,
+            args=(paper_id, done),
+            daemon=True
+        )
+        heartbeat.start()
+
+        try:
+            processed = run_ingest(paper_id, job["arxiv_url"], job.get("trace_context"))
+        except Exception as e:
+            logger.error(f"Unexpected error processing paper {paper_id}: {str(e)}")
+            processed = False
+        finally:
+            done.set()
+            heartbeat.join()
+
+        if processed:
+            self.queue_service.complete(job)
+        elif self._stopping.is_set():
+            logger.warning(f"Returning paper {paper_id} to the queue")
+            self.queue_service.release(job)
+        elif job["attempts"] < self.queue_service.max_attempts:
+            self.queue_service.release(job, retry=True)
+        else:
+            self.queue_service.fail(job, f"Ingestion pipeline did not complete in {job['attempts']} attempts")
+
+    def _sweep_cold_papers(self) -> None:
+        """Evict cold papers when the sweep is due; one worker sweeps at a time."""
+        from app.storage import LOCKS_DIR, LockUnavailable, file_lock
+
+        if not self.tiering_service.enabled or time.monotonic() - self._last_sweep < self.sweep_interval:
+            return
+
+        self._last_sweep = time.monotonic()
+
+        try:
+            with file_lock(LOCKS_DIR / "tiering.lock", blocking=False):
+                self.tiering_service.sweep()
+        except LockUnavailable:
+            logger.info("Another worker is evicting cold papers")
+        except Exception as e:
+            logger.error(f"Error evicting cold papers: {str(e)}")
+
+    def _heartbeat(self, paper_id: str, done: threading.Event) -> None:
+        """Refresh the claim time so long jobs are not mistaken for stale ones."""
+        path = self.queue_service.processing_dir / f"{paper_id}.json"
+        while not done.wait(self.heartbeat_interval):
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                return
+
+
+def main():
+    """Main function to run the ingest worker."""
+    load_dotenv()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    parser = argparse.ArgumentParser(description="Run the AlphaXIV ingest worker")
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=float(os.getenv("INGEST_POLL_INTERVAL", "2")),
+        help="Seconds to wait when the queue is empty"
+    )
+    parser.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+    args = parser.parse_args()
+
+    from app.tracing import setup_tracing
+    setup_tracing("alphaxiv-worker")
+
+    worker = IngestWorker(poll_interval=args.poll_interval)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+
+    worker.run(once=args.once)
+
+
+if __name__ == "__main__":
+    main()
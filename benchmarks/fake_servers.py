@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the MiniRAG, Gemini and arXiv API servers.
+
+The servers answer with the same shapes as the real services and support
+latency and error injection, so the API can be exercised and benchmarked
+without network access or API keys.
+
+Run a stand-in on its own with:
+    python -m benchmarks.fake_servers minirag --port 9721
+    python -m benchmarks.fake_servers gemini --port 9800
+    python -m benchmarks.fake_servers arxiv --port 9801
+"""
+
+import re
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+import threading
+from typing import Dict, Any
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+async def _inject(latency_ms: float, jitter_ms: float, error_rate: float):
+    """
+    Sleep for the configured latency and decide whether to fail.
+
+    Returns:
+        An error response to return instead of the real one, or None
+    """
+    delay = max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000
+    if delay:
+        await asyncio.sleep(delay)
+
+    if error_rate and random.random() < error_rate:
+        return JSONResponse(status_code=500, content={"detail": "Injected error"})
+
+    return None
+
+
+def create_fake_minirag_app(
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    error_rate: float = 0.0,
+    keyword_latency_ms: float = 0.0
+) -> FastAPI:
+    """
+    Create a MiniRAG (LightRAG server) stand-in.
+
+    Documents are kept in memory and queries return the paragraphs sharing
+    the most words with the query.
+
+    Args:
+        latency_ms: Mean latency added to every insert and query
+        jitter_ms: Maximum random deviation from the mean latency
+        error_rate: Fraction of inserts and queries that fail with a 500
+        keyword_latency_ms: Latency added to queries sent without keywords,
+            standing in for the LLM call MiniRAG extracts them with
+
+    Returns:
+        The FastAPI app
+    """
+    app = FastAPI(title="Fake MiniRAG")
+    documents: Dict[str, Dict[str, Any]] = {}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.post("/documents/text")
+    async def insert_text(payload: Dict[str, Any]):
+        error = await _inject(latency_ms, jitter_ms, error_rate)
+        if error:
+            return error
+
+        text = payload.get("text", "")
+        document_id = "doc-" + hashlib.md5(text.strip().encode("utf-8")).hexdigest()
+        documents[document_id] = {
+            "id": document_id,
+            "content_summary": text[:100],
+            "description": payload.get("description", ""),
+            "paragraphs": [p for p in text.split("\n\n") if p.strip()],
+            "status": "processed",
+        }
+
+        return {"status": "success", "id": document_id, "message": "Document inserted"}
+
+    @app.get("/documents/status")
+    async def document_status():
+        statuses: Dict[str, list] = {}
+        for doc in documents.values():
+            statuses.setdefault(doc["status"], []).append({
+                "id": doc["id"],
+                "content_summary": doc["content_summary"],
+                "status": doc["status"],
+            })
+        return {"statuses": statuses}
+
+    @app.get("/documents")
+    async def list_documents():
+        return await document_status()
+
+    @app.delete("/documents/delete_document")
+    async def delete_documents(payload: Dict[str, Any]):
+        deleted = [doc_id for doc_id in payload.get("doc_ids", []) if documents.pop(doc_id, None)]
+        return {"status": "success", "deleted": deleted}
+
+    @app.post("/query")
+    async def query(payload: Dict[str, Any]):
+        error = await _inject(latency_ms, jitter_ms, error_rate)
+        if error:
+            return error
+
+        if payload.get("mode") != "naive" and not (
+            payload.get("hl_keywords") or payload.get("ll_keywords")
+        ):
+            await _inject(keyword_latency_ms, jitter_ms, 0.0)
+
+        query_words = set(WORD_PATTERN.findall(payload.get("query", "").lower()))
+        top_k = int(payload.get("top_k", 10))
+
+        scored = []
+        for doc in documents.values():
+            for paragraph in doc["paragraphs"]:
+                words = set(WORD_PATTERN.findall(paragraph.lower()))
+                overlap = len(query_words & words)
+                if overlap:
+                    scored.append((overlap / (len(query_words) or 1), paragraph))
+
+        scored.sort(key=lambda x: x[0], reverse=True)
+
+        return {
+            "response": "",
+            "context": [{"text": text, "score": score} for score, text in scored[:top_k]],
+        }
+
+    return app
+
+
+def create_fake_gemini_app(
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    error_rate: float = 0.0,
+    tokens_per_second: float = 0.0
+) -> FastAPI:
+    """
+    Create a Gemini REST API stand-in.
+
+    Point the google-generativeai client at it with GEMINI_API_ENDPOINT.
+
+    Args:
+        latency_ms: Mean latency added to every generation
+        jitter_ms: Maximum random deviation from the mean latency
+        error_rate: Fraction of generations that fail with a 500
+        tokens_per_second: Simulated decode speed; 0 disables it
+
+    Returns:
+        The FastAPI app
+    """
+    app = FastAPI(title="Fake Gemini")
+
+    @app.post("/v1beta/models/{model}:generateContent")
+    async def generate_content(model: str, request: Request):
+        error = await _inject(latency_ms, jitter_ms, error_rate)
+        if error:
+            return error
+
+        payload = await request.json()
+        prompt = " ".join(
+            part.get("text", "")
+            for content in payload.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        prompt_tokens = len(prompt.split())
+
+        answer = f"Stand-in answer from {model} for a prompt of {prompt_tokens} words."
+        answer_tokens = len(answer.split())
+
+        if tokens_per_second:
+            await asyncio.sleep(answer_tokens / tokens_per_second)
+
+        return {
+            "candidates": [{
+                "content": {"parts": [{"text": answer}], "role": "model"},
+                "finishReason": "STOP",
+                "index": 0,
+            }],
+            "usageMetadata": {
+                "promptTokenCount": prompt_tokens,
+                "candidatesTokenCount": answer_tokens,
+                "totalTokenCount": prompt_tokens + answer_tokens,
+            },
+        }
+
+    return app
+
+
+ATOM_ENTRY = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <entry>
+    <id>http://arxiv.org/abs/{paper_id}v1</id>
+    <published>2024-01-01T00:00:00Z</published>
+    <title>Stand-in paper {paper_id}</title>
+    <summary>Abstract of stand-in paper {paper_id} about retrieval and evaluation.</summary>
+    <author><name>Ada Lovelace</name></author>
+    <author><name>Alan Turing</name></author>
+  </entry>
+</feed>
+"""
+
+
+def create_fake_arxiv_app(
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    error_rate: float = 0.0
+) -> FastAPI:
+    """
+    Create an arXiv API stand-in.
+
+    Point the app at it with ARXIV_API_URL (e.g. http://127.0.0.1:9801/api/query).
+
+    Args:
+        latency_ms: Mean latency added to every query
+        jitter_ms: Maximum random deviation from the mean latency
+        error_rate: Fraction of queries that fail with a 500
+
+    Returns:
+        The FastAPI app
+    """
+    app = FastAPI(title="Fake arXiv API")
+
+    @app.get("/api/query")
+    async def query(id_list: str):
+        error = await _inject(latency_ms, jitter_ms, error_rate)
+        if error:
+            return error
+
+        return Response(
+            content=ATOM_ENTRY.format(paper_id=id_list.split(",")[0]),
+            media_type="application/atom+xml"
+        )
+
+    return app
+
+
+class ServerThread:
+    """Run a FastAPI app with uvicorn in a background thread."""
+
+    def __init__(self, app: FastAPI, host: str = "127.0.0.1", port: int = 0):
+        config = uvicorn.Config(app, host=host, port=port, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.host = host
+
+    def start(self) -> "ServerThread":
+        """Start the server and wait until it accepts connections."""
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    @property
+    def port(self) -> int:
+        """Port the server is bound to."""
+        return self.server.servers[0].sockets[0].getsockname()[1]
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server."""
+        return f"http://{self.host}:{self.port}"
+
+    def stop(self) -> None:
+        """Stop the server and wait for the thread to exit."""
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
+
+
+def main():
+    """Main function to run a stand-in server."""
+    parser = argparse.ArgumentParser(description="Run a local MiniRAG, Gemini or arXiv stand-in")
+    parser.add_argument("server", choices=["minirag", "gemini", "arxiv"], help="Server to run")
+    parser.add_argument("--host", default="127.0.0.1", help="Server host")
+    parser.add_argument("--port", type=int, default=9721, help="Server port")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mean added latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of failing requests")
+    parser.add_argument("--keyword-latency-ms", type=float, default=0.0, help="MiniRAG keyword extraction latency")
+
+    args = parser.parse_args()
+
+    if args.server == "minirag":
+        app = create_fake_minirag_app(
+            args.latency_ms, args.jitter_ms, args.error_rate, args.keyword_latency_ms
+        )
+    elif args.server == "gemini":
+        app = create_fake_gemini_app(args.latency_ms, args.jitter_ms, args.error_rate)
+    else:
+        app = create_fake_arxiv_app(args.latency_ms, args.jitter_ms, args.error_rate)
+
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+Benchmark the ingestion and chat paths of the API.
+
+The FastAPI app runs in-process against local MiniRAG and Gemini stand-ins
+(see benchmarks/fake_servers.py), or the in-process mock LLM with
+--llm-provider mock, inside a temporary data directory, so the numbers are reproducible and comparable across commits.
+
+Usage:
+    python -m benchmarks.run_benchmarks --corpus path/to/pdfs --output bench.json
+    python -m benchmarks.run_benchmarks --compare previous.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+import statistics
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from app.dependencies import (  # noqa: E402
+    get_arxiv_service,
+    get_indexing_service,
+    get_markdown_service,
+)
+from benchmarks.fake_servers import (  # noqa: E402
+    ServerThread,
+    create_fake_arxiv_app,
+    create_fake_minirag_app,
+    create_fake_gemini_app,
+)
+
+DEFAULT_QUERIES = [
+    "What is the main contribution of this paper?",
+    "Which datasets are used in the experiments?",
+    "How does the proposed method compare to the baselines?",
+    "What are the limitations discussed by the authors?",
+    "Describe the model architecture.",
+]
+
+SYNTHETIC_SECTIONS = [
+    ("Abstract", "We propose a method for efficient attention in transformer models."),
+    ("Introduction", "Large language models are expensive to serve at long context lengths."),
+    ("Method", "Our architecture combines sparse attention with a learned routing layer."),
+    ("Experiments", "We evaluate on three datasets and compare against strong baselines."),
+    ("Results", "The proposed method improves accuracy while reducing latency by a third."),
+    ("Limitations", "The approach requires additional memory during training."),
+]
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark the AlphaXIV API")
+    parser.add_argument("--corpus", help="Directory of PDFs to ingest; synthetic papers are used if omitted")
+    parser.add_argument("--papers", type=int, default=5, help="Number of synthetic papers when no corpus is given")
+    parser.add_argument("--ingest-concurrency", type=int, default=4, help="Concurrent ingestion requests")
+    parser.add_argument("--chat-concurrency", default="1,4,16", help="Comma-separated chat concurrency levels")
+    parser.add_argument("--chat-requests", type=int, default=50, help="Chat requests per concurrency level")
+    parser.add_argument("--minirag-latency-ms", type=float, default=50.0, help="Stand-in MiniRAG latency")
+    parser.add_argument("--minirag-error-rate", type=float, default=0.0, help="Stand-in MiniRAG error rate")
+    parser.add_argument("--minirag-shards", type=int, default=1, help="Number of stand-in MiniRAG shards")
+    parser.add_argument("--minirag-keyword-latency-ms", type=float, default=0.0, help="Stand-in MiniRAG keyword extraction latency for queries sent without keywords")
+    parser.add_argument("--gemini-latency-ms", type=float, default=300.0, help="Stand-in Gemini latency")
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0, help="Stand-in Gemini error rate")
+    parser.add_argument("--llm-provider", choices=["gemini", "mock"], default="gemini", help="Gemini stand-in or in-process mock LLM")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="Latency jitter for both stand-ins")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    parser.add_argument("--keep-workdir", action="store_true", help="Keep the temporary data directory")
+    return parser.parse_args()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Compute a percentile with linear interpolation.
+
+    Args:
+        values: Sample values
+        pct: Percentile between 0 and 100
+
+    Returns:
+        The percentile, or 0.0 for an empty sample
+    """
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    """
+    Summarize request latencies in milliseconds.
+
+    Args:
+        latencies: Latencies of successful requests in seconds
+        errors: Number of failed requests
+        elapsed: Wall-clock time of the run in seconds
+
+    Returns:
+        Summary statistics
+    """
+    ms = [x * 1000 for x in latencies]
+    total = len(latencies) + errors
+
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(len(latencies) / elapsed, 4) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(ms), 3) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "max_ms": round(max(ms), 3) if ms else 0.0,
+    }
+
+
+def git_commit() -> Optional[str]:
+    """Return the current git commit, if available."""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO_ROOT,
+            stderr=subprocess.DEVNULL,
+            text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def seed_corpus(corpus: Path) -> List[str]:
+    """
+    Copy corpus PDFs into the data directory so ingestion skips the download.
+
+    Args:
+        corpus: Directory of PDFs
+
+    Returns:
+        Paper IDs assigned to the PDFs
+    """
+    paper_ids = []
+
+    for i, pdf in enumerate(sorted(corpus.glob("*.pdf"))):
+        # Keep real arXiv IDs, otherwise assign one the URL parser accepts
+        stem = pdf.stem
+        paper_id = stem if stem.replace(".", "").isdigit() and "." in stem else f"9999.{i:05d}"
+
+        paper_dir = Path("data/papers") / paper_id
+        paper_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copy(pdf, paper_dir / f"{paper_id}.pdf")
+        paper_ids.append(paper_id)
+
+    return paper_ids
+
+
+def seed_synthetic(count: int) -> List[str]:
+    """
+    Write synthetic markdown papers and index them directly.
+
+    Args:
+        count: Number of papers
+
+    Returns:
+        Paper IDs of the synthetic papers
+    """
+    paper_ids = []
+
+    for i in range(count):
+        paper_id = f"9999.{i:05d}"
+        sections = [f"# Synthetic paper {i}"]
+        for title, text in SYNTHETIC_SECTIONS:
+            sections.append(f"## {title}")
+            sections.extend(f"{text} Paragraph {j} of paper {i}." for j in range(20))
+
+        markdown_content = "\n\n".join(sections)
+        get_markdown_service().save_markdown(paper_id, markdown_content)
+        get_indexing_service().index_paper(paper_id, markdown_content)
+        get_arxiv_service().mark_paper_as_processed(paper_id)
+        paper_ids.append(paper_id)
+
+    return paper_ids
+
+
+async def bench_ingest(client, paper_ids: List[str], concurrency: int) -> Dict[str, Any]:
+    """
+    Measure ingestion of the seeded PDFs through the process endpoint.
+
+    Args:
+        client: HTTP client bound to the app
+        paper_ids: Papers to ingest
+        concurrency: Concurrent ingestion requests
+
+    Returns:
+        Ingestion results
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def ingest(paper_id: str):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(
+                "/api/papers/process",
+                json={"arxiv_url": f"https://arxiv.org/abs/{paper_id}"}
+            )
+            if response.status_code != 200:
+                errors += 1
+                return
+
+            # Wait for the background task to mark the paper as processed
+            deadline = start + 600
+            while not get_arxiv_service().is_paper_processed(paper_id):
+                if time.perf_counter() > deadline:
+                    errors += 1
+                    return
+                await asyncio.sleep(0.05)
+
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(ingest(paper_id) for paper_id in paper_ids))
+    elapsed = time.perf_counter() - start
+
+    result = summarize(latencies, errors, elapsed)
+    result["concurrency"] = concurrency
+    result["papers_per_second"] = result.pop("throughput_rps")
+
+    return result
+
+
+async def bench_chat(client, paper_ids: List[str], concurrency: int, requests: int) -> Dict[str, Any]:
+    """
+    Measure chat latency at a fixed concurrency.
+
+    Args:
+        client: HTTP client bound to the app
+        paper_ids: Processed papers to chat with
+        concurrency: Number of concurrent clients
+        requests: Total number of requests
+
+    Returns:
+        Chat results for this concurrency level
+    """
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            payload = {
+                "paper_id": paper_ids[i % len(paper_ids)],
+                "query": DEFAULT_QUERIES[i % len(DEFAULT_QUERIES)],
+            }
+            start = time.perf_counter()
+            response = await client.post("/api/chat", json=payload)
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return summarize(latencies, errors, elapsed)
+
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Flatten the numeric leaves of a results dictionary."""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """
+    Print the change of every metric relative to a baseline run.
+
+    Args:
+        current: Results of this run
+        baseline: Results of a previous run
+    """
+    current_flat = flatten({k: v for k, v in current.items() if k != "meta"})
+    baseline_flat = flatten({k: v for k, v in baseline.items() if k != "meta"})
+
+    print(f"\nComparison against {baseline.get('meta', {}).get('commit', 'baseline')}:")
+    print(f"{'metric':<40} {'baseline':>12} {'current':>12} {'change':>9}")
+
+    for name in sorted(set(current_flat) & set(baseline_flat)):
+        old, new = baseline_flat[name], current_flat[name]
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"{name:<40} {old:>12.3f} {new:>12.3f} {change:>9}")
+
+
+async def run(args: argparse.Namespace, workdir: Path) -> Dict[str, Any]:
+    """
+    Run the benchmarks inside a prepared working directory.
+
+    Args:
+        args: Command line arguments
+        workdir: Temporary directory holding the data volume
+
+    Returns:
+        Benchmark results
+    """
+    import httpx
+
+    shards = [
+        ServerThread(create_fake_minirag_app(
+            args.minirag_latency_ms, args.jitter_ms, args.minirag_error_rate,
+            args.minirag_keyword_latency_ms
+        )).start()
+        for _ in range(args.minirag_shards)
+    ]
+    gemini = ServerThread(create_fake_gemini_app(
+        args.gemini_latency_ms, args.jitter_ms, args.gemini_error_rate
+    )).start()
+    arxiv = ServerThread(create_fake_arxiv_app()).start()
+
+    os.environ.update({
+        "MINIRAG_URLS": ",".join(shard.url for shard in shards),
+        "GEMINI_API_ENDPOINT": gemini.url,
+        "GOOGLE_API_KEY": "benchmark",
+        "ARXIV_API_URL": f"{arxiv.url}/api/query",
+        "LLM_PROVIDER": args.llm_provider,
+        "MOCK_LLM_LATENCY_MS": str(args.gemini_latency_ms),
+    })
+
+    # All load comes from one client; keep admission limits from the
+    # environment but never cap the benchmark client's share
+    os.environ.setdefault("ADMISSION_CHAT_PER_CLIENT", "0")
+    os.environ.setdefault("ADMISSION_INGEST_PER_CLIENT", "0")
+    os.environ.setdefault("INGEST_CONCURRENCY", str(args.ingest_concurrency))
+
+    results: Dict[str, Any] = {}
+
+    try:
+        os.chdir(workdir)
+
+        corpus_ids = seed_corpus(Path(args.corpus)) if args.corpus else []
+
+        start = time.perf_counter()
+        import app.main as main_module
+        import_s = time.perf_counter() - start
+
+        app = main_module.app
+        transport = httpx.ASGITransport(app=app)
+        async with app.router.lifespan_context(app), \
+                httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+            lifespan_s = time.perf_counter() - start - import_s
+            await app.state.warmup
+            warmup_s = time.perf_counter() - start - import_s - lifespan_s
+
+            results["startup"] = {
+                "import_s": round(import_s, 4),
+                "lifespan_s": round(lifespan_s, 4),
+                "warmup_s": round(warmup_s, 4),
+                "pdf_stack_loaded": "markitdown" in sys.modules,
+            }
+
+            if corpus_ids:
+                results["ingest"] = await bench_ingest(
+                    client, corpus_ids, args.ingest_concurrency
+                )
+                paper_ids = corpus_ids
+            else:
+                paper_ids = seed_synthetic(args.papers)
+
+            # First chat after startup, before any caches are warm
+            start = time.perf_counter()
+            response = await client.post("/api/chat", json={
+                "paper_id": paper_ids[0],
+                "query": DEFAULT_QUERIES[0],
+            })
+            results["startup"]["first_chat_s"] = round(time.perf_counter() - start, 4)
+            results["startup"]["first_chat_status"] = response.status_code
+
+            results["chat"] = {}
+            for level in (int(x) for x in args.chat_concurrency.split(",")):
+                results["chat"][f"c{level}"] = await bench_chat(
+                    client, paper_ids, level, args.chat_requests
+                )
+
+    finally:
+        for shard in shards:
+            shard.stop()
+        gemini.stop()
+        arxiv.stop()
+
+    return results
+
+
+def main():
+    """Main function to run the benchmarks."""
+    args = parse_args()
+    if args.corpus:
+        args.corpus = str(Path(args.corpus).resolve())
+    output = Path(args.output).resolve()
+
+    workdir = Path(tempfile.mkdtemp(prefix="alphaxiv-bench-"))
+    original_cwd = os.getcwd()
+
+    try:
+        results = asyncio.run(run(args, workdir))
+    finally:
+        os.chdir(original_cwd)
+        if not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        **results,
+    }
+
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(json.dumps({k: v for k, v in results.items() if k != "meta"}, indent=2))
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Script to export processed papers as bundles and import them on other nodes.
+
+A bundle holds everything needed to chat with one paper (metadata,
+markdown, keyword vocabulary, PDF and its MiniRAG document record) in a
+single compressed file under BUNDLE_DIR (default data/bundles/).
+
+    python bundle_papers.py export               # bundle all processed papers
+    python bundle_papers.py import FILE_OR_DIR   # import bundles
+    python bundle_papers.py sync /other/data     # copy and import another node's bundles
+
+Unchanged papers are skipped. Papers whose MiniRAG document this node's
+MiniRAG does not hold are imported without it; insert them with
+index_paper.py.
+"""
+
+import sys
+import argparse
+from pathlib import Path
+from typing import List
+
+from app.services.bundle_service import BundleService
+from app.storage import LockUnavailable, atomic_write_bytes, file_sha256, read_json, read_manifest
+
+
+def bundle_paper_id(path: Path) -> str:
+    """Get the paper ID from a bundle's file name."""
+    return path.name.split(".bundle")[0]
+
+
+def is_imported(path: Path) -> bool:
+    """Check whether exactly this bundle was already imported or exported here."""
+    entry = read_manifest(bundle_paper_id(path))["artifacts"].get("bundle")
+    return bool(entry) and entry.get("sha256") == file_sha256(path)
+
+
+def export_papers(bundle_service: BundleService, paper_ids: List[str], force: bool) -> bool:
+    """Export papers, or all processed papers if none are given."""
+    if not paper_ids:
+        paper_ids = [
+            path.stem
+            for path in sorted(bundle_service.arxiv_service.metadata_dir.glob("*.json"))
+            if (read_json(path) or {}).get("processing_status") == "completed"
+        ]
+
+    failed = False
+    exported = 0
+    for paper_id in paper_ids:
+        try:
+            path = bundle_service.export(paper_id, force=force)
+        except LockUnavailable:
+            print(f"Paper {paper_id} is being ingested")
+            failed = True
+            continue
+        except Exception as e:
+            print(f"Error exporting paper {paper_id}: {str(e)}")
+            failed = True
+            continue
+
+        if path is None:
+            print(f"Paper {paper_id}: up to date")
+        else:
+            print(f"Paper {paper_id}: exported to {path}")
+            exported += 1
+
+    print(f"{exported} of {len(paper_ids)} papers exported")
+    return not failed
+
+
+def import_bundles(bundle_service: BundleService, paths: List[Path], force: bool) -> bool:
+    """Import bundles, skipping the ones already imported."""
+    failed = False
+    not_indexed = []
+    imported = 0
+    for path in paths:
+        if not force and is_imported(path):
+            print(f"Paper {bundle_paper_id(path)}: up to date")
+            continue
+
+        try:
+            result = bundle_service.import_bundle(path, force=force)
+        except LockUnavailable:
+            print(f"Paper {bundle_paper_id(path)} is being ingested")
+            failed = True
+            continue
+        except Exception as e:
+            print(f"Error importing {path}: {str(e)}")
+            failed = True
+            continue
+
+        if result is None:
+            print(f"Paper {bundle_paper_id(path)}: up to date")
+            continue
+
+        print(f"Paper {result['paper_id']}: imported {', '.join(result['artifacts'])}")
+        imported += 1
+        if not result["indexed"]:
+            not_indexed.append(result["paper_id"])
+
+    print(f"{imported} of {len(paths)} bundles imported")
+    if not_indexed:
+        print(f"Not indexed with MiniRAG on this node: python index_paper.py {' '.join(not_indexed)}")
+
+    return not failed
+
+
+def main():
+    """Main function to export, import or sync paper bundles."""
+    parser = argparse.ArgumentParser(description="Share processed papers between nodes as bundles")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export papers as bundles")
+    export_parser.add_argument("paper_ids", nargs="*", help="Papers to export (default: all processed papers)")
+    export_parser.add_argument("--force", action="store_true", help="Rewrite bundles that are up to date")
+
+    import_parser = subparsers.add_parser("import", help="Import bundles")
+    import_parser.add_argument("paths", nargs="+", help="Bundle files or directories holding bundles")
+    import_parser.add_argument("--force", action="store_true", help="Import papers that are up to date")
+
+    sync_parser = subparsers.add_parser("sync", help="Copy and import the bundles of another node")
+    sync_parser.add_argument("source", help="The other node's data/ directory, or a directory of bundles")
+    sync_parser.add_argument("--force", action="store_true", help="Import papers that are up to date")
+
+    args = parser.parse_args()
+
+    bundle_service = BundleService()
+
+    if args.command == "export":
+        return 0 if export_papers(bundle_service, args.paper_ids, args.force) else 1
+
+    if args.command == "import":
+        paths = []
+        for path in map(Path, args.paths):
+            paths.extend(bundle_service.find(path) if path.is_dir() else [path])
+        return 0 if import_bundles(bundle_service, paths, args.force) else 1
+
+    source = Path(args.source)
+    if (source / "bundles").is_dir():
+        source = source / "bundles"
+    if not source.is_dir():
+        print(f"{source} is not a directory")
+        return 1
+
+    # Copy the bundles first, so this node can pass them on in turn
+    paths = []
+    for path in bundle_service.find(source):
+        target = bundle_service.bundle_dir / path.name
+        if target.resolve() != path.resolve() and (
+            not target.exists() or file_sha256(target) != file_sha256(path)
+        ):
+            atomic_write_bytes(target, path.read_bytes())
+        paths.append(target)
+
+    return 0 if import_bundles(bundle_service, paths, args.force) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
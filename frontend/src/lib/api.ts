@@ -32,3 +32,38 @@ export async function chatWithPaper(paperId: string, query: string) {
 
   return await response.json();
 }
+
+export async function chatWithCollection(paperIds: string[], query: string) {
+  const response = await fetch(`${API_URL}/api/chat/collection`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({ paper_ids: paperIds, query }),
+  });
+
+  if (!response.ok) {
+    throw new Error('Failed to chat with collection');
+  }
+
+  return await response.json();
+}
+
+export async function listPapers(
+  options: { status?: string; q?: string; limit?: number; offset?: number } = {}
+) {
+  const params = new URLSearchParams();
+  Object.entries(options).forEach(([key, value]) => {
+    if (value !== undefined && value !== '') {
+      params.set(key, String(value));
+    }
+  });
+
+  const response = await fetch(`${API_URL}/api/papers?${params}`);
+
+  if (!response.ok) {
+    throw new Error('Failed to list papers');
+  }
+
+  return await response.json();
+}
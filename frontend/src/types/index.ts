@@ -20,11 +20,28 @@ export interface ChatResponse {
   query: string;
   response: string;
   context: ContextItem[];
+  route?: 'simple' | 'complex' | null;
+  completeness?: number;
+}
+
+export interface CollectionChatRequest {
+  paper_ids: string[];
+  query: string;
+}
+
+export interface CollectionChatResponse {
+  paper_ids: string[];
+  missing_paper_ids: string[];
+  query: string;
+  response: string;
+  context: ContextItem[];
+  route?: 'simple' | 'complex' | null;
 }
 
 export interface ContextItem {
   content?: string;
   text?: string;
+  paper_id?: string;
   metadata?: {
     page?: number;
     section?: string;
@@ -47,6 +64,13 @@ export interface PaperMetadata {
   last_updated?: string;
 }
 
+export interface PaperListResponse {
+  papers: PaperMetadata[];
+  total: number;
+  limit: number;
+  offset: number;
+}
+
 // Chat message
 export interface ChatMessage {
   id: string;
@@ -1,117 +1,95 @@
 #!/usr/bin/env python3
 """
-Script to index a paper with MiniRAG.
+Script to index papers with MiniRAG.
+
+Every paper is inserted into its shard first, then the script waits for
+all of them at once, checking their status with one call per shard and
+round and backing off between rounds. Document IDs are computed from the content, so they are
+known right after the insert.
 """
 
-import os
 import sys
-import json
-import httpx
+import argparse
 from pathlib import Path
+from typing import Optional
 
-def main():
-    """Main function to index a paper with MiniRAG."""
-    if len(sys.argv) < 2:
-        print("Usage: python index_paper.py <paper_id>")
-        sys.exit(1)
+import httpx
+
+from app.services.document_service import DocumentService
+from app.storage import read_artifact
 
-    paper_id = sys.argv[1]
 
-    # Get the paper content
+def load_content(paper_id: str) -> Optional[str]:
+    """Get a paper's content from the blob store, or the copy written by older versions."""
+    content = read_artifact(paper_id, "markdown")
+    if content is not None:
+        return content.decode('utf-8')
+
     paper_path = Path(f"data/index/{paper_id}/{paper_id}_content.md")
+    if paper_path.exists():
+        return paper_path.read_text(encoding='utf-8')
+
+    return None
+
+
+def main():
+    """Main function to index papers with MiniRAG."""
+    parser = argparse.ArgumentParser(description="Index papers with MiniRAG")
+    parser.add_argument("paper_ids", nargs="+", help="Papers to index")
+    parser.add_argument("--force", action="store_true", help="Insert papers whose content is already indexed")
+    parser.add_argument("--no-wait", action="store_true", help="Do not wait for MiniRAG to process the papers")
+    parser.add_argument("--timeout", type=float, default=None, help="Maximum time to wait (seconds)")
+    args = parser.parse_args()
+
+    document_service = DocumentService()
+
+    # Check if every MiniRAG shard is running
+    for url in document_service.shard_service.urls:
+        try:
+            response = httpx.get(f"{url}/health", timeout=5)
+            response.raise_for_status()
+        except Exception:
+            print(f"MiniRAG server {url} is not running")
+            return 1
+
+    inserted = []
+    failed = False
+    for paper_id in args.paper_ids:
+        content = load_content(paper_id)
+        if content is None:
+            print(f"Paper content for {paper_id} not found")
+            failed = True
+            continue
+
+        if document_service.is_indexed(paper_id, content) and not args.force:
+            document = document_service.get_document(paper_id)
+            print(f"Paper {paper_id} is already indexed with document ID {document['document_id']}")
+            inserted.append(paper_id)
+            continue
+
+        try:
+            document_id = document_service.insert(paper_id, content)
+        except Exception as e:
+            print(f"Error indexing paper {paper_id}: {str(e)}")
+            failed = True
+            continue
+
+        print(f"Paper {paper_id} submitted with document ID {document_id}")
+        inserted.append(paper_id)
+
+    if inserted and not args.no_wait:
+        print(f"Waiting for MiniRAG to process {len(inserted)} papers...")
+
+        statuses = document_service.wait(inserted, timeout=args.timeout)
+
+        for paper_id in inserted:
+            status = statuses.get(paper_id, "unknown")
+            print(f"Paper {paper_id}: {status}")
+            if status != "processed":
+                failed = True
+
+    return 1 if failed else 0
 
-    if not paper_path.exists():
-        print(f"Paper content not found at {paper_path}")
-        sys.exit(1)
-
-    # Read the paper content
-    with open(paper_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    # Index the paper with MiniRAG
-    try:
-        # Check if MiniRAG server is running
-        response = httpx.get("http://localhost:9721/health", timeout=5)
-        if response.status_code != 200:
-            print("MiniRAG server is not running")
-            sys.exit(1)
-
-        # Index the paper
-        response = httpx.post(
-            "http://localhost:9721/documents/text",
-            json={
-                "text": content,
-                "description": f"Paper {paper_id}"
-            },
-            timeout=60
-        )
-
-        print(f"Response status: {response.status_code}")
-        print(f"Response text: {response.text}")
-
-        if response.status_code != 200:
-            print(f"Error indexing paper: {response.text}")
-            sys.exit(1)
-
-        # For async processing, we need to wait and then list documents
-        print("Document submitted for processing. Waiting for processing to complete...")
-        import time
-
-        # Get the document ID from the processing queue
-        max_attempts = 10
-        document_id = None
-
-        for attempt in range(max_attempts):
-            print(f"Checking document status (attempt {attempt+1}/{max_attempts})...")
-
-            # Get document statuses
-            response = httpx.get("http://localhost:9721/documents/status", timeout=10)
-            if response.status_code != 200:
-                print(f"Error getting document status: {response.text}")
-                time.sleep(5)
-                continue
-
-            statuses = response.json()
-            print(f"Status response: {json.dumps(statuses, indent=2)}")
-
-            # Check for processing documents
-            processing_docs = statuses.get("statuses", {}).get("processing", [])
-            completed_docs = statuses.get("statuses", {}).get("completed", [])
-
-            # First check if any document is still processing
-            for doc in processing_docs:
-                if isinstance(doc, dict) and doc.get("content_summary", "").startswith("LLMS GET LOST IN MULTI-TURN CONVERSATION"):
-                    document_id = doc.get("id")
-                    print(f"Found document in processing queue with ID: {document_id}")
-                    break
-
-            # Then check completed documents
-            if not document_id:
-                for doc in completed_docs:
-                    if isinstance(doc, dict) and doc.get("content_summary", "").startswith("LLMS GET LOST IN MULTI-TURN CONVERSATION"):
-                        document_id = doc.get("id")
-                        print(f"Found document in completed queue with ID: {document_id}")
-                        break
-
-            if document_id:
-                break
-
-            print("Document still processing, waiting 5 seconds...")
-            time.sleep(5)
-
-        if not document_id:
-            print("No document ID found for this paper")
-            sys.exit(1)
-
-        # Save the document ID
-        with open(Path(f"data/index/{paper_id}/document_id.txt"), 'w') as f:
-            f.write(document_id)
-
-        print(f"Paper {paper_id} indexed successfully with document ID {document_id}")
-
-    except Exception as e:
-        print(f"Error: {str(e)}")
-        sys.exit(1)
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
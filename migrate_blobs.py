@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Script to move markdown written by older versions into the blob store.
+
+Papers processed before the blob store existed keep their markdown twice, as
+plain files under data/papers/markdown/ and data/index/. This stores it once
+in data/blobs/, points each paper's manifest at the blob and removes the
+plain copies. With --gc, blobs no longer referenced by any manifest or
+cached conversion are deleted as well.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+from app.storage import (
+    BLOBS_DIR,
+    CONVERSIONS_DIR,
+    PAPERS_DIR,
+    read_json,
+    read_manifest,
+    record_blob_artifact,
+    remove_artifact,
+)
+
+MARKDOWN_DIR = Path("data/papers/markdown")
+INDEX_DIR = Path("data/index")
+
+# Blobs younger than this may belong to an ingestion that has not yet
+# updated its manifest
+GC_GRACE_SECONDS = 3600
+
+
+def migrate_paper(paper_id: str, keep: bool) -> int:
+    """
+    Move one paper's markdown into the blob store.
+
+    Args:
+        paper_id: ID of the paper
+        keep: Keep the plain files instead of deleting them
+
+    Returns:
+        Number of bytes freed
+    """
+    markdown_path = MARKDOWN_DIR / paper_id / f"{paper_id}.md"
+    content_path = INDEX_DIR / paper_id / f"{paper_id}_content.md"
+    legacy_paths = [p for p in (markdown_path, content_path) if p.exists()]
+
+    if not legacy_paths:
+        return 0
+
+    entry = read_manifest(paper_id)["artifacts"].get("markdown")
+    if not entry or "blob" not in entry:
+        record_blob_artifact(paper_id, "markdown", legacy_paths[0].read_bytes())
+    remove_artifact(paper_id, "content")
+
+    if keep:
+        return 0
+
+    freed = 0
+    for path in legacy_paths:
+        freed += path.stat().st_size
+        path.unlink()
+
+    if markdown_path.parent.exists() and not any(markdown_path.parent.iterdir()):
+        markdown_path.parent.rmdir()
+
+    return freed
+
+
+def collect_garbage() -> int:
+    """
+    Delete blobs that no manifest or cached conversion refers to.
+
+    Returns:
+        Number of bytes freed
+    """
+    referenced = set()
+    for path in PAPERS_DIR.glob("*/manifest.json"):
+        for entry in read_manifest(path.parent.name)["artifacts"].values():
+            if "blob" in entry:
+                referenced.add(entry["blob"])
+    for path in CONVERSIONS_DIR.glob("*.json"):
+        entry = read_json(path)
+        if entry:
+            referenced.add(entry["markdown"])
+
+    freed = 0
+    now = time.time()
+    for path in BLOBS_DIR.glob("*/*"):
+        key = path.name.split(".")[0]
+        if key in referenced or path.name.startswith(".") or now - path.stat().st_mtime < GC_GRACE_SECONDS:
+            continue
+        freed += path.stat().st_size
+        path.unlink()
+
+    return freed
+
+
+def main():
+    """Main function to migrate markdown into the blob store."""
+    parser = argparse.ArgumentParser(description="Move paper markdown into the blob store")
+    parser.add_argument("paper_ids", nargs="*", help="Papers to migrate (default: all)")
+    parser.add_argument("--keep", action="store_true", help="Keep the plain markdown files")
+    parser.add_argument("--gc", action="store_true", help="Delete unreferenced blobs")
+    args = parser.parse_args()
+
+    paper_ids = args.paper_ids or sorted(
+        {p.name for p in MARKDOWN_DIR.glob("*") if p.is_dir()}
+        | {p.name for p in INDEX_DIR.glob("*") if p.is_dir()}
+    )
+
+    freed = 0
+    for paper_id in paper_ids:
+        try:
+            paper_freed = migrate_paper(paper_id, args.keep)
+        except Exception as e:
+            print(f"Error migrating paper {paper_id}: {str(e)}")
+            continue
+        freed += paper_freed
+        print(f"Migrated paper {paper_id} ({paper_freed} bytes freed)")
+
+    if args.gc:
+        freed += collect_garbage()
+
+    print(f"Done, {freed} bytes freed")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Script to move papers to the MiniRAG shard they hash to.
+
+After an endpoint is added to MINIRAG_URLS, the papers that now hash to
+it are still answered by their old shard. This script inserts each of
+them into its new shard and waits for the new shards to process them.
+Moved papers are deleted from their old shard; papers their new shard
+failed to process are pointed back at the old one.
+"""
+
+import sys
+import argparse
+
+from app.services.document_service import DocumentService
+from index_paper import load_content
+
+
+def main():
+    """Main function to rebalance papers across MiniRAG shards."""
+    parser = argparse.ArgumentParser(description="Move papers to the MiniRAG shard they hash to")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the papers that would move")
+    parser.add_argument("--keep-old", action="store_true", help="Do not delete moved papers from their old shard")
+    parser.add_argument("--timeout", type=float, default=None, help="Maximum time to wait (seconds)")
+    args = parser.parse_args()
+
+    document_service = DocumentService()
+    shard_service = document_service.shard_service
+
+    moves = shard_service.misplaced()
+    if not moves:
+        print(f"All papers are on their shard ({len(shard_service.urls)} shards)")
+        return 0
+
+    for move in moves:
+        print(f"Paper {move['paper_id']}: {move['shard']} -> {move['target']}")
+
+    if args.dry_run:
+        return 0
+
+    failed = False
+    moved = []
+    for move in moves:
+        paper_id = move["paper_id"]
+        content = load_content(paper_id)
+        if content is None:
+            print(f"Paper content for {paper_id} not found")
+            failed = True
+            continue
+
+        old = document_service.get_document(paper_id)
+
+        try:
+            document_service.insert(paper_id, content, shard=move["target"])
+        except Exception as e:
+            print(f"Error inserting paper {paper_id} into {move['target']}: {str(e)}")
+            failed = True
+            continue
+
+        moved.append((move, old, content))
+
+    if not moved:
+        return 1
+
+    print(f"Waiting for MiniRAG to process {len(moved)} papers...")
+
+    statuses = document_service.wait([move["paper_id"] for move, _, _ in moved], timeout=args.timeout)
+
+    for move, old, content in moved:
+        paper_id = move["paper_id"]
+        status = statuses.get(paper_id, "unknown")
+
+        if status != "processed":
+            # Keep answering from the old shard until the paper is moved again
+            document_service.record(
+                paper_id, old["document_id"], content, status=old.get("status", "processed"), shard=move["shard"]
+            )
+            print(f"Paper {paper_id} not moved: {status} on {move['target']}")
+            failed = True
+            continue
+
+        if not args.keep_old:
+            try:
+                document_service.delete(old["document_id"], move["shard"])
+            except Exception as e:
+                print(f"Could not delete paper {paper_id} from {move['shard']}: {str(e)}")
+
+        print(f"Paper {paper_id} moved to {move['target']}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,16 @@ load_dotenv()
 host = os.getenv("HOST", "0.0.0.0")
 port = int(os.getenv("PORT", "8000"))
 
+# Auto-reload is for development only; it doubles startup work
+reload = os.getenv("RELOAD", "false").lower() == "true"
+workers = int(os.getenv("WORKERS", "1"))
+
 if __name__ == "__main__":
     print(f"Starting AlphaXIV API server at http://{host}:{port}")
-    uvicorn.run("app.main:app", host=host, port=port, reload=True)
+    uvicorn.run(
+        "app.main:app",
+        host=host,
+        port=port,
+        reload=reload,
+        workers=None if reload else workers
+    )
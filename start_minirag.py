@@ -22,6 +22,8 @@ def main():
     parser.add_argument("--embedding-model", default=os.getenv("MINIRAG_EMBEDDING_MODEL", "text-embedding-3-large"), help="Embedding model for MiniRAG")
     parser.add_argument("--llm-binding", default=os.getenv("MINIRAG_LLM_BINDING", "openai"), help="LLM binding for MiniRAG")
     parser.add_argument("--llm-model", default=os.getenv("MINIRAG_LLM_MODEL", "gpt-4-turbo"), help="LLM model for MiniRAG")
+    parser.add_argument("--llm-binding-host", default=os.getenv("MINIRAG_LLM_BINDING_HOST", ""), help="LLM server URL (e.g. a local OpenAI-compatible server)")
+    parser.add_argument("--embedding-binding-host", default=os.getenv("MINIRAG_EMBEDDING_BINDING_HOST", ""), help="Embedding server URL")
     parser.add_argument("--openai-api-key", default=os.getenv("OPENAI_API_KEY", ""), help="OpenAI API key")
     parser.add_argument("--input-dir", default=os.getenv("MINIRAG_INPUT_DIR", "./data/inputs"), help="Directory containing input documents")
     parser.add_argument("--port", default=os.getenv("MINIRAG_PORT", "9621"), help="Server port")
@@ -47,6 +49,12 @@ def main():
         "--max-tokens", "128000"  # Use a large token limit for GPT-4 Turbo
     ]
 
+    # Point the bindings at local servers instead of the hosted APIs
+    if args.llm_binding_host:
+        command += ["--llm-binding-host", args.llm_binding_host]
+    if args.embedding_binding_host:
+        command += ["--embedding-binding-host", args.embedding_binding_host]
+
     # Set environment variables for models
     os.environ["EMBEDDING_MODEL"] = args.embedding_model
     os.environ["LLM_MODEL"] = args.llm_model
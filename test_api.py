@@ -20,19 +20,27 @@ def test_process_paper(base_url, arxiv_url):
     else:
         return None
 
-def test_chat(base_url, paper_id, query):
-    """Test the chat endpoint."""
+def test_chat(base_url, paper_id, query, wait=0):
+    """Test the chat endpoint, retrying until the paper can be chatted with."""
     print(f"Testing chat endpoint with paper ID: {paper_id} and query: {query}")
     
-    response = requests.post(
-        f"{base_url}/api/chat",
-        json={"paper_id": paper_id, "query": query}
-    )
+    deadline = time.time() + wait
+    while True:
+        response = requests.post(
+            f"{base_url}/api/chat",
+            json={"paper_id": paper_id, "query": query}
+        )
+        
+        # 404 until at least the abstract of the paper is available
+        if response.status_code != 404 or time.time() >= deadline:
+            break
+        time.sleep(1)
     
     print(f"Response status code: {response.status_code}")
     
     if response.status_code == 200:
         print(f"Response body: {json.dumps(response.json(), indent=2)}")
+        print(f"Completeness: {response.json().get('completeness', 1.0):.0%}")
     else:
         print(f"Error: {response.text}")
 
@@ -41,7 +49,7 @@ def main():
     parser.add_argument("--url", default="http://localhost:8000", help="Base URL of the API")
     parser.add_argument("--arxiv", default="https://arxiv.org/abs/2201.08239", help="arXiv URL to process")
     parser.add_argument("--query", default="What is the main contribution of this paper?", help="Query to ask about the paper")
-    parser.add_argument("--wait", type=int, default=30, help="Time to wait for processing (seconds)")
+    parser.add_argument("--wait", type=int, default=30, help="Maximum time to wait for the paper to become available (seconds)")
     
     args = parser.parse_args()
     
@@ -50,11 +58,10 @@ def main():
     
     if paper_id:
         print(f"Paper ID: {paper_id}")
-        print(f"Waiting {args.wait} seconds for processing to complete...")
-        time.sleep(args.wait)
+        print(f"Waiting up to {args.wait} seconds for the paper to become available...")
         
         # Test chat endpoint
-        test_chat(args.url, paper_id, args.query)
+        test_chat(args.url, paper_id, args.query, args.wait)
     else:
         print("Failed to process paper")
 
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Script to move cold papers to the archive, or restore archived papers.
+
+Without paper IDs, the papers selected by the retention policy
+(TIERING_COLD_AFTER_DAYS and TIERING_MAX_HOT_PAPERS) are evicted. With
+paper IDs, exactly those papers are evicted, or restored with --restore.
+Chat requests restore the archived papers they need on their own.
+"""
+
+import sys
+import argparse
+
+from app.services.tiering_service import TIERED_ARTIFACTS, TieringService
+from app.storage import LOCKS_DIR, LockUnavailable, file_lock
+
+
+def main():
+    """Main function to evict or restore papers."""
+    parser = argparse.ArgumentParser(description="Move cold papers to the archive and back")
+    parser.add_argument("paper_ids", nargs="*", help="Papers to evict or restore (default: cold papers)")
+    parser.add_argument("--restore", action="store_true", help="Restore the papers instead of evicting them")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the cold papers")
+    args = parser.parse_args()
+
+    tiering_service = TieringService()
+
+    if args.restore:
+        if not args.paper_ids:
+            print("Pass the IDs of the papers to restore")
+            return 1
+
+        for paper_id in args.paper_ids:
+            restored = tiering_service.ensure_hot(paper_id, TIERED_ARTIFACTS)
+            print(f"Paper {paper_id}: restored {', '.join(restored) or 'nothing'}")
+        return 0
+
+    if not args.paper_ids:
+        try:
+            with file_lock(LOCKS_DIR / "tiering.lock", blocking=False):
+                papers = tiering_service.sweep(dry_run=args.dry_run)
+        except LockUnavailable:
+            print("Cold papers are already being evicted by another process")
+            return 1
+
+        for paper_id in papers:
+            print(f"Paper {paper_id}: {'cold' if args.dry_run else 'evicted'}")
+        print(f"{len(papers)} papers {'are cold' if args.dry_run else 'evicted'}")
+        return 0
+
+    failed = False
+    for paper_id in args.paper_ids:
+        try:
+            evicted = tiering_service.evict(paper_id)
+        except LockUnavailable:
+            print(f"Paper {paper_id} is being ingested")
+            failed = True
+            continue
+
+        print(f"Paper {paper_id}: archived {', '.join(evicted) or 'nothing'}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())